@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import ChatRoom, Message
+from .models import ArchivedMessage, ChatRoom, Message, ReadCursor
 
 admin.site.register(ChatRoom)
 admin.site.register(Message)
+admin.site.register(ReadCursor)
+admin.site.register(ArchivedMessage)
@@ -3,6 +3,3 @@ from django.apps import AppConfig
 
 class ChatConfig(AppConfig):
     name = 'chat'
-
-    def ready(self):
-        import chat.signals
\ No newline at end of file
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from socialpixel_backend.tombstones import delete_in_batches
+from .models import ArchivedMessage, ChatRoom, Message
+
+CHAT_ARCHIVE_AFTER_DAYS = getattr(settings, 'CHAT_ARCHIVE_AFTER_DAYS', 90)
+
+
+def archive_room(room, batch_size=500, now=None):
+    """
+    Move the messages of `room` older than its archive age to ArchivedMessage,
+    oldest first and `batch_size` per transaction. Returns how many moved.
+
+    Only a prefix of the history is moved, so every message up to
+    `archived_seq` is cold and everything after it is hot. The message the
+    chat list preview points at, and everything after it, stays hot.
+    """
+    now = now or timezone.now()
+    days = room.archive_after_days if room.archive_after_days is not None else CHAT_ARCHIVE_AFTER_DAYS
+    keep_from = Message.all_objects.filter(id=room.last_message_id).values_list('seq', flat=True).first() or room.message_seq
+    candidates = Message.all_objects.filter(room=room, seq__lt=keep_from, timestamp__lt=now - timedelta(days=days))
+    boundary = candidates.aggregate(seq=Max('seq'))['seq']
+    if boundary is None:
+        return 0
+
+    moved = 0
+    table = connection.ops.quote_name(Message._meta.db_table)
+    while True:
+        with transaction.atomic():
+            messages = list(Message.all_objects.filter(room=room, seq__lte=boundary).order_by('seq')[:batch_size])
+            if not messages:
+                return moved
+            ArchivedMessage.all_objects.bulk_create([ArchivedMessage.from_message(message) for message in messages])
+            # A plain DELETE, because the image files now belong to the archived
+            # rows and django_cleanup would remove them on a model delete.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM {} WHERE id IN ({})'.format(table, ', '.join(['%s'] * len(messages))),
+                    [message.id for message in messages],
+                )
+            ChatRoom.all_objects.filter(id=room.id, archived_seq__lt=messages[-1].seq).update(archived_seq=messages[-1].seq)
+            moved += len(messages)
+
+def expire_room(room, batch_size=500, now=None):
+    """Delete the hot and archived messages of `room` older than its retention period."""
+    if room.retention_days is None:
+        return 0
+    cutoff = (now or timezone.now()) - timedelta(days=room.retention_days)
+    deleted = delete_in_batches(ArchivedMessage.all_objects.filter(room=room, timestamp__lt=cutoff), batch_size)
+    deleted += delete_in_batches(Message.all_objects.filter(room=room, timestamp__lt=cutoff), batch_size)
+    if deleted:
+        room.refresh_last_message()
+    return deleted
+
+def room_messages(room_id, before_seq=None, after_seq=None, limit=50):
+    """
+    A page of messages of a room across the hot table and the archive,
+    newest first, or oldest first when `after_seq` is given.
+
+    The archive is only read when the page reaches back past `archived_seq`.
+    Archived rows come back as unsaved Message instances.
+    """
+    if limit <= 0:
+        return []
+    hot = Message.objects.filter(room_id=room_id)
+    archived = ArchivedMessage.objects.filter(room_id=room_id)
+    if before_seq is not None:
+        hot = hot.filter(seq__lt=before_seq)
+        archived = archived.filter(seq__lt=before_seq)
+
+    if after_seq is None:
+        messages = list(hot.order_by('-seq')[:limit])
+        if len(messages) < limit and (before_seq is None or before_seq > 1):
+            archived_seq = ChatRoom.all_objects.values_list('archived_seq', flat=True).get(id=room_id)
+            if archived_seq:
+                messages += [message.as_message() for message in archived.order_by('-seq')[:limit - len(messages)]]
+        return messages
+
+    hot = hot.filter(seq__gt=after_seq).order_by('seq')
+    archived_seq = ChatRoom.all_objects.values_list('archived_seq', flat=True).get(id=room_id)
+    messages = []
+    if after_seq < archived_seq:
+        messages = [message.as_message() for message in archived.filter(seq__gt=after_seq).order_by('seq')[:limit]]
+    return messages + list(hot[:limit - len(messages)])
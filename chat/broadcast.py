@@ -0,0 +1,63 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .enums import MessageTypeEnums
+from .events import publish_message
+from .models import ChatRoom, Message, ReadCursor
+
+
+def broadcast(room_ids, author, text, batch_size=200):
+    """
+    Post the same text message from `author` to every chatroom in
+    `room_ids`, e.g. for system announcements.
+
+    Each batch locks its rooms, inserts all of its messages with one INSERT
+    and moves the head state of all of its rooms and the author's read
+    cursors with one statement each, instead of several per room. Returns
+    the number of messages sent.
+    """
+    room_ids = sorted(set(room_ids))
+    sent = 0
+    for start in range(0, len(room_ids), batch_size):
+        with transaction.atomic():
+            # Tombstoned rooms are left out in a subquery, keeping the outer joins that hide them out of FOR UPDATE.
+            rooms = ChatRoom.objects.filter(id__in=room_ids[start:start + batch_size]).values('id')
+            # Lock in id order so concurrent broadcasts cannot deadlock.
+            heads = ChatRoom.all_objects.select_for_update().filter(id__in=rooms).order_by('id')
+            now = timezone.now()
+            messages = [
+                Message(author=author, room_id=room_id, text=text, timestamp=now, seq=head + 1)
+                for room_id, head in heads.values_list('id', 'message_seq')
+            ]
+            if not messages:
+                continue
+            Message.objects.bulk_create(messages)
+
+            if messages[0].id is None:
+                # Backends that cannot return ids from a bulk INSERT.
+                seqs = {message.room_id: message.seq for message in messages}
+                rows = Message.all_objects.filter(room_id__in=seqs, seq__in=set(seqs.values())).values_list('room_id', 'seq', 'id')
+                ids = {room_id: id for room_id, seq, id in rows if seqs[room_id] == seq}
+                for message in messages:
+                    message.id = ids[message.room_id]
+
+            ChatRoom.all_objects.filter(id__in=[message.room_id for message in messages]).update(
+                message_seq=Case(*[When(id=message.room_id, then=Value(message.seq)) for message in messages], output_field=models.BigIntegerField()),
+                last_message_id=Case(*[When(id=message.room_id, then=Value(message.id)) for message in messages], output_field=models.BigIntegerField()),
+                last_messaged_timestamp=Case(
+                    When(last_messaged_timestamp__lt=now, then=Value(now)),
+                    default=F('last_messaged_timestamp'),
+                    output_field=models.DateTimeField(),
+                ),
+                last_message_author_id=author.pk,
+                last_message_snippet=text[:100],
+                last_message_type=MessageTypeEnums.TEXT,
+            )
+            # The author has read their own announcement.
+            ReadCursor.advance_many(author.pk, {message.room_id: message.seq for message in messages})
+
+            for message in messages:
+                publish_message(message)
+            sent += len(messages)
+    return sent
@@ -0,0 +1,63 @@
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from socialpixel_backend.pubsub import publish_ephemeral
+from .events import chatroom_group
+from .models import ChatRoom
+from .presence import get_presence
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes new and deleted messages, presence and typing of one chatroom to
+    a connected member.
+
+    Clients connect to ws/chat/<room>/?token=<JWT>; anyone who is not a
+    member of the room is refused. While connected, clients send
+    {"type": "heartbeat"} more often than every CHAT_PRESENCE_TTL seconds
+    to stay online and {"type": "typing"} as the member types. Neither ever
+    touches the database.
+    """
+
+    group = None
+
+    async def connect(self):
+        user = self.scope.get('user')
+        self.room = int(self.scope['url_route']['kwargs']['room'])
+        if user is None or not user.is_authenticated or not await self.is_member(user, self.room):
+            await self.close()
+            return
+
+        self.profile = user.pk
+        self.group = chatroom_group(self.room)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        await self.heartbeat()
+
+    async def disconnect(self, code):
+        if self.group is not None:
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+            # Other tabs of the member may still be connected.
+            if await sync_to_async(get_presence().leave)(self.room, self.profile, self.channel_name):
+                await publish_ephemeral(self.channel_layer, self.group, 'presence.left', {'room': self.room, 'profile': self.profile})
+
+    async def receive_json(self, content, **kwargs):
+        # Messages are sent through the GraphQL mutations; the socket only
+        # carries ephemeral state.
+        if content.get('type') == 'heartbeat':
+            await self.heartbeat()
+        elif content.get('type') == 'typing':
+            if await sync_to_async(get_presence().typing)(self.room, self.profile):
+                await publish_ephemeral(self.channel_layer, self.group, 'typing', {'room': self.room, 'profile': self.profile})
+
+    async def heartbeat(self):
+        if await sync_to_async(get_presence().heartbeat)(self.room, self.profile, self.channel_name):
+            await publish_ephemeral(self.channel_layer, self.group, 'presence.joined', {'room': self.room, 'profile': self.profile})
+
+    async def pubsub_event(self, event):
+        await self.send_json({'type': event['kind'], 'data': event['data']})
+
+    @database_sync_to_async
+    def is_member(self, user, room):
+        return ChatRoom.objects.filter(id=room, members=user.pk).exists()
@@ -0,0 +1,6 @@
+from django.db import models
+
+class MessageTypeEnums(models.IntegerChoices):
+        TEXT = 0
+        IMAGE = 1
+        POST = 2
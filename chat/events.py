@@ -0,0 +1,23 @@
+from socialpixel_backend.pubsub import publish
+
+
+def chatroom_group(room_id):
+    return 'chatroom-{}'.format(room_id)
+
+def message_payload(message):
+    return {
+        'id': message.id,
+        'room': message.room_id,
+        'seq': message.seq,
+        'author': message.author.user.username,
+        'text': message.text,
+        'image': message.image.url if message.image else None,
+        'post': str(message.post_id) if message.post_id else None,
+        'timestamp': message.timestamp.isoformat(),
+    }
+
+def publish_message(message):
+    publish(chatroom_group(message.room_id), 'message.added', message_payload(message))
+
+def publish_message_deleted(message):
+    publish(chatroom_group(message.room_id), 'message.deleted', {'id': message.id, 'room': message.room_id})
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from chat.archive import archive_room, expire_room
+from chat.models import ChatRoom
+
+
+class Command(BaseCommand):
+    help = 'Delete chat messages past their room retention period and move old messages to the archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Messages moved or deleted per statement.')
+
+    def handle(self, *args, **options):
+        rooms = ChatRoom.all_objects.filter(Q(retention_days__isnull=False) | Q(message_seq__gt=F('archived_seq') + 1)).order_by('id')
+        for room in rooms.iterator():
+            deleted = expire_room(room, options['batch_size'])
+            if deleted:
+                room.refresh_from_db()
+            moved = archive_room(room, options['batch_size'])
+            if deleted or moved:
+                self.stdout.write(f'Room {room.id}: deleted {deleted}, archived {moved}')
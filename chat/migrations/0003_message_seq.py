@@ -0,0 +1,45 @@
+# Generated by Django 3.1.7 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+
+def number_existing_messages(apps, schema_editor):
+    # Existing messages are numbered per room in the order they were sent.
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    for room_id in ChatRoom.objects.values_list('id', flat=True).iterator():
+        messages = []
+        for seq, message_id in enumerate(Message.objects.filter(room_id=room_id).order_by('timestamp', 'id').values_list('id', flat=True), start=1):
+            messages.append(Message(id=message_id, seq=seq))
+        Message.objects.bulk_update(messages, ['seq'], batch_size=1000)
+        ChatRoom.objects.filter(id=room_id).update(message_seq=len(messages))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_auto_20210329_1543'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='message_seq',
+            field=models.BigIntegerField(default=0, help_text='Sequence number of the latest message in the chatroom'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='seq',
+            field=models.BigIntegerField(editable=False, help_text='Position of the message in its chatroom, starting at 1', null=True),
+        ),
+        migrations.RunPython(number_existing_messages, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='message',
+            name='seq',
+            field=models.BigIntegerField(editable=False, help_text='Position of the message in its chatroom, starting at 1'),
+        ),
+        migrations.AddConstraint(
+            model_name='message',
+            constraint=models.UniqueConstraint(fields=('room', 'seq'), name='unique_message_seq_per_room'),
+        ),
+    ]
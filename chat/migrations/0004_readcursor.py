@@ -0,0 +1,29 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_profile_deleted_on'),
+        ('chat', '0003_message_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadCursor',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('last_read_seq', models.BigIntegerField(default=0, help_text='Sequence number of the latest message the member has read')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_cursors', to='users.profile')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_cursors', to='chat.chatroom')),
+            ],
+            options={
+                'verbose_name': 'ReadCursor',
+                'verbose_name_plural': 'ReadCursors',
+                'unique_together': {('room', 'member')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_last_message(apps, schema_editor):
+    # Historical models have no preview() helper, so the columns are set here.
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    for room_id, seq in ChatRoom.objects.filter(message_seq__gt=0).values_list('id', 'message_seq').iterator():
+        message = Message.objects.filter(room_id=room_id).order_by('-seq').first()
+        if message is None:
+            continue
+        message_type = 1 if message.image else 2 if message.post_id else 0
+        ChatRoom.objects.filter(id=room_id).update(
+            last_message_id=message.id,
+            last_message_author_id=message.author_id,
+            last_message_snippet=(message.text or '')[:100],
+            last_message_type=message_type,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_profile_deleted_on'),
+        ('chat', '0004_readcursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message',
+            field=models.ForeignKey(blank=True, help_text='Latest message in the chatroom', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_author',
+            field=models.ForeignKey(blank=True, help_text='Author of the latest message', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.profile'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_snippet',
+            field=models.CharField(blank=True, help_text='Start of the text of the latest message', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_type',
+            field=models.IntegerField(blank=True, choices=[(0, 'Text'), (1, 'Image'), (2, 'Post')], help_text='Kind of the latest message', null=True),
+        ),
+        migrations.RunPython(fill_last_message, migrations.RunPython.noop),
+    ]
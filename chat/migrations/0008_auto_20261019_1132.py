@@ -0,0 +1,34 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_profile_deleted_on'),
+        ('chat', '0007_message_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='dm_profile_a',
+            field=models.ForeignKey(blank=True, help_text='Member with the lower id of a direct message room', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.profile'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='dm_profile_b',
+            field=models.ForeignKey(blank=True, help_text='Member with the higher id of a direct message room', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.profile'),
+        ),
+        migrations.AddConstraint(
+            model_name='chatroom',
+            constraint=models.UniqueConstraint(fields=('dm_profile_a', 'dm_profile_b'), name='unique_direct_room'),
+        ),
+        migrations.AddConstraint(
+            model_name='chatroom',
+            constraint=models.CheckConstraint(check=models.Q(dm_profile_a__lt=django.db.models.expressions.F('dm_profile_b')), name='direct_room_profiles_ordered'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_profile_deleted_on'),
+        ('posts', '0002_auto_20210329_1543'),
+        ('chat', '0008_auto_20261019_1132'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='archive_after_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Days before messages move to the archive, CHAT_ARCHIVE_AFTER_DAYS when empty', null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='archived_seq',
+            field=models.BigIntegerField(default=0, help_text='Messages up to this sequence number live in the archive'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='retention_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Days before messages are deleted, kept forever when empty', null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField()),
+                ('text', models.TextField(blank=True, null=True)),
+                ('image', models.ImageField(blank=True, null=True, upload_to='')),
+                ('seq', models.BigIntegerField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.profile')),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.post')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='chat.chatroom')),
+            ],
+            options={
+                'verbose_name': 'ArchivedMessage',
+                'verbose_name_plural': 'ArchivedMessages',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivedmessage',
+            constraint=models.UniqueConstraint(fields=('room', 'seq'), name='unique_archived_message_seq_per_room'),
+        ),
+    ]
@@ -1,11 +1,15 @@
 from uuid import uuid4
 from django.utils import timezone
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
 from users.models import Profile
 from posts.models import Post
 from pathlib import PurePath
 from upload_validator import FileTypeValidator
 from django.core.validators import FileExtensionValidator
+from socialpixel_backend.tombstones import TombstoneManager
+from .enums import MessageTypeEnums
 
 
 class ChatRoom(models.Model):
@@ -15,10 +19,71 @@ class ChatRoom(models.Model):
     members = models.ManyToManyField(Profile, related_name='member_in',blank=True)
     created_timestamp = models.DateTimeField(auto_now_add=True)
     last_messaged_timestamp = models.DateTimeField(default=timezone.now)
+    message_seq = models.BigIntegerField(default=0, help_text="Sequence number of the latest message in the chatroom")
+    last_message = models.ForeignKey('Message', related_name='+', on_delete=models.SET_NULL, null=True, blank=True, help_text="Latest message in the chatroom")
+    last_message_author = models.ForeignKey(Profile, related_name='+', on_delete=models.SET_NULL, null=True, blank=True, help_text="Author of the latest message")
+    last_message_snippet = models.CharField(max_length=100, blank=True, help_text="Start of the text of the latest message")
+    last_message_type = models.IntegerField(choices=MessageTypeEnums.choices, null=True, blank=True, help_text="Kind of the latest message")
+    dm_profile_a = models.ForeignKey(Profile, related_name='+', on_delete=models.CASCADE, null=True, blank=True, help_text="Member with the lower id of a direct message room")
+    dm_profile_b = models.ForeignKey(Profile, related_name='+', on_delete=models.CASCADE, null=True, blank=True, help_text="Member with the higher id of a direct message room")
+    archive_after_days = models.PositiveIntegerField(null=True, blank=True, help_text="Days before messages move to the archive, CHAT_ARCHIVE_AFTER_DAYS when empty")
+    retention_days = models.PositiveIntegerField(null=True, blank=True, help_text="Days before messages are deleted, kept forever when empty")
+    archived_seq = models.BigIntegerField(default=0, help_text="Messages up to this sequence number live in the archive")
+
+    # Rooms of deleted accounts and the chatrooms of deleted channels.
+    objects = TombstoneManager('created_by__deleted_on', 'channel_chatroom__deleted_on')
+    all_objects = models.Manager()
 
     def __str__(self) -> str:
         return str(self.id) + str(self.name)
 
+    @classmethod
+    def direct_room(cls, profile, other):
+        """
+        Return the direct message room of two profiles and whether it was just
+        created. The pair is stored in id order under a unique constraint, so
+        concurrent callers all end up with the same room.
+        """
+        profile_a, profile_b = sorted([profile, other], key=lambda p: p.pk)
+        room = cls.objects.filter(dm_profile_a=profile_a, dm_profile_b=profile_b).first()
+        if room is not None:
+            return room, False
+        try:
+            with transaction.atomic():
+                room = cls.objects.create(
+                    created_by=profile,
+                    name='{}, {}'.format(profile_a.user.username, profile_b.user.username),
+                    dm_profile_a=profile_a,
+                    dm_profile_b=profile_b,
+                )
+                room.members.add(profile_a, profile_b)
+                return room, True
+        except IntegrityError:
+            return cls.objects.get(dm_profile_a=profile_a, dm_profile_b=profile_b), False
+
+    def next_message_seq(self):
+        """
+        Return the sequence number for the next message of the room, locking
+        the room row until the caller's transaction ends so concurrent
+        senders are numbered one after another.
+        """
+        self.message_seq = ChatRoom.all_objects.select_for_update().values_list('message_seq', flat=True).get(id=self.id)
+        return self.message_seq + 1
+
+    def refresh_last_message(self):
+        """Point the preview at the latest remaining message, e.g. after the last one was deleted."""
+        latest = self.message_set.order_by('-seq').first()
+        if latest is None:
+            ChatRoom.all_objects.filter(id=self.id).update(last_message=None, last_message_author=None, last_message_snippet='', last_message_type=None)
+        else:
+            ChatRoom.all_objects.filter(id=self.id).update(**latest.preview())
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dm_profile_a', 'dm_profile_b'], name='unique_direct_room'),
+            models.CheckConstraint(check=Q(dm_profile_a__lt=F('dm_profile_b')), name='direct_room_profiles_ordered'),
+        ]
+
 class Message(models.Model):
     author = models.ForeignKey(
         Profile, 
@@ -27,9 +92,13 @@ class Message(models.Model):
     )
     id = models.BigAutoField(primary_key=True)
     room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     text = models.TextField(null=True, blank=True)
     post = models.ForeignKey(Post, on_delete=models.SET_NULL, null=True, blank=True)
+    seq = models.BigIntegerField(editable=False, help_text="Position of the message in its chatroom, starting at 1")
+
+    objects = TombstoneManager('author__deleted_on')
+    all_objects = models.Manager()
 
     def chatimage_upload_path(instance, filename):
         ext = filename.split('.')[-1]
@@ -51,9 +120,132 @@ class Message(models.Model):
         blank=True,
     )
 
+    @property
+    def message_type(self):
+        if self.image:
+            return MessageTypeEnums.IMAGE
+        if self.post_id:
+            return MessageTypeEnums.POST
+        return MessageTypeEnums.TEXT
+
+    def head_state(self):
+        """
+        The ChatRoom columns to set when this message becomes the latest one.
+        The timestamp only ever moves forward, whatever order concurrent
+        senders commit in.
+        """
+        return {
+            'message_seq': self.seq,
+            'last_messaged_timestamp': Case(
+                When(last_messaged_timestamp__lt=self.timestamp, then=Value(self.timestamp)),
+                default=F('last_messaged_timestamp'),
+                output_field=models.DateTimeField(),
+            ),
+            **self.preview(),
+        }
+
+    def preview(self):
+        """The ChatRoom columns that show this message in the chat list."""
+        return {
+            'last_message_id': self.id,
+            'last_message_author_id': self.author_id,
+            'last_message_snippet': (self.text or '')[:100],
+            'last_message_type': self.message_type,
+        }
+
+    def save(self, *args, **kwargs):
+        if self.seq is None:
+            with transaction.atomic():
+                self.seq = self.room.next_message_seq()
+                super().save(*args, **kwargs)
+                # Sequence number, timestamp and preview move together in one UPDATE.
+                ChatRoom.all_objects.filter(id=self.room_id).update(**self.head_state())
+                # The author has read everything up to their own message.
+                ReadCursor.advance(self.room_id, self.author_id, self.seq)
+        else:
+            super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return "{}:{}".format(str(self.author), self.room)
 
     class Meta:
         ordering = ['-timestamp']
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'seq'], name='unique_message_seq_per_room'),
+        ]
+
+
+class ArchivedMessage(models.Model):
+    """
+    Cold storage for old messages, moved out of Message by the
+    archive_messages command so the hot table only holds recent history.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    author = models.ForeignKey(Profile, related_name='+', on_delete=models.CASCADE)
+    room = models.ForeignKey(ChatRoom, related_name='archived_messages', on_delete=models.CASCADE)
+    timestamp = models.DateTimeField()
+    text = models.TextField(null=True, blank=True)
+    post = models.ForeignKey(Post, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    image = models.ImageField(null=True, blank=True)
+    seq = models.BigIntegerField()
 
+    objects = TombstoneManager('author__deleted_on')
+    all_objects = models.Manager()
+
+    @classmethod
+    def from_message(cls, message):
+        return cls(
+            id=message.id, author_id=message.author_id, room_id=message.room_id, timestamp=message.timestamp,
+            text=message.text, post_id=message.post_id, image=message.image.name or None, seq=message.seq,
+        )
+
+    def as_message(self):
+        """An unsaved Message with the same contents, for the read path."""
+        return Message(
+            id=self.id, author_id=self.author_id, room_id=self.room_id, timestamp=self.timestamp,
+            text=self.text, post_id=self.post_id, image=self.image.name or None, seq=self.seq,
+        )
+
+    def __str__(self) -> str:
+        return "{}:{}".format(self.author_id, self.room_id)
+
+    class Meta:
+        verbose_name = 'ArchivedMessage'
+        verbose_name_plural = 'ArchivedMessages'
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'seq'], name='unique_archived_message_seq_per_room'),
+        ]
+
+class ReadCursor(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    room = models.ForeignKey(ChatRoom, related_name='read_cursors', on_delete=models.CASCADE)
+    member = models.ForeignKey(Profile, related_name='read_cursors', on_delete=models.CASCADE)
+    last_read_seq = models.BigIntegerField(default=0, help_text="Sequence number of the latest message the member has read")
+
+    @classmethod
+    def advance(cls, room_id, member_id, seq):
+        """Move the member's cursor forward to `seq`; cursors never move backwards."""
+        if cls.objects.filter(room_id=room_id, member_id=member_id, last_read_seq__lt=seq).update(last_read_seq=seq):
+            return
+        cursor, created = cls.objects.get_or_create(room_id=room_id, member_id=member_id, defaults={'last_read_seq': seq})
+        if not created:
+            cls.objects.filter(pk=cursor.pk, last_read_seq__lt=seq).update(last_read_seq=seq)
+
+    @classmethod
+    def advance_many(cls, member_id, seqs):
+        """Move the member's cursors forward to the seq of each room id in `seqs`, with one INSERT and one UPDATE."""
+        if not seqs:
+            return
+        cls.objects.bulk_create([cls(room_id=room_id, member_id=member_id, last_read_seq=seq) for room_id, seq in seqs.items()], ignore_conflicts=True)
+        cls.objects.filter(room_id__in=seqs, member_id=member_id).update(last_read_seq=Greatest(
+            F('last_read_seq'),
+            Case(*[When(room_id=room_id, then=Value(seq)) for room_id, seq in seqs.items()], output_field=models.BigIntegerField()),
+        ))
+
+    def __str__(self) -> str:
+        return "{}:{}:{}".format(str(self.member), self.room_id, self.last_read_seq)
+
+    class Meta:
+        verbose_name = 'ReadCursor'
+        verbose_name_plural = 'ReadCursors'
+        unique_together = ['room', 'member']
@@ -0,0 +1,145 @@
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+PRESENCE_TTL = getattr(settings, 'CHAT_PRESENCE_TTL', 30)
+TYPING_TTL = getattr(settings, 'CHAT_TYPING_TTL', 5)
+TYPING_INTERVAL = getattr(settings, 'CHAT_TYPING_INTERVAL', 3)
+
+
+class InMemoryPresence:
+    """
+    In-process presence and typing state per chatroom. Only suitable for
+    tests and single process deployments.
+
+    Presence is kept per connection, e.g. per open tab, and members are
+    online while any of their connections sent a heartbeat in the last
+    PRESENCE_TTL seconds. They are typing for TYPING_TTL seconds after
+    their last keystroke event.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._online = {}
+        self._typing = {}
+        self._typing_sent = {}
+
+    @staticmethod
+    def _live(members, now):
+        for member in [member for member, expires in members.items() if expires <= now]:
+            del members[member]
+        return members
+
+    def heartbeat(self, room_id, profile_id, connection=None):
+        """Mark the member online on `connection`; True if they were not online before."""
+        now = time.monotonic()
+        with self._lock:
+            connections = self._live(self._online.setdefault(room_id, {}), now)
+            joined = all(member != profile_id for member, _ in connections)
+            connections[(profile_id, connection)] = now + PRESENCE_TTL
+            return joined
+
+    def leave(self, room_id, profile_id, connection=None):
+        """Drop `connection`; True if the member has no other connection left and went offline."""
+        with self._lock:
+            connections = self._live(self._online.get(room_id, {}), time.monotonic())
+            connections.pop((profile_id, connection), None)
+            if any(member == profile_id for member, _ in connections):
+                return False
+            self._typing.get(room_id, {}).pop(profile_id, None)
+            self._typing_sent.pop((room_id, profile_id), None)
+            return True
+
+    def online(self, room_id):
+        with self._lock:
+            return sorted(set(member for member, _ in self._live(self._online.get(room_id, {}), time.monotonic())))
+
+    def typing(self, room_id, profile_id):
+        """
+        Record a typing event; True if it should be broadcast, which is at
+        most once per TYPING_INTERVAL seconds per member.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._live(self._typing.setdefault(room_id, {}), now)[profile_id] = now + TYPING_TTL
+            if self._typing_sent.get((room_id, profile_id), float('-inf')) + TYPING_INTERVAL > now:
+                return False
+            self._typing_sent[(room_id, profile_id)] = now
+            return True
+
+    def typing_members(self, room_id):
+        with self._lock:
+            return sorted(self._live(self._typing.get(room_id, {}), time.monotonic()))
+
+
+class RedisPresence:
+    """
+    Presence and typing state in Redis sorted sets scored by expiry time, so
+    every process sees the same members and stale ones drop out on read.
+    Each member also has a set of their live connections, and only leaves
+    the room once the last of them is gone.
+    """
+
+    def __init__(self):
+        import redis
+        self.client = redis.Redis.from_url(settings.REDIS_URL)
+
+    def _touch(self, key, profile_id, ttl):
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zadd(key, {str(profile_id): now + ttl})
+        pipe.expire(key, int(ttl) + 1)
+        return pipe.execute()[1]
+
+    def _live(self, key):
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zrange(key, 0, -1)
+        return sorted(int(member) for member in pipe.execute()[1])
+
+    def heartbeat(self, room_id, profile_id, connection=None):
+        self._touch('presence:{}:{}'.format(room_id, profile_id), connection or '', PRESENCE_TTL)
+        return bool(self._touch('presence:{}'.format(room_id), profile_id, PRESENCE_TTL))
+
+    def leave(self, room_id, profile_id, connection=None):
+        connections = 'presence:{}:{}'.format(room_id, profile_id)
+        pipe = self.client.pipeline()
+        pipe.zrem(connections, connection or '')
+        pipe.zremrangebyscore(connections, '-inf', time.time())
+        pipe.zcard(connections)
+        if pipe.execute()[2]:
+            return False
+        pipe = self.client.pipeline()
+        pipe.zrem('presence:{}'.format(room_id), str(profile_id))
+        pipe.zrem('typing:{}'.format(room_id), str(profile_id))
+        pipe.execute()
+        return True
+
+    def online(self, room_id):
+        return self._live('presence:{}'.format(room_id))
+
+    def typing(self, room_id, profile_id):
+        self._touch('typing:{}'.format(room_id), profile_id, TYPING_TTL)
+        key = 'typing:{}:{}'.format(room_id, profile_id)
+        return bool(self.client.set(key, 1, nx=True, px=int(TYPING_INTERVAL * 1000)))
+
+    def typing_members(self, room_id):
+        return self._live('typing:{}'.format(room_id))
+
+
+_presence = None
+
+def get_presence():
+    global _presence
+    if _presence is None:
+        _presence = import_string(getattr(settings, 'CHAT_PRESENCE_BACKEND', 'chat.presence.InMemoryPresence'))()
+    return _presence
+
+def reset_presence():
+    """Drop the backend so the next get_presence() starts from a fresh one, e.g. between tests."""
+    global _presence
+    _presence = None
@@ -0,0 +1,9 @@
+from socialpixel_backend.tombstones import delete_in_batches
+from .models import ArchivedMessage, ChatRoom, Message
+
+
+def purge_room(room, batch_size=500):
+    """Delete a chatroom, its hot and archived messages in batches of `batch_size` rows first."""
+    delete_in_batches(Message.all_objects.filter(room=room), batch_size)
+    delete_in_batches(ArchivedMessage.all_objects.filter(room=room), batch_size)
+    ChatRoom.all_objects.filter(id=room.id).delete()
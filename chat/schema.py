@@ -1,12 +1,27 @@
 import graphene
+from django.db.models import OuterRef, Subquery
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
 
-from .models import ChatRoom, Message
+from .enums import MessageTypeEnums
+from .events import chatroom_group, publish_message, publish_message_deleted
+from .archive import room_messages
+from .models import ChatRoom, Message, ReadCursor
+from .presence import get_presence
+from .search import search_messages
 from users.models import Profile, User
 from posts.models import Post
+from socialpixel_backend.cursors import decode_cursor, encode_cursor, keyset_page, row_cursor
 
 from posts.schema import ModifierEnumsType
+from users.schema import ProfileType
+
+CHATROOMS_ORDERING = ['-last_messaged_timestamp', '-id']
+
+class MessageTypeEnumsType(graphene.Enum):
+    TEXT = MessageTypeEnums.TEXT
+    IMAGE = MessageTypeEnums.IMAGE
+    POST = MessageTypeEnums.POST
 
 class MessageType(DjangoObjectType):
     def resolve_image(self, info):
@@ -18,34 +33,157 @@ class MessageType(DjangoObjectType):
         model = Message
         fields = "__all__"
 
+def with_last_read_seq(chatrooms, profile):
+    """Annotate each chatroom with the read cursor of `profile` as `last_read_seq`."""
+    cursors = ReadCursor.objects.filter(room=OuterRef('pk'), member=profile).values('last_read_seq')
+    return chatrooms.annotate(last_read_seq=Subquery(cursors[:1]))
+
+class LastMessageType(graphene.ObjectType):
+    id = graphene.ID(description="Unique ID of the latest message")
+    author = graphene.Field(ProfileType, description="Author of the latest message")
+    snippet = graphene.String(description="Start of the text of the latest message")
+    type = graphene.Field(MessageTypeEnumsType, description="Whether the latest message is a text, image or post")
+    timestamp = graphene.DateTime(description="When the latest message was sent")
+
 class ChatRoomType(DjangoObjectType):
+    unread_count = graphene.Int(description="Number of messages the current user has not read yet")
+    last_message = graphene.Field(LastMessageType, description="Preview of the latest message, read from the chatroom itself")
+    cursor = graphene.String(description="Pass as after to chatrooms to get the chatrooms following this one")
+
+    def resolve_last_message(self, info):
+        if self.last_message_id is None:
+            return None
+        return LastMessageType(
+            id=self.last_message_id,
+            author=self.last_message_author,
+            snippet=self.last_message_snippet,
+            type=self.last_message_type,
+            timestamp=self.last_messaged_timestamp,
+        )
+
+    def resolve_cursor(self, info):
+        return row_cursor(self, CHATROOMS_ORDERING)
+
+    def resolve_unread_count(self, info):
+        if not hasattr(self, 'last_read_seq'):
+            cursors = ReadCursor.objects.filter(room=self, member=info.context.viewer.profile)
+            self.last_read_seq = cursors.values_list('last_read_seq', flat=True).first()
+        return max(self.message_seq - (self.last_read_seq or 0), 0)
+
     class Meta:
         model = ChatRoom
         fields = "__all__"
 
+class MessageSearchResultType(graphene.ObjectType):
+    message = graphene.Field(MessageType, description="The matching message")
+    rank = graphene.Float(description="How well the message matches, higher is better")
+    cursor = graphene.String(description="Pass as after to search_messages to get the results following this one")
+
+class RoomPresenceType(graphene.ObjectType):
+    online = graphene.List(ProfileType, description="Members with the chatroom open")
+    typing = graphene.List(ProfileType, description="Members typing in the chatroom right now")
+
 class ChatQuery(graphene.AbstractType):
 
     chatroom = graphene.Field(ChatRoomType, id=graphene.ID(required=True), description="Get one chatroom based on given id")
-    chatrooms = graphene.List(ChatRoomType, description="Get all chatrooms in the database for given user")
+    chatrooms = graphene.List(
+        ChatRoomType,
+        after=graphene.String(description="Cursor of the last chatroom of the previous page"),
+        first=graphene.Int(default_value=50, description="Maximum number of chatrooms, at most 100"),
+        description="Get the chatrooms of given user, most recently messaged first"
+    )
+    messages = graphene.List(
+        MessageType,
+        room=graphene.ID(required=True),
+        before_seq=graphene.Int(description="Only messages older than this sequence number, newest first"),
+        after_seq=graphene.Int(description="Only messages newer than this sequence number, oldest first"),
+        first=graphene.Int(default_value=50, description="Maximum number of messages, at most 100"),
+        description="Get a page of messages in given chatroom, newest first unless after_seq is given"
+    )
+    search_messages = graphene.List(
+        MessageSearchResultType,
+        text=graphene.String(required=True, description="Words to search for"),
+        room=graphene.ID(description="Only search this chatroom"),
+        after=graphene.String(description="Cursor of the last result of the previous page"),
+        first=graphene.Int(default_value=20, description="Maximum number of results, at most 100"),
+        description="Search the messages of the chatrooms of given user, best match first"
+    )
+    room_presence = graphene.Field(RoomPresenceType, room=graphene.ID(required=True), description="Get the members online and typing in given chatroom")
 
     def resolve_chatroom(self, info, id):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get chatroom by chatroom_id!')
         else:
-            chatroom = ChatRoom.objects.get(id=id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
+            chatroom = with_last_read_seq(ChatRoom.objects.select_related('last_message_author__user'), current_user_profile).get(id=id)
 
-            if not current_user_profile.member_in.filter(id=chatroom.id).exists():
+            if chatroom.id not in info.context.viewer.chatrooms:
                 raise GraphQLError('You must be part of chatroom to get chatroom details!')
             else:
                 return chatroom
 
-    def resolve_chatrooms(self, info):
+    def resolve_chatrooms(self, info, after=None, first=50):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get chatrooms!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
-            return current_user_profile.member_in.get_queryset().order_by('-last_messaged_timestamp')
+            current_user_profile = info.context.viewer.profile
+            chatrooms = current_user_profile.member_in.select_related('last_message_author__user')
+            return keyset_page(with_last_read_seq(chatrooms, current_user_profile), CHATROOMS_ORDERING, after, first)
+
+    def resolve_messages(self, info, room, before_seq=None, after_seq=None, first=50):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to get messages!')
+        else:
+            if int(room) not in info.context.viewer.chatrooms:
+                raise GraphQLError('You must be part of chatroom to get messages!')
+            else:
+                # Oldest first after after_seq, so paging forward from a reconnect never skips a message.
+                return room_messages(int(room), before_seq, after_seq, min(first, 100))
+
+    def resolve_search_messages(self, info, text, room=None, after=None, first=20):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to search messages!')
+        else:
+            if after is not None:
+                after = decode_cursor(after, 2)
+            if room is not None:
+                room = int(room)
+            messages = search_messages(info.context.viewer.profile, text, room, after, first)
+            return [
+                MessageSearchResultType(message=message, rank=message.search_rank, cursor=encode_cursor(message.search_rank, message.id))
+                for message in messages
+            ]
+
+    def resolve_room_presence(self, info, room):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to get chatroom presence!')
+        else:
+            if int(room) not in info.context.viewer.chatrooms:
+                raise GraphQLError('You must be part of chatroom to get chatroom presence!')
+            else:
+                presence = get_presence()
+                online = presence.online(int(room))
+                typing = presence.typing_members(int(room))
+                profiles = Profile.objects.select_related('user').in_bulk(set(online) | set(typing))
+                return RoomPresenceType(
+                    online=[profiles[pk] for pk in online if pk in profiles],
+                    typing=[profiles[pk] for pk in typing if pk in profiles],
+                )
+
+class ChatSubscriptions(graphene.AbstractType):
+
+    message_added = graphene.Field(MessageType, room=graphene.ID(required=True), description="Receive messages sent to given chatroom")
+
+    def resolve_message_added(root, info, room):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to subscribe to chatroom!')
+        else:
+            if int(room) not in info.context.viewer.chatrooms:
+                raise GraphQLError('You must be part of chatroom to subscribe to messages!')
+            else:
+                events = info.context.subscribe(chatroom_group(room), 'message.added')
+                messages = events.map(lambda data: Message.objects.filter(id=data['id']).first())
+                return messages.filter(lambda message: message is not None)
 
 class CreateChatRoom(graphene.Mutation):
 
@@ -61,7 +199,7 @@ class CreateChatRoom(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to create chatroom!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             chatroom = ChatRoom(created_by=current_user_profile, name=name)
             chatroom.save()
             chatroom.members.add(current_user_profile)
@@ -70,6 +208,7 @@ class CreateChatRoom(graphene.Mutation):
                 chatroom.members.add(Profile.objects.get(user=User.objects.get(username=user)))
 
             chatroom.save()
+            info.context.viewer.refresh('chatrooms')
         
             return CreateChatRoom(
                 chatroom,
@@ -89,7 +228,7 @@ class DeleteChatRoom(graphene.Mutation):
             raise GraphQLError('You must be logged to delete on posts!')
         else:
             chatroom = ChatRoom.objects.get(id=id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if (chatroom.created_by != current_user_profile):
                 raise GraphQLError('You must be chat creator to delete on chatroom!')
@@ -112,10 +251,11 @@ class TextMessage(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to create post!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             chatroom = ChatRoom.objects.get(id=room)
             message = Message(author=current_user_profile, room=chatroom, text=text)
             message.save()
+            publish_message(message)
 
             return TextMessage(
                 message,
@@ -134,10 +274,11 @@ class ImageMessage(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to create post!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             chatroom = ChatRoom.objects.get(id=room)
             message = Message(author=current_user_profile, room=chatroom, image=info.context.FILES[image])
             message.save()
+            publish_message(message)
 
             return TextMessage(
                 message,
@@ -156,10 +297,11 @@ class PostMessage(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to create post!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             chatroom = ChatRoom.objects.get(id=room)
             message = Message(author=current_user_profile, room=chatroom, post = Post.objects.get(post_id=post))
             message.save()
+            publish_message(message)
 
             return TextMessage(
                 message,
@@ -177,12 +319,17 @@ class DeleteMessage(graphene.Mutation):
             raise GraphQLError('You must be logged to delete on posts!')
         else:
             message = Message.objects.get(id=id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if (message.author != current_user_profile):
                 raise GraphQLError('You must be chat creator to delete on chatroom!')
             else:
+                publish_message_deleted(message)
+                chatroom = message.room
+                was_last_message = chatroom.last_message_id == message.id
                 message.delete()
+                if was_last_message:
+                    chatroom.refresh_last_message()
                 
                 return DeleteMessage(
                     success=True
@@ -201,16 +348,15 @@ class ChatMembership(graphene.Mutation):
             raise GraphQLError('You must be logged to upvote posts!')
         else:
             chatroom = ChatRoom.objects.get(id=id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if modifier == ModifierEnumsType.ADD:
-                if not chatroom.members.filter(user=current_user_profile).exists():
+                if chatroom.id not in info.context.viewer.chatrooms:
                     chatroom.members.add(current_user_profile)
-                    chatroom.save()
             if modifier == ModifierEnumsType.REMOVE:
-                if chatroom.members.filter(user=current_user_profile).exists():
+                if chatroom.id in info.context.viewer.chatrooms:
                     chatroom.members.remove(current_user_profile)
-                    chatroom.save()
+            info.context.viewer.refresh('chatrooms')
                 
             return ChatMembership(
                 success=True
@@ -230,18 +376,106 @@ class EditChatRoomName(graphene.Mutation):
             raise GraphQLError('You must be logged to delete on posts!')
         else:
             chatroom = ChatRoom.objects.get(id=id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if (chatroom.created_by != current_user_profile):
                 raise GraphQLError('You must be chat creator to edit name of chatroom!')
             else:
                 chatroom.name = text
-                chatroom.save()
+                chatroom.save(update_fields=['name'])
                 
                 return EditChatRoomName(
                     success=True
                 )
 
+class EditChatRoomRetention(graphene.Mutation):
+
+    class Arguments:
+        id = graphene.ID(required=True, description="Unique ID of Chat to be edited")
+        archive_after_days = graphene.Int(description="Days before messages move to the archive, empty for the default")
+        retention_days = graphene.Int(description="Days before messages are deleted, empty to keep them forever")
+
+    success = graphene.Boolean(default_value=False, description="Returns whether the retention policy was changed successfully.")
+
+    def mutate(self, info, id, archive_after_days=None, retention_days=None):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to edit chatroom retention!')
+        else:
+            chatroom = ChatRoom.objects.get(id=id)
+            current_user_profile = info.context.viewer.profile
+
+            if (chatroom.created_by != current_user_profile):
+                raise GraphQLError('You must be chat creator to edit retention of chatroom!')
+            elif any(days is not None and days < 1 for days in [archive_after_days, retention_days]):
+                raise GraphQLError('Retention must be at least one day!')
+            else:
+                chatroom.archive_after_days = archive_after_days
+                chatroom.retention_days = retention_days
+                chatroom.save(update_fields=['archive_after_days', 'retention_days'])
+
+                return EditChatRoomRetention(
+                    success=True
+                )
+
+class DirectRoom(graphene.Mutation):
+
+    class Arguments:
+        username = graphene.String(required=True, description="Username of the other member of the conversation")
+
+    chatroom = graphene.Field(ChatRoomType, description="Returns the direct message chatroom of the two users.")
+    created = graphene.Boolean(default_value=False, description="Returns whether the chatroom was created by this call.")
+    success = graphene.Boolean(default_value=False, description="Returns whether the chatroom was found or created successfully.")
+
+    def mutate(self, info, username):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to get direct message chatroom!')
+        else:
+            current_user_profile = info.context.viewer.profile
+            other_profile = Profile.objects.select_related('user').get(user__username=username)
+
+            if other_profile.pk == current_user_profile.pk:
+                raise GraphQLError('You cannot create direct message chatroom with yourself!')
+            else:
+                chatroom, created = ChatRoom.direct_room(current_user_profile, other_profile)
+                if chatroom.id not in info.context.viewer.chatrooms:
+                    # Rejoin a conversation the user left earlier.
+                    chatroom.members.add(current_user_profile)
+                info.context.viewer.refresh('chatrooms')
+
+                return DirectRoom(
+                    chatroom=chatroom,
+                    created=created,
+                    success=True
+                )
+
+class MarkRead(graphene.Mutation):
+
+    class Arguments:
+        room = graphene.ID(required=True, description="Unique ID of Chatroom that was read")
+        seq = graphene.Int(description="Sequence number of the latest message read, defaults to the latest message in the chatroom")
+
+    unread_count = graphene.Int(description="Returns the number of messages still unread.")
+    success = graphene.Boolean(default_value=False, description="Returns whether the chatroom was marked as read successfully.")
+
+    def mutate(self, info, room, seq=None):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to mark chatroom as read!')
+        else:
+            chatroom = ChatRoom.objects.get(id=room)
+            current_user_profile = info.context.viewer.profile
+
+            if chatroom.id not in info.context.viewer.chatrooms:
+                raise GraphQLError('You must be part of chatroom to mark it as read!')
+            else:
+                seq = chatroom.message_seq if seq is None else min(seq, chatroom.message_seq)
+                ReadCursor.advance(chatroom.id, current_user_profile.pk, seq)
+                last_read_seq = ReadCursor.objects.values_list('last_read_seq', flat=True).get(room=chatroom, member=current_user_profile)
+
+                return MarkRead(
+                    unread_count=max(chatroom.message_seq - last_read_seq, 0),
+                    success=True
+                )
+
 class ChatMutation(graphene.ObjectType):
     create_chatroom = CreateChatRoom.Field()
     delete_chatroom = DeleteChatRoom.Field()
@@ -250,4 +484,7 @@ class ChatMutation(graphene.ObjectType):
     post_message = PostMessage.Field()
     delete_message = DeleteMessage.Field()
     modify_membership_chatroom = ChatMembership.Field()
-    edit_chatroom_name = EditChatRoomName.Field()
\ No newline at end of file
+    edit_chatroom_name = EditChatRoomName.Field()
+    edit_chatroom_retention = EditChatRoomRetention.Field()
+    mark_read = MarkRead.Field()
+    direct_room = DirectRoom.Field()
\ No newline at end of file
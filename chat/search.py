@@ -0,0 +1,69 @@
+from django.db import connection
+from graphql import GraphQLError
+
+from .models import ChatRoom, Message
+
+# Both indexes are created by chat/migrations/0007_message_search.py. The
+# Postgres expression index is only used if the query repeats it exactly.
+# Ranks are doubles so cursors compare equal after a round trip.
+POSTGRES_VECTOR = "to_tsvector('simple', coalesce(m.text, ''))"
+
+POSTGRES_MATCHES = f"""
+    SELECT m.id AS id, ts_rank({POSTGRES_VECTOR}, query)::float8 AS rank
+    FROM chat_message m, plainto_tsquery('simple', %s) query
+    WHERE {POSTGRES_VECTOR} @@ query AND m.room_id IN ({{rooms}})
+"""
+
+SQLITE_MATCHES = """
+    SELECT m.id AS id, -bm25(chat_message_fts) AS rank
+    FROM chat_message_fts JOIN chat_message m ON m.id = chat_message_fts.rowid
+    WHERE chat_message_fts MATCH %s AND m.room_id IN ({rooms})
+"""
+
+MEMBER_ROOMS = 'SELECT chatroom_id FROM chat_chatroom_members WHERE profile_id = %s'
+
+
+def _sqlite_match(text):
+    # Quote every word so FTS5 operators typed by users are searched literally.
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in text.split())
+
+def search_messages(profile, text, room=None, after=None, first=20):
+    """
+    Rank the messages matching `text` in the chatrooms `profile` is a member
+    of, or only in `room`, best match first.
+
+    `after` is the (rank, id) of the last result of the previous page.
+    Returns the messages with their rank set as `search_rank`.
+    """
+    if connection.vendor == 'postgresql':
+        matches, term = POSTGRES_MATCHES, text
+    elif connection.vendor == 'sqlite':
+        matches, term = SQLITE_MATCHES, _sqlite_match(text)
+    else:
+        raise GraphQLError('Message search is not supported on this database!')
+    if not term.strip():
+        return []
+
+    rooms, params = MEMBER_ROOMS, [term, profile.pk]
+    if room is not None:
+        rooms, params = MEMBER_ROOMS + ' AND chatroom_id = %s', params + [room]
+    sql = 'SELECT id, rank FROM ({}) ranked'.format(matches.format(rooms=rooms))
+    if after is not None:
+        sql += ' WHERE rank < %s OR (rank = %s AND id < %s)'
+        params += [after[0], after[0], after[1]]
+    sql += ' ORDER BY rank DESC, id DESC LIMIT %s'
+    params.append(max(min(first, 100), 0))
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ranked = cursor.fetchall()
+
+    # Messages of deleted accounts and of rooms of deleted channels are left out.
+    visible = Message.objects.filter(room__in=ChatRoom.objects.values('id'))
+    messages = visible.select_related('author__user').in_bulk([id for id, rank in ranked])
+    results = []
+    for id, rank in ranked:
+        if id in messages:
+            messages[id].search_rank = rank
+            results.append(messages[id])
+    return results
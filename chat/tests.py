@@ -1,3 +1,357 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from graphql_jwt.shortcuts import get_token
+
+from chat.broadcast import broadcast
+from chat.events import publish_message
+from chat.models import ArchivedMessage, ChatRoom, Message
+from chat.presence import get_presence, reset_presence
+from socialpixel_backend.asgi import application
+from socialpixel_backend.testing import GraphQLTestMixin
+
+
+class ChatConsumerTests(TransactionTestCase):
+    def setUp(self):
+        # Flushing the test database sends no signals, so drop cached JWT users.
+        cache.clear()
+        reset_presence()
+        db = get_user_model()
+        self.member = db.objects.create_user('member', 'member@example.com', 'password123')
+        self.outsider = db.objects.create_user('outsider', 'outsider@example.com', 'password123')
+        self.room = ChatRoom.objects.create(created_by=self.member.profile, name='room')
+        self.room.members.add(self.member.profile)
+
+    def communicator(self, user):
+        return WebsocketCommunicator(application, f'/ws/chat/{self.room.id}/?token={get_token(user)}')
+
+    async def test_member_receives_new_messages(self):
+        communicator = self.communicator(self.member)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual((await communicator.receive_json_from())['type'], 'presence.joined')
+
+        @database_sync_to_async
+        def send():
+            message = Message.objects.create(author=self.member.profile, room=self.room, text='hello')
+            publish_message(message)
+            return message
+
+        message = await send()
+        event = await communicator.receive_json_from()
+        self.assertEqual(event['type'], 'message.added')
+        self.assertEqual(event['data']['id'], message.id)
+        self.assertEqual(event['data']['text'], 'hello')
+        await communicator.disconnect()
+
+    async def test_non_members_are_refused(self):
+        communicator = self.communicator(self.outsider)
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_presence_and_typing(self):
+        communicator = self.communicator(self.member)
+        await communicator.connect()
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'presence.joined', 'data': {'room': self.room.id, 'profile': self.member.pk}})
+        self.assertEqual(get_presence().online(self.room.id), [self.member.pk])
+
+        # Repeated typing events within the interval are broadcast once.
+        await communicator.send_json_to({'type': 'typing'})
+        await communicator.send_json_to({'type': 'typing'})
+        await communicator.send_json_to({'type': 'heartbeat'})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'typing')
+        self.assertTrue(await communicator.receive_nothing())
+        self.assertEqual(get_presence().typing_members(self.room.id), [self.member.pk])
+
+        await communicator.disconnect()
+        self.assertEqual(get_presence().online(self.room.id), [])
+
+    async def test_member_stays_online_until_the_last_tab_closes(self):
+        first, second = self.communicator(self.member), self.communicator(self.member)
+        await first.connect()
+        self.assertEqual((await first.receive_json_from())['type'], 'presence.joined')
+        await second.connect()
+
+        await second.disconnect()
+        self.assertTrue(await first.receive_nothing())
+        self.assertEqual(get_presence().online(self.room.id), [self.member.pk])
+
+        await first.disconnect()
+        self.assertEqual(get_presence().online(self.room.id), [])
+
+
+class GraphQLSubscriptionTests(TransactionTestCase):
+    def setUp(self):
+        # Flushing the test database sends no signals, so drop cached JWT users.
+        cache.clear()
+        db = get_user_model()
+        self.member = db.objects.create_user('member', 'member@example.com', 'password123')
+        self.room = ChatRoom.objects.create(created_by=self.member.profile, name='room')
+        self.room.members.add(self.member.profile)
+
+    async def test_message_added(self):
+        communicator = WebsocketCommunicator(application, '/graphql/', subprotocols=['graphql-ws'])
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, 'graphql-ws')
+
+        await communicator.send_json_to({'type': 'connection_init', 'payload': {'authToken': get_token(self.member)}})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'connection_ack')
+        await communicator.send_json_to({
+            'type': 'start',
+            'id': '1',
+            'payload': {
+                'query': 'subscription ($room: ID!) { messageAdded(room: $room) { id text } }',
+                'variables': {'room': self.room.id},
+            },
+        })
+        # Wait for the operation to be registered before publishing.
+        await communicator.send_json_to({'type': 'unknown'})
+        self.assertTrue(await communicator.receive_nothing())
+
+        @database_sync_to_async
+        def send():
+            message = Message.objects.create(author=self.member.profile, room=self.room, text='hello')
+            publish_message(message)
+            return message
+
+        message = await send()
+        response = await communicator.receive_json_from()
+        self.assertEqual(response['type'], 'data')
+        self.assertEqual(response['payload']['data']['messageAdded'], {'id': str(message.id), 'text': 'hello'})
+
+        await communicator.send_json_to({'type': 'stop', 'id': '1'})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'complete')
+        await communicator.disconnect()
+
+
+class MessageHistoryTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.member = db.objects.create_user('member', 'member@example.com', 'password123')
+        self.room = ChatRoom.objects.create(created_by=self.member.profile, name='room')
+        self.room.members.add(self.member.profile)
+        for text in ['one', 'two', 'three', 'four']:
+            Message.objects.create(author=self.member.profile, room=self.room, text=text)
+
+    def test_messages_are_numbered_per_room(self):
+        other = ChatRoom.objects.create(created_by=self.member.profile, name='other')
+        message = Message.objects.create(author=self.member.profile, room=other, text='first')
+        self.assertEqual(message.seq, 1)
+        self.assertEqual(list(self.room.message_set.order_by('seq').values_list('seq', flat=True)), [1, 2, 3, 4])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.message_seq, 4)
+
+    def test_room_presence(self):
+        reset_presence()
+        get_presence().heartbeat(self.room.id, self.member.pk)
+        query = 'query ($room: ID!) { roomPresence(room: $room) { online { user { username } } typing { user { username } } } }'
+        self.assertEqual(self.query(self.member, query, room=self.room.id)['roomPresence'], {'online': [{'user': {'username': 'member'}}], 'typing': []})
+
+    def test_paging(self):
+        query = 'query ($room: ID!, $before: Int, $after: Int) { messages(room: $room, beforeSeq: $before, afterSeq: $after, first: 2) { seq text } }'
+        self.assertEqual(self.query(self.member, query, room=self.room.id)['messages'], [{'seq': 4, 'text': 'four'}, {'seq': 3, 'text': 'three'}])
+        self.assertEqual(self.query(self.member, query, room=self.room.id, before=3)['messages'], [{'seq': 2, 'text': 'two'}, {'seq': 1, 'text': 'one'}])
+        self.assertEqual(self.query(self.member, query, room=self.room.id, after=1)['messages'], [{'seq': 2, 'text': 'two'}, {'seq': 3, 'text': 'three'}])
+
+
+class ReadCursorTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.author = db.objects.create_user('author', 'author@example.com', 'password123')
+        self.reader = db.objects.create_user('reader', 'reader@example.com', 'password123')
+        self.rooms = []
+        for name in ['one', 'two']:
+            room = ChatRoom.objects.create(created_by=self.author.profile, name=name)
+            room.members.add(self.author.profile, self.reader.profile)
+            self.rooms.append(room)
+        for text in ['a', 'b', 'c']:
+            Message.objects.create(author=self.author.profile, room=self.rooms[0], text=text)
+        Message.objects.create(author=self.author.profile, room=self.rooms[1], text='d')
+
+    def unread_counts(self, user):
+        chatrooms = self.query(user, '{ chatrooms { name unreadCount } }')['chatrooms']
+        return {chatroom['name']: chatroom['unreadCount'] for chatroom in chatrooms}
+
+    def test_unread_counts(self):
+        self.assertEqual(self.unread_counts(self.author), {'one': 0, 'two': 0})
+        # Viewer profile, chatrooms with their unread counts.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.unread_counts(self.reader), {'one': 3, 'two': 1})
+
+    def test_mark_read(self):
+        mutation = 'mutation ($room: ID!, $seq: Int) { markRead(room: $room, seq: $seq) { unreadCount } }'
+        self.assertEqual(self.query(self.reader, mutation, room=self.rooms[0].id, seq=2)['markRead']['unreadCount'], 1)
+        # Cursors never move backwards.
+        self.assertEqual(self.query(self.reader, mutation, room=self.rooms[0].id, seq=1)['markRead']['unreadCount'], 1)
+        self.assertEqual(self.query(self.reader, mutation, room=self.rooms[1].id)['markRead']['unreadCount'], 0)
+        self.assertEqual(self.unread_counts(self.reader), {'one': 1, 'two': 0})
+
+
+class ChatListTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.member = db.objects.create_user('member', 'member@example.com', 'password123')
+        for name in ['one', 'two', 'three']:
+            room = ChatRoom.objects.create(created_by=self.member.profile, name=name)
+            room.members.add(self.member.profile)
+            Message.objects.create(author=self.member.profile, room=room, text='hello from {}'.format(name))
+
+    def test_last_message_preview(self):
+        query = '{ chatrooms { name lastMessage { snippet type author { user { username } } } } }'
+        # Viewer profile, chatrooms with their previews and authors.
+        with self.assertNumQueries(2):
+            chatrooms = self.query(self.member, query)['chatrooms']
+        self.assertEqual(chatrooms[0]['lastMessage'], {'snippet': 'hello from three', 'type': 'TEXT', 'author': {'user': {'username': 'member'}}})
+
+    def test_deleting_last_message_moves_preview(self):
+        room = ChatRoom.objects.get(name='one')
+        Message.objects.create(author=self.member.profile, room=room, text='newer')
+        query = 'mutation ($id: ID!) { deleteMessage(id: $id) { success } }'
+        self.query(self.member, query, id=room.message_set.get(seq=2).id)
+        room.refresh_from_db()
+        self.assertEqual(room.last_message_snippet, 'hello from one')
+
+    def test_keyset_pagination(self):
+        query = 'query ($after: String) { chatrooms(first: 2, after: $after) { name cursor } }'
+        page = self.query(self.member, query)['chatrooms']
+        self.assertEqual([chatroom['name'] for chatroom in page], ['three', 'two'])
+        page = self.query(self.member, query, after=page[-1]['cursor'])['chatrooms']
+        self.assertEqual([chatroom['name'] for chatroom in page], ['one'])
+
+    def test_keyset_pagination_within_one_millisecond(self):
+        millisecond = timezone.now().replace(microsecond=123000)
+        for offset, name in enumerate(['three', 'two', 'one'], 1):
+            ChatRoom.objects.filter(name=name).update(last_messaged_timestamp=millisecond + timedelta(microseconds=offset * 100))
+        query = 'query ($after: String) { chatrooms(first: 2, after: $after) { name cursor } }'
+        page = self.query(self.member, query)['chatrooms']
+        page += self.query(self.member, query, after=page[-1]['cursor'])['chatrooms']
+        self.assertEqual([chatroom['name'] for chatroom in page], ['one', 'two', 'three'])
+
+
+class RoomHeadTests(TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.member = db.objects.create_user('member', 'member@example.com', 'password123')
+        self.rooms = [ChatRoom.objects.create(created_by=self.member.profile, name=name) for name in ['one', 'two']]
+        Message.objects.create(author=self.member.profile, room=self.rooms[0], text='first')
+
+    def test_timestamp_never_moves_backwards(self):
+        later = timezone.now() + timedelta(minutes=5)
+        ChatRoom.objects.filter(id=self.rooms[0].id).update(last_messaged_timestamp=later)
+        message = Message.objects.create(author=self.member.profile, room=self.rooms[0], text='second')
+        room = ChatRoom.objects.get(id=self.rooms[0].id)
+        self.assertEqual(room.last_messaged_timestamp, later)
+        self.assertEqual((room.message_seq, room.last_message_id), (2, message.id))
+
+    def test_broadcast(self):
+        self.assertEqual(broadcast([room.id for room in self.rooms], self.member.profile, 'announcement'), 2)
+        for room, seq in zip(self.rooms, [2, 1]):
+            room.refresh_from_db()
+            message = room.message_set.get(seq=seq)
+            self.assertEqual(message.text, 'announcement')
+            self.assertEqual((room.message_seq, room.last_message_id, room.last_message_snippet), (seq, message.id, 'announcement'))
+            self.assertEqual(room.last_messaged_timestamp, message.timestamp)
+            self.assertEqual(room.read_cursors.get(member=self.member.profile).last_read_seq, seq)
+
+
+class MessageSearchTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.member = db.objects.create_user('member', 'member@example.com', 'password123')
+        outsider = db.objects.create_user('outsider', 'outsider@example.com', 'password123')
+        self.room = ChatRoom.objects.create(created_by=self.member.profile, name='room')
+        self.room.members.add(self.member.profile)
+        other = ChatRoom.objects.create(created_by=outsider.profile, name='other')
+        other.members.add(outsider.profile)
+        self.once = Message.objects.create(author=self.member.profile, room=self.room, text='pixel art tonight?')
+        self.twice = Message.objects.create(author=self.member.profile, room=self.room, text='pixel pixel pixel')
+        Message.objects.create(author=self.member.profile, room=self.room, text='unrelated')
+        Message.objects.create(author=outsider.profile, room=other, text='pixel secrets')
+
+    def search(self, **variables):
+        query = 'query ($text: String!, $after: String) { searchMessages(text: $text, after: $after, first: 1) { message { id } cursor } }'
+        return self.query(self.member, query, **variables)['searchMessages']
+
+    def test_ranked_pages_of_member_rooms(self):
+        page = self.search(text='pixel')
+        self.assertEqual([result['message']['id'] for result in page], [str(self.twice.id)])
+        page = self.search(text='pixel', after=page[0]['cursor'])
+        self.assertEqual([result['message']['id'] for result in page], [str(self.once.id)])
+        self.assertEqual(self.search(text='pixel', after=page[0]['cursor']), [])
+
+    def test_index_follows_deletes(self):
+        self.twice.delete()
+        self.assertEqual([result['message']['id'] for result in self.search(text='pixel')], [str(self.once.id)])
+        # FTS syntax typed by users is searched literally.
+        self.assertEqual(self.search(text='pixel OR "'), [])
+
+
+class DirectRoomTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.first = db.objects.create_user('first', 'first@example.com', 'password123')
+        self.second = db.objects.create_user('second', 'second@example.com', 'password123')
+
+    def direct_room(self, user, username):
+        query = 'mutation ($username: String!) { directRoom(username: $username) { created chatroom { id } } }'
+        return self.query(user, query, username=username)['directRoom']
+
+    def test_one_room_per_pair(self):
+        created = self.direct_room(self.second, 'first')
+        self.assertTrue(created['created'])
+        found = self.direct_room(self.first, 'second')
+        self.assertEqual(found, {'created': False, 'chatroom': created['chatroom']})
+        room = ChatRoom.objects.get()
+        self.assertEqual(set(room.members.values_list('pk', flat=True)), {self.first.pk, self.second.pk})
+        self.assertEqual((room.dm_profile_a_id, room.dm_profile_b_id), (self.first.pk, self.second.pk))
+
+    def test_pair_is_unique(self):
+        ChatRoom.direct_room(self.first.profile, self.second.profile)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ChatRoom.objects.create(created_by=self.first.profile, name='copy', dm_profile_a=self.first.profile, dm_profile_b=self.second.profile)
+
+
+class MessageArchiveTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.member = db.objects.create_user('member', 'member@example.com', 'password123')
+        self.room = ChatRoom.objects.create(created_by=self.member.profile, name='room', archive_after_days=30)
+        self.room.members.add(self.member.profile)
+        old = timezone.now() - timedelta(days=60)
+        for seq in range(1, 6):
+            Message.objects.create(author=self.member.profile, room=self.room, text=str(seq), timestamp=old + timedelta(minutes=seq))
+
+    def page(self, **variables):
+        query = 'query ($room: ID!, $before: Int, $after: Int) { messages(room: $room, beforeSeq: $before, afterSeq: $after, first: 3) { seq text author { user { username } } } }'
+        return [message['seq'] for message in self.query(self.member, query, room=self.room.id, **variables)['messages']]
+
+    def test_archive_keeps_reads_transparent(self):
+        call_command('archive_messages', batch_size=2, stdout=StringIO())
+        self.room.refresh_from_db()
+        # The latest message stays hot for the chat list preview.
+        self.assertEqual(list(Message.objects.values_list('seq', flat=True)), [5])
+        self.assertEqual(self.room.archived_seq, 4)
+        self.assertEqual(ArchivedMessage.objects.count(), 4)
+
+        self.assertEqual(self.page(), [5, 4, 3])
+        self.assertEqual(self.page(before=3), [2, 1])
+        self.assertEqual(self.page(after=2), [3, 4, 5])
+
+    def test_retention(self):
+        call_command('archive_messages', stdout=StringIO())
+        ChatRoom.objects.filter(id=self.room.id).update(retention_days=45)
+        Message.objects.create(author=self.member.profile, room=self.room, text='new')
+        call_command('archive_messages', stdout=StringIO())
+        self.assertFalse(ArchivedMessage.objects.exists())
+        self.assertEqual(self.page(), [6])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.last_message_snippet, 'new')
@@ -1,8 +1,15 @@
 from django.contrib import admin
-from .models import Channel, Game, Leaderboard, LeaderboardRow, ValidatePost
+from .models import Channel, ChannelDailyStats, ChannelStats, Game, GameCell, GameDailyStats, GameFootprint, GameStats, Leaderboard, LeaderboardRow, Standing, ValidatePost
 
 admin.site.register(Channel)
 admin.site.register(Game)
 admin.site.register(Leaderboard)
 admin.site.register(LeaderboardRow)
+admin.site.register(Standing)
 admin.site.register(ValidatePost)
+admin.site.register(ChannelStats)
+admin.site.register(GameStats)
+admin.site.register(ChannelDailyStats)
+admin.site.register(GameDailyStats)
+admin.site.register(GameFootprint)
+admin.site.register(GameCell)
@@ -5,4 +5,5 @@ class GameConfig(AppConfig):
     name = 'game'
 
     def ready(self):
+        import game.names
         import game.signals
\ No newline at end of file
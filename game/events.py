@@ -0,0 +1,20 @@
+from socialpixel_backend.pubsub import publish
+
+
+def validation_queue_group(channel_id):
+    return 'validation-queue-{}'.format(channel_id)
+
+def game_group(game_id):
+    return 'game-{}'.format(game_id)
+
+def publish_validation_queue_changed(validate_post, action):
+    """`action` is 'added' or 'removed'."""
+    publish(validation_queue_group(validate_post.channel_id), 'validation_queue.changed', {
+        'id': validate_post.id,
+        'action': action,
+        'game': validate_post.game_id,
+        'post': validate_post.post_id,
+    })
+
+def publish_leaderboard_changed(game):
+    publish(game_group(game.id), 'leaderboard.changed', {'game': game.id, 'leaderboard': game.leaderboard_id})
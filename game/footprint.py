@@ -0,0 +1,96 @@
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from posts.models import Post
+from .models import Game, GameCell, GameFootprint
+from .stats import bump
+
+# Cells are GAME_GRID_CELL_DEGREES on a side, about 1.1 km of latitude by default.
+GAME_GRID_CELL_DEGREES = getattr(settings, 'GAME_GRID_CELL_DEGREES', 0.01)
+EARTH_RADIUS_M = 6371000
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def cell_of(latitude, longitude):
+    return math.floor(latitude / GAME_GRID_CELL_DEGREES), math.floor(longitude / GAME_GRID_CELL_DEGREES)
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1, math.sqrt(a)))
+
+def track_locations(game_ids, post_ids, sign):
+    """
+    Add (`sign` 1) or remove (-1) the located creator posts among `post_ids`
+    to the footprints of `game_ids`. Run inside the transaction that changes
+    Game.posts.
+    """
+    posts = list(
+        Post.all_objects.filter(pk__in=post_ids, gps_latitude__isnull=False, gps_longitude__isnull=False)
+        .values_list('author_id', 'gps_latitude', 'gps_longitude')
+    )
+    if not posts:
+        return
+    creators = dict(Game.all_objects.filter(pk__in=game_ids).values_list('pk', 'creator_id'))
+
+    footprints = defaultdict(lambda: [0, 0.0, 0.0])
+    cells = defaultdict(int)
+    for game_id, creator_id in creators.items():
+        for author_id, latitude, longitude in posts:
+            if author_id != creator_id:
+                continue
+            footprint = footprints[game_id]
+            footprint[0] += 1
+            footprint[1] += float(latitude)
+            footprint[2] += float(longitude)
+            cells[(game_id, *cell_of(float(latitude), float(longitude)))] += 1
+
+    for game_id, (count, latitude_sum, longitude_sum) in footprints.items():
+        bump(GameFootprint, [{'game_id': game_id}], located_posts=sign * count, latitude_sum=sign * latitude_sum, longitude_sum=sign * longitude_sum)
+    for (game_id, cell_lat, cell_lon), count in cells.items():
+        bump(GameCell, [{'game_id': game_id, 'cell_lat': cell_lat, 'cell_lon': cell_lon}], posts=sign * count)
+    if sign < 0:
+        GameCell.objects.filter(game_id__in=footprints, posts__lte=0).delete()
+
+def games_near(latitude, longitude, radius_m, limit=50):
+    """
+    Games with a located creator post within `radius_m` meters of the
+    point, nearest first, as (game, distance in meters) pairs.
+
+    Candidates come from the grid cells overlapping the search circle's
+    bounding box, so only games with a post nearby are looked at.
+    """
+    lat_span = radius_m / METERS_PER_DEGREE
+    lon_span = min(radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6)), 180)
+    south, west = cell_of(max(latitude - lat_span, -90), longitude - lon_span)
+    north, east = cell_of(min(latitude + lat_span, 90), longitude + lon_span)
+
+    # Longitudes past the antimeridian wrap around to the other side of the grid.
+    turn = round(360 / GAME_GRID_CELL_DEGREES)
+    columns = Q(cell_lon__gte=west, cell_lon__lte=east)
+    if west < -turn // 2:
+        columns |= Q(cell_lon__gte=west + turn)
+    if east >= turn // 2:
+        columns |= Q(cell_lon__lte=east - turn)
+    game_ids = set(GameCell.objects.filter(columns, cell_lat__gte=south, cell_lat__lte=north).values_list('game_id', flat=True))
+    if not game_ids:
+        return []
+
+    games = Game.objects.filter(pk__in=game_ids)
+    nearest = {}
+    located = Post.all_objects.filter(
+        in_game__in=game_ids, author=F('in_game__creator'),
+        gps_latitude__isnull=False, gps_longitude__isnull=False,
+    ).values_list('in_game', 'gps_latitude', 'gps_longitude')
+    for game_id, post_latitude, post_longitude in located:
+        distance = distance_m(latitude, longitude, float(post_latitude), float(post_longitude))
+        if distance <= radius_m and distance < nearest.get(game_id, math.inf):
+            nearest[game_id] = distance
+
+    found = [(game, nearest[game.pk]) for game in games if game.pk in nearest]
+    found.sort(key=lambda pair: (pair[1], pair[0].pk))
+    return found[:limit]
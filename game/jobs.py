@@ -0,0 +1,48 @@
+from users.enums import PointsReasonEnums
+from users import points
+from .events import publish_leaderboard_changed
+from .models import Game, LeaderboardRow
+from .progress import complete
+
+PLACEMENT_POINTS = {1: 1000, 2: 800, 3: 600, 4: 400, 5: 200}
+
+
+def validations(game_id, validator_id, accepted=(), rejected=()):
+    """
+    Award the points of validations of one game by one moderator and place
+    the authors who completed the game.
+
+    `accepted` holds (validate_post_id, post_id, author_id) triples and
+    `rejected` validate_post ids. Points are applied with one award_many and
+    the leaderboard is announced once.
+    """
+    awards = []
+    for validate_post_id, post_id, author_id in accepted:
+        awards.append((author_id, 100, PointsReasonEnums.POST_VALIDATED, post_id))
+        awards.append((validator_id, 50, PointsReasonEnums.VALIDATION_ACCEPTED, validate_post_id))
+    for validate_post_id in rejected:
+        awards.append((validator_id, 200, PointsReasonEnums.VALIDATION_REJECTED, validate_post_id))
+    points.award_many(awards)
+
+    game = None
+    placements = []
+    for author_id in dict.fromkeys(author_id for _, _, author_id in accepted):
+        placement = complete(game_id, author_id)
+        if placement is None:
+            continue
+        if game is None:
+            game = Game.all_objects.only('id', 'leaderboard_id').get(pk=game_id)
+        score = PLACEMENT_POINTS.get(placement, 100)
+        row = LeaderboardRow(leaderboard_id=game.leaderboard_id, user_id=author_id, points=score)
+        row.save()
+        placements.append((author_id, score, PointsReasonEnums.LEADERBOARD_PLACEMENT, row.id))
+
+    if placements:
+        points.award_many(placements)
+        publish_leaderboard_changed(game)
+
+def validation_accepted(validate_post_id, game_id, post_id, author_id, validator_id):
+    validations(game_id, validator_id, accepted=[(validate_post_id, post_id, author_id)])
+
+def validation_rejected(validate_post_id, validator_id):
+    points.award(validator_id, 200, PointsReasonEnums.VALIDATION_REJECTED, validate_post_id)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from game.models import Channel
+from game.purge import purge_channel
+
+
+class Command(BaseCommand):
+    help = 'Delete tombstoned channels and everything that depends on them in bounded batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        channels = Channel.all_objects.filter(deleted_on__isnull=False).order_by('deleted_on')
+        for channel in channels.iterator():
+            purge_channel(channel, options['batch_size'])
+            self.stdout.write(f'Purged channel {channel.id}')
@@ -0,0 +1,31 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from game.models import Channel, Game
+from game.stats import rollup_channels, rollup_games
+
+
+class Command(BaseCommand):
+    help = 'Recount channel and game post totals and the daily stats buckets of the last days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=2,
+            help='Number of days, including today, whose daily buckets are recounted.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of channels or games recounted per batch.',
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=options['days'] - 1), time.min))
+        batch_size = options['batch_size']
+        for model, rollup in [(Channel, rollup_channels), (Game, rollup_games)]:
+            pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            for start in range(0, len(pks), batch_size):
+                rollup(pks[start:start + batch_size], since)
+            self.stdout.write(f'Rolled up {len(pks)} {model._meta.verbose_name_plural.lower()}.')
+        self.stdout.write(self.style.SUCCESS('Stats are up to date.'))
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0005_game_subscribers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channel',
+            name='deleted_on',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Set when the channel is deleted and waiting to be purged', null=True),
+        ),
+    ]
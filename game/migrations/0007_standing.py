@@ -0,0 +1,59 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Min, Sum
+
+
+def rank_existing_rows(apps, schema_editor):
+    # Totals and first completion times per user, ranked the way
+    # game.standings keeps them: total desc, first completion, then user.
+    Leaderboard = apps.get_model('game', 'Leaderboard')
+    LeaderboardRow = apps.get_model('game', 'LeaderboardRow')
+    Standing = apps.get_model('game', 'Standing')
+    for leaderboard_id in Leaderboard.objects.values_list('id', flat=True).iterator():
+        totals = (
+            LeaderboardRow.objects.filter(leaderboard_id=leaderboard_id)
+            .values('user_id')
+            .annotate(total=Sum('points'), first_completed_at=Min('timestamp'))
+            .order_by('-total', 'first_completed_at', 'user_id')
+        )
+        Standing.objects.bulk_create([
+            Standing(leaderboard_id=leaderboard_id, user_id=row['user_id'], total=row['total'], rank=rank, first_completed_at=row['first_completed_at'])
+            for rank, row in enumerate(totals, start=1)
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_profile_deleted_on'),
+        ('game', '0006_channel_deleted_on'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('total', models.IntegerField(default=0)),
+                ('rank', models.IntegerField()),
+                ('first_completed_at', models.DateTimeField(help_text="Time of the user's first row on the leaderboard")),
+                ('leaderboard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='game.leaderboard')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.profile')),
+            ],
+            options={
+                'verbose_name': 'Standing',
+                'verbose_name_plural': 'Standings',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='standing',
+            index=models.Index(fields=['leaderboard', 'rank'], name='game_standing_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='standing',
+            unique_together={('leaderboard', 'user')},
+        ),
+        migrations.RunPython(rank_existing_rows, migrations.RunPython.noop),
+    ]
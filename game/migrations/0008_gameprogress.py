@@ -0,0 +1,69 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Min
+
+
+def count_existing_posts(apps, schema_editor):
+    # Post counts come from Game.posts; completions and their placements
+    # from the order in which players first reached the leaderboard.
+    Game = apps.get_model('game', 'Game')
+    GameProgress = apps.get_model('game', 'GameProgress')
+    LeaderboardRow = apps.get_model('game', 'LeaderboardRow')
+    for game_id, leaderboard_id in Game.objects.values_list('id', 'leaderboard_id').iterator():
+        counts = Game.posts.through.objects.filter(game_id=game_id).values('post__author').annotate(count=Count('id'))
+        progress = {row['post__author']: GameProgress(game_id=game_id, author_id=row['post__author'], post_count=row['count']) for row in counts}
+        completions = (
+            LeaderboardRow.objects.filter(leaderboard_id=leaderboard_id)
+            .values('user_id').annotate(completed_at=Min('timestamp'))
+            .order_by('completed_at', 'user_id')
+        )
+        placement = 0
+        for row in completions:
+            placement += 1
+            entry = progress.setdefault(row['user_id'], GameProgress(game_id=game_id, author_id=row['user_id']))
+            entry.completed_at = row['completed_at']
+            entry.placement = placement
+        GameProgress.objects.bulk_create(progress.values(), batch_size=1000)
+        Game.objects.filter(id=game_id).update(completed_count=placement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_profile_deleted_on'),
+        ('game', '0007_standing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='completed_count',
+            field=models.IntegerField(default=0, help_text='Number of players who have completed the game'),
+        ),
+        migrations.CreateModel(
+            name='GameProgress',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('post_count', models.IntegerField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('placement', models.IntegerField(blank=True, help_text='Order in which the author completed the game, starting at 1', null=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.profile')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='game.game')),
+            ],
+            options={
+                'verbose_name': 'GameProgress',
+                'verbose_name_plural': 'GameProgress',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='gameprogress',
+            constraint=models.UniqueConstraint(fields=('game', 'author'), name='game_progress_unique_author'),
+        ),
+        migrations.AddConstraint(
+            model_name='gameprogress',
+            constraint=models.UniqueConstraint(fields=('game', 'placement'), name='game_progress_unique_placement'),
+        ),
+        migrations.RunPython(count_existing_posts, migrations.RunPython.noop),
+    ]
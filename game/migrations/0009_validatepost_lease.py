@@ -0,0 +1,34 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_profile_deleted_on'),
+        ('game', '0008_gameprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validatepost',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_validations', to='users.profile'),
+        ),
+        migrations.AddField(
+            model_name='validatepost',
+            name='lease_expires',
+            field=models.DateTimeField(blank=True, help_text='Time until which the post is reserved for claimed_by', null=True),
+        ),
+        migrations.AddField(
+            model_name='validatepost',
+            name='priority',
+            field=models.IntegerField(default=0, help_text='Posts with a higher priority are claimed first'),
+        ),
+        migrations.AddIndex(
+            model_name='validatepost',
+            index=models.Index(fields=['channel', '-priority', 'timestamp', 'id'], name='game_validatepost_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def count_existing_subscribers(apps, schema_editor):
+    # Only subscriber counts are incremental; the other totals are filled in
+    # by the first run of rollup_stats.
+    for model, stats, field in [('Channel', 'ChannelStats', 'channel_id'), ('Game', 'GameStats', 'game_id')]:
+        through = apps.get_model('game', model).subscribers.through
+        Stats = apps.get_model('game', stats)
+        counts = through.objects.values(field).annotate(count=Count('id')).values_list(field, 'count')
+        Stats.objects.bulk_create([Stats(**{field: pk, 'subscriber_count': count}) for pk, count in counts], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_validatepost_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelStats',
+            fields=[
+                ('subscriber_count', models.IntegerField(default=0)),
+                ('post_count', models.IntegerField(default=0)),
+                ('player_count', models.IntegerField(default=0, help_text='Number of distinct authors of the posts')),
+                ('rolled_up_at', models.DateTimeField(blank=True, null=True)),
+                ('channel', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='game.channel')),
+            ],
+            options={
+                'verbose_name': 'ChannelStats',
+                'verbose_name_plural': 'ChannelStats',
+            },
+        ),
+        migrations.CreateModel(
+            name='GameStats',
+            fields=[
+                ('subscriber_count', models.IntegerField(default=0)),
+                ('post_count', models.IntegerField(default=0)),
+                ('player_count', models.IntegerField(default=0, help_text='Number of distinct authors of the posts')),
+                ('rolled_up_at', models.DateTimeField(blank=True, null=True)),
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='game.game')),
+            ],
+            options={
+                'verbose_name': 'GameStats',
+                'verbose_name_plural': 'GameStats',
+            },
+        ),
+        migrations.CreateModel(
+            name='GameDailyStats',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('posts', models.IntegerField(default=0)),
+                ('players', models.IntegerField(default=0)),
+                ('submissions', models.IntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='game.game')),
+            ],
+            options={
+                'verbose_name': 'GameDailyStats',
+                'verbose_name_plural': 'GameDailyStats',
+                'ordering': ['day'],
+                'abstract': False,
+                'unique_together': {('game', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ChannelDailyStats',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('posts', models.IntegerField(default=0)),
+                ('players', models.IntegerField(default=0)),
+                ('submissions', models.IntegerField(default=0)),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='game.channel')),
+            ],
+            options={
+                'verbose_name': 'ChannelDailyStats',
+                'verbose_name_plural': 'ChannelDailyStats',
+                'ordering': ['day'],
+                'abstract': False,
+                'unique_together': {('channel', 'day')},
+            },
+        ),
+        migrations.RunPython(count_existing_subscribers, migrations.RunPython.noop),
+    ]
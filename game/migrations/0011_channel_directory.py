@@ -0,0 +1,25 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:45
+
+from django.db import migrations, models
+
+
+def create_missing_channel_stats(apps, schema_editor):
+    Channel = apps.get_model('game', 'Channel')
+    ChannelStats = apps.get_model('game', 'ChannelStats')
+    missing = Channel.objects.filter(stats__isnull=True).values_list('id', flat=True)
+    ChannelStats.objects.bulk_create([ChannelStats(channel_id=channel_id) for channel_id in missing.iterator()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0010_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='channelstats',
+            index=models.Index(fields=['-subscriber_count', '-channel'], name='game_channelstats_popular_idx'),
+        ),
+        migrations.RunPython(create_missing_channel_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:49
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+
+
+def locate_existing_games(apps, schema_editor):
+    # Same grid as game.footprint.
+    size = getattr(settings, 'GAME_GRID_CELL_DEGREES', 0.01)
+    Game = apps.get_model('game', 'Game')
+    GameCell = apps.get_model('game', 'GameCell')
+    GameFootprint = apps.get_model('game', 'GameFootprint')
+    located = (
+        Game.posts.through.objects.filter(post__author=F('game__creator'), post__gps_latitude__isnull=False, post__gps_longitude__isnull=False)
+        .values_list('game_id', 'post__gps_latitude', 'post__gps_longitude')
+        .order_by('game_id')
+    )
+    footprints = {}
+    cells = {}
+    for game_id, latitude, longitude in located.iterator():
+        footprint = footprints.setdefault(game_id, GameFootprint(game_id=game_id))
+        footprint.located_posts += 1
+        footprint.latitude_sum += float(latitude)
+        footprint.longitude_sum += float(longitude)
+        key = (game_id, math.floor(float(latitude) / size), math.floor(float(longitude) / size))
+        cell = cells.setdefault(key, GameCell(game_id=game_id, cell_lat=key[1], cell_lon=key[2]))
+        cell.posts += 1
+    GameFootprint.objects.bulk_create(footprints.values(), batch_size=1000)
+    GameCell.objects.bulk_create(cells.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0011_channel_directory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameFootprint',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='footprint', serialize=False, to='game.game')),
+                ('located_posts', models.IntegerField(default=0, help_text='Number of creator posts with GPS coordinates')),
+                ('latitude_sum', models.FloatField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'GameFootprint',
+                'verbose_name_plural': 'GameFootprints',
+            },
+        ),
+        migrations.CreateModel(
+            name='GameCell',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('cell_lat', models.IntegerField()),
+                ('cell_lon', models.IntegerField()),
+                ('posts', models.IntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cells', to='game.game')),
+            ],
+            options={
+                'verbose_name': 'GameCell',
+                'verbose_name_plural': 'GameCells',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='gamecell',
+            index=models.Index(fields=['cell_lat', 'cell_lon'], name='game_gamecell_grid_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='gamecell',
+            unique_together={('game', 'cell_lat', 'cell_lon')},
+        ),
+        migrations.RunPython(locate_existing_games, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from django.db import models
 from pathlib import PurePath
 from uuid import uuid4
@@ -7,6 +8,8 @@ from tags.models import Tag
 from chat.models import ChatRoom
 from upload_validator import FileTypeValidator
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
+from socialpixel_backend.tombstones import TombstoneManager
 
 class Channel(models.Model):
 
@@ -54,6 +57,23 @@ class Channel(models.Model):
         blank=True
     )
 
+    deleted_on = models.DateTimeField(null=True, blank=True, db_index=True, help_text="Set when the channel is deleted and waiting to be purged")
+
+    objects = TombstoneManager()
+    all_objects = models.Manager()
+
+    def tombstone(self):
+        """
+        Hide the channel right away and leave the cascade to the purge_channels
+        command. The name is released so a new channel can take it.
+        """
+        from .names import channel_names
+        name = self.name
+        self.deleted_on = timezone.now()
+        self.name = '{}~deleted-{}'.format(self.name[:200], self.id)
+        Channel.all_objects.filter(id=self.id).update(deleted_on=self.deleted_on, name=self.name)
+        channel_names.invalidate(name)
+
     def __str__(self):
         return str(self.id) + ':' + str(self.name)
 
@@ -84,6 +104,31 @@ class LeaderboardRow(models.Model):
         verbose_name_plural = 'LeaderboardRows'
         ordering = ['timestamp']
 
+class Standing(models.Model):
+    """
+    Running total of a user on a leaderboard, kept up to date as rows are
+    added so standings never have to be aggregated from LeaderboardRow.
+
+    Ranks start at 1 and order by total, then by who got there first.
+    """
+    id = models.BigAutoField(primary_key=True)
+    leaderboard = models.ForeignKey(Leaderboard, related_name='standings', on_delete=models.CASCADE)
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    total = models.IntegerField(default=0)
+    rank = models.IntegerField()
+    first_completed_at = models.DateTimeField(help_text="Time of the user's first row on the leaderboard")
+
+    def __str__(self):
+        return str(self.leaderboard_id) + ":" + str(self.user) + ":" + str(self.rank)
+
+    class Meta:
+        verbose_name = 'Standing'
+        verbose_name_plural = 'Standings'
+        unique_together = ['leaderboard', 'user']
+        indexes = [
+            models.Index(fields=['leaderboard', 'rank'], name='game_standing_rank_idx'),
+        ]
+
 class Game(models.Model):
 
     def gameimage_upload_path(instance, filename):
@@ -117,6 +162,10 @@ class Game(models.Model):
     channel = models.ForeignKey(Channel, on_delete=models.CASCADE)
     tags = models.ManyToManyField(Tag, related_name="tagged_game", blank=True)
     pinColorHex = models.CharField(max_length=7, blank=True)
+    completed_count = models.IntegerField(default=0, help_text="Number of players who have completed the game")
+
+    objects = TombstoneManager('channel__deleted_on')
+    all_objects = models.Manager()
 
     def __str__(self):
         return str(self.id) + ':' + str(self.name)
@@ -126,6 +175,30 @@ class Game(models.Model):
         verbose_name_plural = 'Games'
         unique_together = ['name', 'channel']
 
+class GameProgress(models.Model):
+    """
+    Accepted posts of an author in a game, counted as posts are added to
+    Game.posts, and the author's placement once they have matched the
+    creator's post count.
+    """
+    id = models.BigAutoField(primary_key=True)
+    game = models.ForeignKey(Game, related_name='progress', on_delete=models.CASCADE)
+    author = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    post_count = models.IntegerField(default=0)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    placement = models.IntegerField(blank=True, null=True, help_text="Order in which the author completed the game, starting at 1")
+
+    def __str__(self):
+        return str(self.game_id) + ":" + str(self.author) + ":" + str(self.post_count)
+
+    class Meta:
+        verbose_name = 'GameProgress'
+        verbose_name_plural = 'GameProgress'
+        constraints = [
+            models.UniqueConstraint(fields=['game', 'author'], name='game_progress_unique_author'),
+            models.UniqueConstraint(fields=['game', 'placement'], name='game_progress_unique_placement'),
+        ]
+
 class ValidatePost(models.Model):
 
     id = models.BigAutoField(primary_key=True)
@@ -134,6 +207,12 @@ class ValidatePost(models.Model):
     post = models.ForeignKey(Post, related_name="post", on_delete=models.CASCADE)
     creator_post = models.ForeignKey(Post, related_name="creator_post", on_delete=models.CASCADE)
     channel = models.ForeignKey(Channel, on_delete=models.CASCADE)
+    priority = models.IntegerField(default=0, help_text="Posts with a higher priority are claimed first")
+    claimed_by = models.ForeignKey(Profile, related_name="claimed_validations", on_delete=models.SET_NULL, blank=True, null=True)
+    lease_expires = models.DateTimeField(blank=True, null=True, help_text="Time until which the post is reserved for claimed_by")
+
+    objects = TombstoneManager('channel__deleted_on')
+    all_objects = models.Manager()
 
     def __str__(self):
         return str(self.id) + ':' + str(self.game) + " - " + str(self.post)
@@ -143,3 +222,129 @@ class ValidatePost(models.Model):
         verbose_name_plural = 'ValidatePosts'
         unique_together = ['game', 'post']
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['channel', '-priority', 'timestamp', 'id'], name='game_validatepost_queue_idx'),
+        ]
+
+class Stats(models.Model):
+    """
+    Counters shown on channel and game cards. subscriber_count is kept up to
+    date as subscriptions change; the other totals are refreshed in batches
+    by the rollup_stats command.
+    """
+    subscriber_count = models.IntegerField(default=0)
+    post_count = models.IntegerField(default=0)
+    player_count = models.IntegerField(default=0, help_text="Number of distinct authors of the posts")
+    rolled_up_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        abstract = True
+
+class DailyStats(models.Model):
+    """One day of activity. posts and players come from the rollup, submissions are counted as posts are queued."""
+    id = models.BigAutoField(primary_key=True)
+    day = models.DateField()
+    posts = models.IntegerField(default=0)
+    players = models.IntegerField(default=0)
+    submissions = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        ordering = ['day']
+
+class ChannelStats(Stats):
+    channel = models.OneToOneField(Channel, related_name='stats', primary_key=True, on_delete=models.CASCADE)
+
+    def daily(self, days):
+        since = timezone.localdate() - timedelta(days=days - 1)
+        return ChannelDailyStats.objects.filter(channel_id=self.channel_id, day__gte=since)
+
+    def __str__(self):
+        return str(self.channel_id) + ':' + str(self.subscriber_count)
+
+    class Meta:
+        verbose_name = 'ChannelStats'
+        verbose_name_plural = 'ChannelStats'
+        indexes = [
+            models.Index(fields=['-subscriber_count', '-channel'], name='game_channelstats_popular_idx'),
+        ]
+
+class GameStats(Stats):
+    game = models.OneToOneField(Game, related_name='stats', primary_key=True, on_delete=models.CASCADE)
+
+    def daily(self, days):
+        since = timezone.localdate() - timedelta(days=days - 1)
+        return GameDailyStats.objects.filter(game_id=self.game_id, day__gte=since)
+
+    def __str__(self):
+        return str(self.game_id) + ':' + str(self.subscriber_count)
+
+    class Meta:
+        verbose_name = 'GameStats'
+        verbose_name_plural = 'GameStats'
+
+class ChannelDailyStats(DailyStats):
+    channel = models.ForeignKey(Channel, related_name='daily_stats', on_delete=models.CASCADE)
+
+    def __str__(self):
+        return str(self.channel_id) + ':' + str(self.day)
+
+    class Meta(DailyStats.Meta):
+        verbose_name = 'ChannelDailyStats'
+        verbose_name_plural = 'ChannelDailyStats'
+        unique_together = ['channel', 'day']
+
+class GameDailyStats(DailyStats):
+    game = models.ForeignKey(Game, related_name='daily_stats', on_delete=models.CASCADE)
+
+    def __str__(self):
+        return str(self.game_id) + ':' + str(self.day)
+
+    class Meta(DailyStats.Meta):
+        verbose_name = 'GameDailyStats'
+        verbose_name_plural = 'GameDailyStats'
+        unique_together = ['game', 'day']
+
+class GameFootprint(models.Model):
+    """
+    Where a game is played, derived from the located posts of its creator
+    and updated as posts are added to or removed from the game.
+    """
+    game = models.OneToOneField(Game, related_name='footprint', primary_key=True, on_delete=models.CASCADE)
+    located_posts = models.IntegerField(default=0, help_text="Number of creator posts with GPS coordinates")
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+
+    @property
+    def latitude(self):
+        return self.latitude_sum / self.located_posts if self.located_posts else None
+
+    @property
+    def longitude(self):
+        return self.longitude_sum / self.located_posts if self.located_posts else None
+
+    def __str__(self):
+        return str(self.game_id) + ':' + str(self.latitude) + ',' + str(self.longitude)
+
+    class Meta:
+        verbose_name = 'GameFootprint'
+        verbose_name_plural = 'GameFootprints'
+
+class GameCell(models.Model):
+    """A grid cell holding at least one located creator post of a game, see game.footprint."""
+    id = models.BigAutoField(primary_key=True)
+    game = models.ForeignKey(Game, related_name='cells', on_delete=models.CASCADE)
+    cell_lat = models.IntegerField()
+    cell_lon = models.IntegerField()
+    posts = models.IntegerField(default=0)
+
+    def __str__(self):
+        return str(self.game_id) + ':' + str(self.cell_lat) + ',' + str(self.cell_lon)
+
+    class Meta:
+        verbose_name = 'GameCell'
+        verbose_name_plural = 'GameCells'
+        unique_together = ['game', 'cell_lat', 'cell_lon']
+        indexes = [
+            models.Index(fields=['cell_lat', 'cell_lon'], name='game_gamecell_grid_idx'),
+        ]
@@ -0,0 +1,6 @@
+from socialpixel_backend.names import NameCache
+from .models import Channel, Game
+
+channel_names = NameCache(Channel)
+# Game names are only unique within a channel.
+game_names = NameCache(Game, ('channel_id', 'name'))
@@ -0,0 +1,54 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from posts.models import Post
+from .models import Game, GameProgress
+
+
+def count_posts(pairs, sign=1):
+    """
+    Add `sign` to the post count of each (game_id, author_id) in `pairs`,
+    once per occurrence. Run inside the transaction that changes Game.posts.
+    """
+    counts = Counter(pairs)
+    if not counts:
+        return
+    GameProgress.objects.bulk_create(
+        [GameProgress(game_id=game_id, author_id=author_id) for game_id, author_id in counts],
+        ignore_conflicts=True,
+    )
+    for (game_id, author_id), count in counts.items():
+        GameProgress.objects.filter(game_id=game_id, author_id=author_id).update(post_count=F('post_count') + sign * count)
+
+def game_post_pairs(game_ids, post_ids):
+    """(game_id, author_id) for every combination of the given games and posts."""
+    authors = list(Post.all_objects.filter(pk__in=post_ids).values_list('author_id', flat=True))
+    return [(game_id, author_id) for game_id in game_ids for author_id in authors]
+
+def complete(game_id, author_id):
+    """
+    Mark `author_id` as having completed the game once they have as many
+    accepted posts as its creator, and return their placement (1 for the
+    first player to finish), or None if they have not finished or already
+    had a placement.
+
+    The game row is locked while the next placement is taken, so two
+    players can never be given the same one.
+    """
+    with transaction.atomic():
+        game = Game.all_objects.select_for_update().only('id', 'creator_id', 'completed_count').get(pk=game_id)
+        if author_id == game.creator_id:
+            return None
+
+        progress = GameProgress.objects.filter(game_id=game_id, author_id=author_id, completed_at__isnull=True).first()
+        target = GameProgress.objects.filter(game_id=game_id, author_id=game.creator_id).values_list('post_count', flat=True).first()
+        if progress is None or not target or progress.post_count < target:
+            return None
+
+        placement = game.completed_count + 1
+        Game.all_objects.filter(pk=game_id).update(completed_count=placement)
+        GameProgress.objects.filter(pk=progress.pk).update(placement=placement, completed_at=timezone.now())
+        return placement
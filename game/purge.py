@@ -0,0 +1,40 @@
+from socialpixel_backend.tombstones import delete_in_batches
+from chat.purge import purge_room
+from posts.models import Post
+from .models import Channel, Game, GameProgress, Leaderboard, LeaderboardRow, ValidatePost
+
+
+def purge_game(game, batch_size=500):
+    """Delete a game and its dependents in batches of `batch_size` rows."""
+    delete_in_batches(ValidatePost.all_objects.filter(game=game), batch_size)
+    delete_in_batches(Game.posts.through.objects.filter(game=game), batch_size)
+    delete_in_batches(GameProgress.objects.filter(game=game), batch_size)
+    delete_in_batches(LeaderboardRow.objects.filter(leaderboard_id=game.leaderboard_id), batch_size)
+    game.delete()
+    Leaderboard.objects.filter(id=game.leaderboard_id).delete()
+
+def purge_channel(channel, batch_size=500):
+    """
+    Delete a tombstoned channel in batches of `batch_size` rows: pending
+    validations, games, the channel reference on posts and subscriptions,
+    the channel row itself and finally its chatroom, unless another channel
+    still uses it.
+    """
+    delete_in_batches(ValidatePost.all_objects.filter(channel=channel), batch_size)
+
+    for game in Game.all_objects.filter(channel=channel):
+        purge_game(game, batch_size)
+
+    posts = Post.all_objects.filter(channel=channel)
+    while True:
+        pks = list(posts.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        Post.all_objects.filter(pk__in=pks).update(channel=None)
+
+    delete_in_batches(Channel.subscribers.through.objects.filter(channel=channel), batch_size)
+    delete_in_batches(Channel.tags.through.objects.filter(channel=channel), batch_size)
+    channel.delete()
+
+    if channel.chatroom_id and not Channel.all_objects.filter(chatroom_id=channel.chatroom_id).exists():
+        purge_room(channel.chatroom, batch_size)
@@ -1,23 +1,71 @@
+import hashlib
+
 import graphene
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
 
-from .models import Channel, Game, Leaderboard, LeaderboardRow, ValidatePost
+from .events import game_group, validation_queue_group
+from .names import channel_names, game_names
+from .footprint import games_near
+from .models import Channel, ChannelStats, Game, GameFootprint, GameStats, Leaderboard, LeaderboardRow, Standing, ValidatePost
+from .standings import around
+from .validation import VALIDATION_QUEUE_ORDERING, claim, is_claimed_by_other, lock, submit
 from users.models import Profile
 from posts.models import Post
-from tags.models import Tag
+from tags.names import tag_ids
+from socialpixel_backend.cursors import keyset_page, row_cursor
 from chat.models import ChatRoom
-from django.dispatch import Signal
-
-post_added_to_game = Signal()
+from django.db import transaction
+from django.db.models import F, Q
+from jobs.queue import enqueue
 
-from posts.schema import ModifierEnumsType
+from posts.enums import PostVisibilityEnums
+from posts.schema import POSTS_ORDERING, ModifierEnumsType, PostType
+from users.enums import ProfileVisibilityEnums
 
 class ValidatorEnumsType(graphene.Enum):
     ACCEPT = 1
     REJECT = 0
 
+class DailyStatsType(graphene.ObjectType):
+    day = graphene.Date()
+    posts = graphene.Int(description="Posts created that day")
+    players = graphene.Int(description="Distinct authors of the posts created that day")
+    submissions = graphene.Int(description="Posts submitted for validation that day")
+
+class StatsType(graphene.ObjectType):
+    subscriber_count = graphene.Int()
+    post_count = graphene.Int()
+    player_count = graphene.Int(description="Distinct authors of the posts")
+    rolled_up_at = graphene.DateTime(description="When post_count and player_count were last recounted")
+    days = graphene.List(DailyStatsType, last=graphene.Int(default_value=30), description="Daily activity of the last days, at most 365, oldest first")
+
+    def resolve_days(self, info, last):
+        return self.daily(max(min(last, 365), 1))
+
+class ChannelOrderEnumsType(graphene.Enum):
+    NEWEST = 0
+    POPULAR = 1
+
+CHANNELS_ORDERING = {
+    ChannelOrderEnumsType.NEWEST.value: ['-id'],
+    ChannelOrderEnumsType.POPULAR.value: ['-popularity', '-id'],
+}
+
 class ChannelType(DjangoObjectType):
+    stats = graphene.Field(StatsType)
+    cursor = graphene.String(description="Pass as after to channels with the same order_by to get the channels following this one")
+
+    def resolve_cursor(self, info):
+        order_by = ChannelOrderEnumsType.POPULAR.value if hasattr(self, 'popularity') else ChannelOrderEnumsType.NEWEST.value
+        return row_cursor(self, CHANNELS_ORDERING[order_by])
+
+    def resolve_stats(self, info):
+        try:
+            return self.stats
+        except ChannelStats.DoesNotExist:
+            return ChannelStats(channel=self)
+
     def resolve_cover_image(self, info):
         """Resolve cover image absolute path"""
         if self.cover_image:
@@ -35,6 +83,28 @@ class ChannelType(DjangoObjectType):
         fields = "__all__"
 
 class GameType(DjangoObjectType):
+    stats = graphene.Field(StatsType)
+    latitude = graphene.Float(description="Centroid of the located posts of the game creator")
+    longitude = graphene.Float(description="Centroid of the located posts of the game creator")
+
+    def resolve_stats(self, info):
+        try:
+            return self.stats
+        except GameStats.DoesNotExist:
+            return GameStats(game=self)
+
+    def resolve_latitude(self, info):
+        try:
+            return self.footprint.latitude
+        except GameFootprint.DoesNotExist:
+            return None
+
+    def resolve_longitude(self, info):
+        try:
+            return self.footprint.longitude
+        except GameFootprint.DoesNotExist:
+            return None
+
     def resolve_image(self, info):
         """Resolve image absolute path"""
         if self.image:
@@ -45,6 +115,10 @@ class GameType(DjangoObjectType):
         model = Game
         fields = "__all__"
 
+class NearbyGameType(graphene.ObjectType):
+    game = graphene.Field(GameType)
+    distance = graphene.Float(description="Distance in meters to the nearest located post of the game creator")
+
 class LeaderboardType(DjangoObjectType):
     class Meta:
         model = Leaderboard
@@ -55,7 +129,24 @@ class LeaderboardRowType(DjangoObjectType):
         model = LeaderboardRow
         fields = "__all__"
 
+STANDINGS_ORDERING = ['rank', 'id']
+
+class StandingType(DjangoObjectType):
+    cursor = graphene.String(description="Pass as after to game_standings to get the standings following this one")
+
+    def resolve_cursor(self, info):
+        return row_cursor(self, STANDINGS_ORDERING)
+
+    class Meta:
+        model = Standing
+        fields = "__all__"
+
 class ValidatePostType(DjangoObjectType):
+    cursor = graphene.String(description="Pass as after to validate_posts_by_channel to get the posts following this one")
+
+    def resolve_cursor(self, info):
+        return row_cursor(self, VALIDATION_QUEUE_ORDERING)
+
     class Meta:
         model = ValidatePost
         fields = "__all__"
@@ -64,7 +155,8 @@ class ChannelQuery(graphene.AbstractType):
 
     channel = graphene.Field(ChannelType, id=graphene.ID(required=True), description="Get one channel based on given id")
     channelname = graphene.Field(ChannelType, name=graphene.String(required=True), description="Get one channel based on given name")
-    channels = graphene.List(ChannelType, description="Get all channels")
+    channels = graphene.List(ChannelType, first=graphene.Int(default_value=50), after=graphene.String(), order_by=ChannelOrderEnumsType(default_value=ChannelOrderEnumsType.NEWEST.value), description="Get channels newest or most subscribed first, at most 100 at a time")
+    channel_posts = graphene.List(PostType, channel=graphene.ID(required=True), first=graphene.Int(default_value=50), after=graphene.String(), description="Get the posts of given channel newest first, at most 100 at a time")
     channels_by_tag = graphene.List(ChannelType, tags=graphene.List(graphene.String, required=True) ,description="Gets all channels based on given tags")
 
     def resolve_channel(self, info, id):
@@ -79,17 +171,29 @@ class ChannelQuery(graphene.AbstractType):
         else:
             return Channel.objects.get(name=name)
 
-    def resolve_channels(self, info):
+    def resolve_channels(self, info, first, order_by, after=None):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get channels!')
         else:
-            return Channel.objects.all()
+            channels = Channel.objects.select_related('stats')
+            if order_by == ChannelOrderEnumsType.POPULAR:
+                channels = channels.annotate(popularity=F('stats__subscriber_count'))
+            return keyset_page(channels, CHANNELS_ORDERING[order_by], after, first)
+
+    def resolve_channel_posts(self, info, channel, first, after=None):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to get channel posts!')
+        else:
+            viewer = info.context.viewer
+            visible = Q(author__visibility=ProfileVisibilityEnums.PUBLIC) | Q(author__in=viewer.following) | Q(author=viewer.profile)
+            posts = Post.objects.filter(visible, channel_id=channel, visibility=PostVisibilityEnums.ACTIVE)
+            return keyset_page(posts, POSTS_ORDERING, after, first)
 
     def resolve_channels_by_tag(self, info, tags=[]):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get channels!')
         else:
-            tagobjects = Tag.objects.filter(name__in=tags)
+            tagobjects = tag_ids(tags)
             return Channel.objects.filter(tags__in=tagobjects)
 
 class GameQuery(graphene.AbstractType):
@@ -98,6 +202,9 @@ class GameQuery(graphene.AbstractType):
     gamename = graphene.Field(GameType, name=graphene.String(required=True), description="Get one game based on given name")
     games = graphene.List(GameType, description="Get all games")
     games_by_tag = graphene.List(GameType, tags=graphene.List(graphene.String, required=True) ,description="Gets all games based on given tags")
+    games_near = graphene.List(NearbyGameType, lat=graphene.Float(required=True), lon=graphene.Float(required=True), radius_m=graphene.Float(default_value=5000), first=graphene.Int(default_value=50), description="Get games with a creator post within radius_m meters, at most 50 km, nearest first")
+    game_standings = graphene.List(StandingType, game=graphene.ID(required=True), first=graphene.Int(default_value=50), after=graphene.String(), description="Get the standings of given game best first, at most 100 at a time")
+    game_standings_around_me = graphene.List(StandingType, game=graphene.ID(required=True), k=graphene.Int(default_value=5), description="Get the standings within k ranks of the current user in given game")
 
     def resolve_game(self, info, id):
         if not info.context.user.is_authenticated:
@@ -115,21 +222,46 @@ class GameQuery(graphene.AbstractType):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get games!')
         else:
-            return Game.objects.all()
+            return Game.objects.select_related('stats')
     
     def resolve_games_by_tag(self, info, tags=[]):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get games!')
         else:
-            tagobjects = Tag.objects.filter(name__in=tags)
+            tagobjects = tag_ids(tags)
             return Game.objects.filter(tags__in=tagobjects)
 
+    def resolve_games_near(self, info, lat, lon, radius_m, first):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to get games!')
+        else:
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise GraphQLError('Invalid coordinates!')
+            nearby = games_near(lat, lon, max(min(radius_m, 50000), 0), max(min(first, 100), 0))
+            return [NearbyGameType(game=game, distance=distance) for game, distance in nearby]
+
+    def resolve_game_standings(self, info, game, first, after=None):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to get game standings!')
+        else:
+            standings = Standing.objects.filter(leaderboard__game__id=game).select_related('user__user')
+            return keyset_page(standings, STANDINGS_ORDERING, after, first)
+
+    def resolve_game_standings_around_me(self, info, game, k):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to get game standings!')
+        else:
+            standing = Standing.objects.filter(leaderboard__game__id=game, user=info.context.viewer.profile).first()
+            if standing is None:
+                return []
+            return around(standing, min(max(k, 0), 50))
+
 class ValidatePostQuery(graphene.AbstractType):
 
     validate_post = graphene.Field(ValidatePostType, id=graphene.ID(required=True), description="Get one post to be validated based on given id")
     validate_posts = graphene.List(ValidatePostType, description="Get all posts to be validated")
     validate_posts_by_game = graphene.List(ValidatePostType, game=graphene.String(required=True), channel=graphene.String(required=True) ,description="Gets all posts to be validated for given game in channel")
-    validate_posts_by_channel = graphene.List(ValidatePostType, channel=graphene.String(required=True) ,description="Gets all posts to be validated for given channel")
+    validate_posts_by_channel = graphene.List(ValidatePostType, channel=graphene.String(required=True), first=graphene.Int(default_value=50), after=graphene.String(), description="Gets posts to be validated for given channel by priority then age, at most 100 at a time")
 
     def resolve_validate_post(self, info, id):
         if not info.context.user.is_authenticated:
@@ -147,13 +279,47 @@ class ValidatePostQuery(graphene.AbstractType):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get post to be validated by game!')
         else:
-            return ValidatePost.objects.filter(game=Game.objects.get(name=game, channel=channel))
+            return ValidatePost.objects.filter(game_id=game_names.id((channel_names.id(channel), game)))
     
-    def resolve_validate_posts_by_channel(self, info, channel):
+    def resolve_validate_posts_by_channel(self, info, channel, first, after=None):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get post to be validated by channel!')
         else:
-            return ValidatePost.objects.filter(channel=Channel.objects.get(name=channel))
+            return keyset_page(ValidatePost.objects.filter(channel_id=channel_names.id(channel)), VALIDATION_QUEUE_ORDERING, after, first)
+
+class ValidationQueueChangeType(graphene.ObjectType):
+    id = graphene.ID(description="Unique ID of the queued post to be validated")
+    action = graphene.String(description="Either 'added' or 'removed'")
+    validate_post = graphene.Field(ValidatePostType, description="The queued post to be validated, null once it has left the queue")
+
+    def resolve_validate_post(self, info):
+        return ValidatePost.objects.filter(id=self['id']).first()
+
+class ValidatePostSubscriptions(graphene.AbstractType):
+
+    validation_queue_changed = graphene.Field(ValidationQueueChangeType, channel=graphene.ID(required=True), description="Receive posts added to or removed from the validation queue of given channel")
+
+    def resolve_validation_queue_changed(root, info, channel):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to subscribe to validation queue!')
+        else:
+            if int(channel) not in info.context.viewer.channels:
+                raise GraphQLError('You must be suscribed to channel to subscribe to validation queue!')
+            else:
+                return info.context.subscribe(validation_queue_group(channel), 'validation_queue.changed')
+
+class LeaderboardSubscriptions(graphene.AbstractType):
+
+    leaderboard_changed = graphene.Field(LeaderboardType, game=graphene.ID(required=True), description="Receive the leaderboard of given game whenever it changes")
+
+    def resolve_leaderboard_changed(root, info, game):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to subscribe to leaderboard!')
+        else:
+            game = Game.objects.get(id=game)
+            events = info.context.subscribe(game_group(game.id), 'leaderboard.changed')
+            leaderboards = events.map(lambda data: Leaderboard.objects.filter(id=data['leaderboard']).first())
+            return leaderboards.filter(lambda leaderboard: leaderboard is not None)
 
 class CreateChannel(graphene.Mutation):
 
@@ -172,7 +338,7 @@ class CreateChannel(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to create chatroom!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             if Channel.objects.filter(name=name).exists():
                 raise GraphQLError('Channel with same name exists. PLease try another name!')
             channel = Channel(name=name, description=description)
@@ -188,13 +354,7 @@ class CreateChannel(graphene.Mutation):
                 channel.avatar = image=info.context.FILES[avatar_image]
                 channel.save()
 
-            for tag in tags:
-                if not Tag.objects.filter(name=tag).exists():
-                    t = Tag(name=tag)
-                    t.save()
-
-                channel.tags.add(Tag.objects.get(name=tag))
-                channel.save()
+            channel.tags.add(*tag_ids(tags, create=True))
 
             chatroomname = '{}-chatroom'.format(name)
             chatroom = ChatRoom(created_by=current_user_profile, name=chatroomname)
@@ -203,6 +363,7 @@ class CreateChannel(graphene.Mutation):
             chatroom.save()
             channel.chatroom = chatroom
             channel.save()
+            info.context.viewer.refresh('channels', 'chatrooms')
         
             return CreateChannel(
                 channel,
@@ -221,7 +382,7 @@ class DeleteChannel(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to delete on posts!')
         else:
-            Channel.objects.get(name=name).delete()
+            Channel.objects.get(name=name).tombstone()
                 
             return DeleteChannel(
                 success=True
@@ -298,20 +459,19 @@ class ChannelSubscription(graphene.Mutation):
             raise GraphQLError('You must be logged to add/remove channel memberships!')
         else:
             channel = Channel.objects.get(name=name)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if modifier == ModifierEnumsType.ADD:
-                if not channel.subscribers.filter(user=current_user_profile).exists():
+                if channel.id not in info.context.viewer.channels:
                     channel.subscribers.add(current_user_profile)
                     channel.chatroom.members.add(current_user_profile)
-                    channel.chatroom.save()
                     channel.save()
             if modifier == ModifierEnumsType.REMOVE:
-                if channel.subscribers.filter(user=current_user_profile).exists():
+                if channel.id in info.context.viewer.channels:
                     channel.subscribers.remove(current_user_profile)
                     channel.chatroom.members.remove(current_user_profile)
-                    channel.chatroom.save()
                     channel.save()
+            info.context.viewer.refresh('channels', 'chatrooms')
                 
             return ChannelSubscription(
                 success=True
@@ -335,39 +495,31 @@ class CreateGame(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to create game!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             channel = Channel.objects.get(name=channel)
 
-            if not channel.subscribers.filter(user=current_user_profile).exists():
+            if channel.id not in info.context.viewer.channels:
                 raise GraphQLError('You must be suscribed to channel to add games!')
 
             if Game.objects.filter(name=name, channel=channel).exists():
                 raise GraphQLError('Game with same name exists in Channel. PLease try another name!')
-            
 
-            game = Game(name=name, channel=channel, description=description, creator=current_user_profile)
-            game.save()
+            post_ids = set(int(post_id) for post_id in posts)
+            seeds = Post.objects.filter(post_id__in=post_ids, author=current_user_profile, visibility=PostVisibilityEnums.ACTIVE)
+            invalid = post_ids - set(seeds.values_list('post_id', flat=True))
+            if invalid:
+                raise GraphQLError('Posts {} must be your own active posts to be added to game!'.format(', '.join(map(str, sorted(invalid)))))
 
-            game.subscribers.add(current_user_profile)
-            game.save()
-
-            if game_image != "":
-                game.image = image=info.context.FILES[game_image]
-                game.save()
-
-            for tag in tags:
-                if not Tag.objects.filter(name=tag).exists():
-                    t = Tag(name=tag)
-                    t.save()
-
-                game.tags.add(Tag.objects.get(name=tag))
+            with transaction.atomic():
+                game = Game(name=name, channel=channel, description=description, creator=current_user_profile)
+                if game_image != "":
+                    game.image = info.context.FILES[game_image]
                 game.save()
 
-            for post_id in posts:
-                post = Post.objects.get(post_id=post_id)
-
-                game.posts.add(post)
-                game.save()
+                game.subscribers.add(current_user_profile)
+                game.tags.add(*tag_ids(tags, create=True))
+                game.posts.add(*post_ids)
+            info.context.viewer.refresh('games')
         
             return CreateGame(
                 game,
@@ -406,7 +558,7 @@ class GameChangeDescription(graphene.Mutation):
 
             game = Game.objects.get(name=name)
             game.description = description
-            game.save()
+            game.save(update_fields=['description'])
 
             return GameChangeDescription(
                 success=True
@@ -431,40 +583,57 @@ class GameChangeImage(graphene.Mutation):
                 success=True
             )
 
+class GamePostInput(graphene.InputObjectType):
+    post_id = graphene.ID(required=True, description="Unique ID for post to be added")
+    original_post_id = graphene.ID(required=True, description="Unique ID for the original post")
+
 class AddGamePosts(graphene.Mutation):
     class Arguments:
         name = graphene.String(required=True, description="Unique name of Game to be add post too")
-        post_id = graphene.ID(required=True, description="Unique ID for post to be added")
-        original_post_id = graphene.ID(required=True, description="Unique ID for the original post")
+        post_id = graphene.ID(description="Unique ID for post to be added")
+        original_post_id = graphene.ID(description="Unique ID for the original post")
+        posts = graphene.List(GamePostInput, description="Posts to be added with their original posts, all in one go")
 
-    success = graphene.Boolean(default_value=False, description="Returns whether the post was added successfully.")
+    success = graphene.Boolean(default_value=False, description="Returns whether the posts were added successfully.")
     
-    def mutate(self, info, name, post_id, original_post_id):
+    def mutate(self, info, name, post_id=None, original_post_id=None, posts=None):
 
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to add posts to games!')
         else:
             game = Game.objects.get(name=name)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
-            if not game.channel.subscribers.filter(user=current_user_profile).exists():
+            if game.channel_id not in info.context.viewer.channels:
                 raise GraphQLError('You must be suscribed to channel to add post to game!')
             
-            if not game.subscribers.filter(user=current_user_profile).exists():
+            if game.id not in info.context.viewer.games:
                 raise GraphQLError('You must be suscribed to game to add post to game!')
 
-            post = Post.objects.get(post_id=post_id)
-            original_post = Post.objects.get(post_id=original_post_id)
-
-            if post.author != current_user_profile:
+            pairs = [(entry.post_id, entry.original_post_id) for entry in posts or []]
+            if post_id is not None or original_post_id is not None:
+                if post_id is None or original_post_id is None:
+                    raise GraphQLError('Post and original post must be given together!')
+                pairs.append((post_id, original_post_id))
+            submissions = {int(post_id): int(original_post_id) for post_id, original_post_id in pairs}
+            if not submissions:
+                raise GraphQLError('No posts to add to game!')
+
+            post_ids = set(submissions) | set(submissions.values())
+            found = Post.objects.only('post_id', 'author_id').in_bulk(post_ids)
+            if post_ids - set(found):
+                raise GraphQLError('Post does not exist')
+
+            if any(found[post_id].author_id != current_user_profile.pk for post_id in submissions):
                 raise GraphQLError('You must be post author to add post to game!')
 
-            validate_post = ValidatePost(game=Game.objects.get(name=name), post=post, channel=game.channel, creator_post=original_post)
-            validate_post.save()
+            queued = list(ValidatePost.objects.filter(game=game, post_id__in=submissions).values_list('post_id', flat=True))
+            if queued:
+                raise GraphQLError('Posts {} were already added to game!'.format(', '.join(map(str, sorted(queued)))))
 
-            game.save()
+            submit(game, submissions)
 
-            return RemoveGamePosts(
+            return AddGamePosts(
                 success=True
             )
 
@@ -481,9 +650,9 @@ class RemoveGamePosts(graphene.Mutation):
             raise GraphQLError('You must be logged to remove posts to games!')
         else:
             game = Game.objects.get(name=name)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
-            if not game.channel.subscribers.filter(user=current_user_profile).exists():
+            if game.channel_id not in info.context.viewer.channels:
                 raise GraphQLError('You must be suscribed to channel to remove post to game!')
             
             post = Post.objects.get(post_id=post_id)
@@ -492,7 +661,6 @@ class RemoveGamePosts(graphene.Mutation):
                 raise GraphQLError('You must be post author to remove post to game!')
             
             game.posts.remove(post)
-            game.save()
 
             return RemoveGamePosts(
                 success=True
@@ -515,17 +683,9 @@ class EditChannelTags(graphene.Mutation):
             channel = Channel.objects.get(name=name)
             
             if modifier == ModifierEnumsType.ADD:
-                for tag in tags:
-                    if not Tag.objects.filter(name=tag).exists():
-                        t = Tag(name=tag)
-                        t.save()
-                    channel.tags.add(Tag.objects.get(name=tag))
-                    channel.save()
+                channel.tags.add(*tag_ids(tags, create=True))
             if modifier == ModifierEnumsType.REMOVE:
-                for tag in tags:
-                    if Tag.objects.filter(name=tag).exists():
-                        channel.tags.remove(Tag.objects.get(name=tag))
-                        channel.save()
+                channel.tags.remove(*tag_ids(tags))
                 
             return EditChannelTags(
                 success=True
@@ -548,17 +708,9 @@ class EditGameTags(graphene.Mutation):
             game = Game.objects.get(name=name)
             
             if modifier == ModifierEnumsType.ADD:
-                for tag in tags:
-                    if not Tag.objects.filter(name=tag).exists():
-                        t = Tag(name=tag)
-                        t.save()
-                    game.tags.add(Tag.objects.get(name=tag))
-                    game.save()
+                game.tags.add(*tag_ids(tags, create=True))
             if modifier == ModifierEnumsType.REMOVE:
-                for tag in tags:
-                    if Tag.objects.filter(name=tag).exists():
-                        game.tags.remove(Tag.objects.get(name=tag))
-                        game.save()
+                game.tags.remove(*tag_ids(tags))
                 
             return EditGameTags(
                 success=True
@@ -579,34 +731,102 @@ class ValidatePostMutationMethod(graphene.Mutation):
             raise GraphQLError('You must be logged to add posts to games!')
         else:
             game = Game.objects.get(name=game)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
-            if not game.channel.subscribers.filter(user=current_user_profile).exists():
+            if game.channel_id not in info.context.viewer.channels:
                 raise GraphQLError('You must be suscribed to channel to validate posts for game!')
 
             post = Post.objects.get(post_id=post_id)
-            validate_post = ValidatePost.objects.get(game=game, post=post)
 
-            if modifier == ValidatorEnumsType.ACCEPT:
-                game.posts.add(post)
-                game.save()
-                post.author.points = post.author.points + 100
-                post.author.save()
-                current_user_profile.points = current_user_profile.points + 50
-                current_user_profile.save()
-                validate_post.delete()
-                post_added_to_game.send(sender=self.__class__, post_author = post.author.user.username, gamename=game.name, channelname=game.channel.name)
-            if modifier == ValidatorEnumsType.REJECT:
+            with transaction.atomic():
+                validate_post = lock(ValidatePost.objects.filter(game=game, post=post)).first()
+                if validate_post is None:
+                    raise GraphQLError('Post has already been validated!')
+                if is_claimed_by_other(validate_post, current_user_profile):
+                    raise GraphQLError('Post is claimed by another moderator!')
+
+                # Points, placement and notifications run in the job queue; the
+                # job is keyed by the queued validation so it is only done once.
+                if modifier == ValidatorEnumsType.ACCEPT:
+                    game.posts.add(post)
+                    enqueue('game.jobs.validation_accepted', f'validate-post:{validate_post.id}', validate_post_id=validate_post.id, game_id=game.id, post_id=post.post_id, author_id=post.author_id, validator_id=current_user_profile.pk)
+                if modifier == ValidatorEnumsType.REJECT:
+                    enqueue('game.jobs.validation_rejected', f'validate-post:{validate_post.id}', validate_post_id=validate_post.id, validator_id=current_user_profile.pk)
                 validate_post.delete()
-                current_user_profile.points = current_user_profile.points + 200
-                current_user_profile.save()
-
-            game.save()
 
             return ValidatePostMutationMethod(
                 success=True
             )
 
+class BatchValidatePosts(graphene.Mutation):
+
+    class Arguments:
+        game = graphene.String(required=True, description="Unique name for game in which posts to be validated")
+        accept = graphene.List(graphene.ID, description="post_id of posts to accept")
+        reject = graphene.List(graphene.ID, description="post_id of posts to reject")
+
+    skipped = graphene.List(graphene.ID, description="Returns post_id of posts that were already validated or are claimed by another moderator.")
+    success = graphene.Boolean(default_value=False, description="Returns whether the posts were validated successfully.")
+
+    def mutate(self, info, game, accept=None, reject=None):
+
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to add posts to games!')
+        else:
+            game = Game.objects.get(name=game)
+            current_user_profile = info.context.viewer.profile
+
+            if game.channel_id not in info.context.viewer.channels:
+                raise GraphQLError('You must be suscribed to channel to validate posts for game!')
+
+            accept = set(int(post_id) for post_id in accept or [])
+            reject = set(int(post_id) for post_id in reject or []) - accept
+
+            with transaction.atomic():
+                queued = lock(ValidatePost.objects.filter(game=game, post__in=accept | reject).order_by('id'))
+                validate_posts = [validate_post for validate_post in queued if not is_claimed_by_other(validate_post, current_user_profile)]
+                authors = dict(Post.all_objects.filter(pk__in=[validate_post.post_id for validate_post in validate_posts]).values_list('pk', 'author_id'))
+
+                accepted = [(validate_post.id, validate_post.post_id, authors[validate_post.post_id]) for validate_post in validate_posts if validate_post.post_id in accept]
+                rejected = [validate_post.id for validate_post in validate_posts if validate_post.post_id in reject]
+                if accepted:
+                    game.posts.add(*[post_id for _, post_id, _ in accepted])
+                if validate_posts:
+                    ids = ','.join(str(validate_post.id) for validate_post in validate_posts)
+                    enqueue('game.jobs.validations', 'validate-posts:{}'.format(hashlib.sha256(ids.encode()).hexdigest()), game_id=game.id, validator_id=current_user_profile.pk, accepted=accepted, rejected=rejected)
+                    ValidatePost.objects.filter(id__in=[validate_post.id for validate_post in validate_posts]).delete()
+
+            done = set(validate_post.post_id for validate_post in validate_posts)
+            return BatchValidatePosts(
+                skipped=sorted((accept | reject) - done),
+                success=True
+            )
+
+class ClaimValidations(graphene.Mutation):
+    class Arguments:
+        channel = graphene.String(required=True, description="Unique name of Channel whose queue to claim from")
+        n = graphene.Int(default_value=10, description="Number of posts to claim, at most 100")
+
+    validate_posts = graphene.List(ValidatePostType, description="Returns the posts reserved for the current user, by priority then age.")
+    success = graphene.Boolean(default_value=False, description="Returns whether the posts were claimed successfully.")
+
+    def mutate(self, info, channel, n):
+
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to claim posts to validate!')
+        else:
+            channel_id = channel_names.id(channel)
+
+            if channel_id not in info.context.viewer.channels:
+                raise GraphQLError('You must be suscribed to channel to validate posts for game!')
+
+            validate_posts = claim(channel_id, info.context.viewer.profile, max(min(n, 100), 0))
+
+            return ClaimValidations(
+                validate_posts=validate_posts,
+                success=True
+            )
+
 class GameSubscription(graphene.Mutation):
     class Arguments:
         channel = graphene.String(required=True, description="Unique name of Channel of game")
@@ -620,18 +840,16 @@ class GameSubscription(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to add/remove channel memberships!')
         else:
-            channelobj = Channel.objects.get(name=channel)
-            game = Game.objects.filter(channel=channelobj, name=game)[0]
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            game = Game.objects.get(pk=game_names.id((channel_names.id(channel), game)))
+            current_user_profile = info.context.viewer.profile
             
             if modifier == ModifierEnumsType.ADD:
-                if not game.subscribers.filter(user=current_user_profile).exists():
+                if game.id not in info.context.viewer.games:
                     game.subscribers.add(current_user_profile)
-                    game.save()
             if modifier == ModifierEnumsType.REMOVE:
-                if game.subscribers.filter(user=current_user_profile).exists():
+                if game.id in info.context.viewer.games:
                     game.subscribers.remove(current_user_profile)
-                    game.save()
+            info.context.viewer.refresh('games')
                 
             return GameSubscription(
                 success=True
@@ -657,3 +875,5 @@ class GameMutation(graphene.ObjectType):
 
 class ValidatePostMutation(graphene.ObjectType):
     validate_post = ValidatePostMutationMethod.Field()
+    claim_validations = ClaimValidations.Field()
+    batch_validate_posts = BatchValidatePosts.Field()
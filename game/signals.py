@@ -1,55 +1,133 @@
 from os import name
-from django.db.models.signals import post_save
-from .models import Channel, Leaderboard, Game, LeaderboardRow
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete, pre_save
+from .footprint import track_locations
+from .progress import count_posts, game_post_pairs
+from .stats import count_submission, count_subscribers
+from .standings import record_leaderboard_row
+from .events import publish_validation_queue_changed
+from .models import Channel, ChannelStats, Leaderboard, Game, LeaderboardRow, ValidatePost
+from posts.models import Post
 from django.dispatch import receiver
 import random
-from .schema import post_added_to_game
-from users.models import Profile, User
 
 @receiver(post_save, sender=Game)
 def create_leaderboard_for_new_game(sender, instance, created, **kwargs):
     if created:
         leaderboard = Leaderboard()
         leaderboard.save()
-        game = Game.objects.get(id=instance.id)
-        game.leaderboard = leaderboard
-        game.save()
         color = "%06x"%random.randint(0,0xFFFFFF)
         while Game.objects.all().values('pinColorHex').filter(pinColorHex=color).exists():
             color = "%06x"%random.randint(0,0xFFFFFF)
-        game.pinColorHex = color
-        game.save()
-
-
-@receiver(post_added_to_game)
-def calculate_leaderboard(sender, post_author, gamename, channelname, **kwargs):
-    channel = Channel.objects.get(name=channelname)
-    game = Game.objects.get(name=gamename, channel=channel)
-    profile = Profile.objects.get(user=User.objects.get(username=post_author))
-    game_creator = Profile.objects.get(user=User.objects.get(username=game.creator.user.username))
-    leaderboard = game.leaderboard
-
-    author_post_count = game.posts.filter(author=profile).count()
-    game_creator_post_count = game.posts.filter(author=game_creator).count()
-
-    leaderboard_row_count = leaderboard.leaderboardrow_set.count()
-
-    if author_post_count == game_creator_post_count:
-        points = 100
-        if leaderboard_row_count == 0:
-            points = 1000
-        elif leaderboard_row_count == 1:
-            points = 800
-        elif leaderboard_row_count == 2:
-            points = 600
-        elif leaderboard_row_count == 3:
-            points = 400
-        elif leaderboard_row_count == 4:
-            points = 200
+        # One UPDATE instead of saving the whole row again.
+        Game.all_objects.filter(id=instance.id).update(leaderboard=leaderboard, pinColorHex=color)
+        instance.leaderboard = leaderboard
+        instance.pinColorHex = color
+
+
+@receiver(post_save, sender=Channel)
+def create_stats_for_new_channel(sender, instance, created, **kwargs):
+    # Every channel has a stats row so the directory can be ordered by it.
+    if created:
+        ChannelStats.objects.get_or_create(channel=instance)
+
+
+@receiver(post_save, sender=LeaderboardRow)
+def update_standing(sender, instance, created, **kwargs):
+    if created:
+        record_leaderboard_row(instance)
+
+
+@receiver(post_save, sender=ValidatePost)
+def publish_validate_post_added(sender, instance, created, **kwargs):
+    if created:
+        publish_validation_queue_changed(instance, 'added')
+        count_submission(instance)
+
+@receiver(post_delete, sender=ValidatePost)
+def publish_validate_post_removed(sender, instance, **kwargs):
+    publish_validation_queue_changed(instance, 'removed')
+
+
+def narrow_to_members(sender, instance, reverse, pk_set, owner, member):
+    """
+    Drop the pks of `pk_set` that have no row in the through table `sender`.
+
+    Django passes every pk handed to remove() on to pre_remove and
+    post_remove, whether or not it was related, so counters would be
+    decremented for rows that were never there. The set is narrowed in
+    place, which also narrows the DELETE and post_remove that follow.
+    """
+    source, target = (member, owner) if reverse else (owner, member)
+    members = set(sender.objects.filter(**{source: instance.pk, target + '__in': pk_set}).values_list(target, flat=True))
+    pk_set.clear()
+    pk_set.update(members)
+
+
+@receiver(m2m_changed, sender=Game.posts.through)
+def count_game_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_remove':
+        narrow_to_members(sender, instance, reverse, pk_set, 'game_id', 'post_id')
+        return
+    if action in ('post_add', 'post_remove'):
+        sign = 1 if action == 'post_add' else -1
+        game_ids, post_ids = (pk_set, [instance.pk]) if reverse else ([instance.pk], pk_set)
+    elif action == 'pre_clear':
+        sign = -1
+        if reverse:
+            game_ids, post_ids = list(sender.objects.filter(post=instance).values_list('game_id', flat=True)), [instance.pk]
+        else:
+            game_ids, post_ids = [instance.pk], list(sender.objects.filter(game=instance).values_list('post_id', flat=True))
+    else:
+        return
+    count_posts(game_post_pairs(game_ids, post_ids), sign)
+    track_locations(game_ids, post_ids, sign)
+
+@receiver(pre_delete, sender=Post)
+def uncount_deleted_post(sender, instance, **kwargs):
+    # Deleting a post cascades to Game.posts without sending m2m_changed.
+    game_ids = list(Game.posts.through.objects.filter(post_id=instance.pk).values_list('game_id', flat=True))
+    if game_ids:
+        count_posts(game_post_pairs(game_ids, [instance.pk]), -1)
+        track_locations(game_ids, [instance.pk], -1)
+
+
+@receiver(pre_save, sender=Post)
+def untrack_moved_post(sender, instance, update_fields=None, **kwargs):
+    """Take a post in games out of their footprints when its location is edited; `track_moved_post` puts it back."""
+    if instance._state.adding or (update_fields is not None and not {'gps_latitude', 'gps_longitude'} & set(update_fields)):
+        return
+    rows = list(Game.posts.through.objects.filter(post_id=instance.pk).values_list('game_id', 'post__gps_latitude', 'post__gps_longitude'))
+    if not rows:
+        return
+    _, latitude, longitude = rows[0]
+    if (latitude, longitude) == (instance.gps_latitude, instance.gps_longitude):
+        return
+    game_ids = [game_id for game_id, _, _ in rows]
+    track_locations(game_ids, [instance.pk], -1)
+    instance._moved_from_games = game_ids
+
+@receiver(post_save, sender=Post)
+def track_moved_post(sender, instance, **kwargs):
+    game_ids = instance.__dict__.pop('_moved_from_games', None)
+    if game_ids:
+        track_locations(game_ids, [instance.pk], 1)
+
+
+@receiver(m2m_changed, sender=Channel.subscribers.through)
+@receiver(m2m_changed, sender=Game.subscribers.through)
+def count_subscriptions(sender, instance, action, reverse, pk_set, **kwargs):
+    owner = Channel if sender is Channel.subscribers.through else Game
+    field = 'channel_id' if owner is Channel else 'game_id'
+    if action == 'pre_remove':
+        narrow_to_members(sender, instance, reverse, pk_set, field, 'profile_id')
+    elif action in ('post_add', 'post_remove'):
+        delta = 1 if action == 'post_add' else -1
+        if reverse:
+            count_subscribers(owner, pk_set, delta)
+        elif pk_set:
+            count_subscribers(owner, [instance.pk], delta * len(pk_set))
+    elif action == 'pre_clear':
+        if reverse:
+            count_subscribers(owner, sender.objects.filter(profile=instance).values_list(field, flat=True), -1)
         else:
-            points = 100
-        
-        row = LeaderboardRow(leaderboard=leaderboard, user=profile, points=points)
-        row.save()
-        profile.points = profile.points + points
-        profile.save()
+            count_subscribers(owner, [instance.pk], -sender.objects.filter(**{field: instance.pk}).count())
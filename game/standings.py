@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Leaderboard, Standing
+
+
+def _ahead_of(standing):
+    """Standings ranked above `standing` on its leaderboard."""
+    return Standing.objects.filter(leaderboard_id=standing.leaderboard_id).exclude(pk=standing.pk).filter(
+        Q(total__gt=standing.total)
+        | Q(total=standing.total, first_completed_at__lt=standing.first_completed_at)
+        | Q(total=standing.total, first_completed_at=standing.first_completed_at, user_id__lt=standing.user_id)
+    )
+
+def record_leaderboard_row(row):
+    """
+    Add a new LeaderboardRow to its user's standing and move that standing
+    to its new rank, shifting only the standings it passes.
+    """
+    with transaction.atomic():
+        # Serialize rank changes per leaderboard.
+        list(Leaderboard.objects.select_for_update().filter(pk=row.leaderboard_id).values_list('pk'))
+
+        standing = Standing.objects.filter(leaderboard_id=row.leaderboard_id, user_id=row.user_id).first()
+        if standing is None:
+            last = Standing.objects.filter(leaderboard_id=row.leaderboard_id).count()
+            standing = Standing.objects.create(
+                leaderboard_id=row.leaderboard_id, user_id=row.user_id,
+                total=0, rank=last + 1, first_completed_at=row.timestamp,
+            )
+
+        old_rank = standing.rank
+        standing.total += row.points
+        new_rank = _ahead_of(standing).count() + 1
+
+        others = Standing.objects.filter(leaderboard_id=row.leaderboard_id).exclude(pk=standing.pk)
+        if new_rank < old_rank:
+            others.filter(rank__gte=new_rank, rank__lt=old_rank).update(rank=F('rank') + 1)
+        elif new_rank > old_rank:
+            others.filter(rank__gt=old_rank, rank__lte=new_rank).update(rank=F('rank') - 1)
+
+        standing.rank = new_rank
+        standing.save(update_fields=['total', 'rank'])
+        return standing
+
+def around(standing, k):
+    """The standings within `k` ranks of `standing`, best first."""
+    return Standing.objects.filter(
+        leaderboard_id=standing.leaderboard_id,
+        rank__gte=standing.rank - k,
+        rank__lte=standing.rank + k,
+    ).select_related('user__user').order_by('rank')
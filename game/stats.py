@@ -0,0 +1,73 @@
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from posts.models import Post
+from .models import Channel, ChannelDailyStats, ChannelStats, Game, GameDailyStats, GameStats
+
+
+def bump(model, keys, **deltas):
+    """Add `deltas` to the counters of the rows of `model` identified by each dict in `keys`, creating missing rows."""
+    if not keys:
+        return
+    model.objects.bulk_create([model(**key) for key in keys], ignore_conflicts=True)
+    for key in keys:
+        model.objects.filter(**key).update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+def count_subscribers(model, pks, delta):
+    """Add `delta` to the subscriber count of the channels or games `pks`."""
+    stats, field = (ChannelStats, 'channel_id') if model is Channel else (GameStats, 'game_id')
+    bump(stats, [{field: pk} for pk in pks], subscriber_count=delta)
+
+def count_submission(validate_post, count=1):
+    """Add `count` submissions to today's buckets of the channel and game of `validate_post`."""
+    day = timezone.localdate()
+    bump(ChannelDailyStats, [{'channel_id': validate_post.channel_id, 'day': day}], submissions=count)
+    bump(GameDailyStats, [{'game_id': validate_post.game_id, 'day': day}], submissions=count)
+
+def _store(stats, field, totals, now):
+    stats.objects.bulk_create([stats(**{field: pk}) for pk in totals], ignore_conflicts=True)
+    rows = list(stats.objects.filter(**{field + '__in': list(totals)}))
+    for row in rows:
+        row.post_count, row.player_count = totals[getattr(row, field)]
+        row.rolled_up_at = now
+    stats.objects.bulk_update(rows, ['post_count', 'player_count', 'rolled_up_at'])
+
+def _store_days(daily, field, buckets):
+    daily.objects.bulk_create([daily(**{field: pk, 'day': day}) for pk, day in buckets], ignore_conflicts=True)
+    owners = set(pk for pk, _ in buckets)
+    days = set(day for _, day in buckets)
+    rows = [row for row in daily.objects.filter(**{field + '__in': owners, 'day__in': days}) if (getattr(row, field), row.day) in buckets]
+    for row in rows:
+        row.posts, row.players = buckets[(getattr(row, field), row.day)]
+    # Only the rolled up columns are written so concurrent submission counts survive.
+    daily.objects.bulk_update(rows, ['posts', 'players'])
+
+def _rollup(rows, prefix, stats, daily, field, pks, since, now):
+    """
+    Recount the post totals of `pks` and their daily buckets from `since` on.
+
+    `rows` has one row per post of an owner, with the owner's id under
+    `field` and the post's columns under `prefix`.
+    """
+    counts = {'posts': Count('post_id'), 'players': Count(prefix + 'author', distinct=True)}
+
+    totals = {pk: (0, 0) for pk in pks}
+    for row in rows.values(field).annotate(**counts).order_by():
+        totals[row[field]] = (row['posts'], row['players'])
+    _store(stats, field, totals, now)
+
+    buckets = {}
+    recent = rows.filter(**{prefix + 'date_created__gte': since}).annotate(day=TruncDate(prefix + 'date_created'))
+    for row in recent.values(field, 'day').annotate(**counts).order_by():
+        buckets[(row[field], row['day'])] = (row['posts'], row['players'])
+    _store_days(daily, field, buckets)
+
+def rollup_channels(pks, since, now=None):
+    """Recount the totals of the channels `pks`, and their daily buckets from the datetime `since` on."""
+    _rollup(Post.objects.filter(channel_id__in=pks), '', ChannelStats, ChannelDailyStats, 'channel_id', pks, since, now or timezone.now())
+
+def rollup_games(pks, since, now=None):
+    """Recount the totals of the games `pks`, and their daily buckets from the datetime `since` on."""
+    rows = Game.posts.through.objects.filter(game_id__in=pks, post__author__deleted_on__isnull=True)
+    _rollup(rows, 'post__', GameStats, GameDailyStats, 'game_id', pks, since, now or timezone.now())
@@ -1,3 +1,499 @@
-from django.test import TestCase
+import re
+from io import StringIO
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.core.management import call_command
 
-# Create your tests here.
+from django.core.cache import cache
+from chat.models import ChatRoom, Message
+from game.names import channel_names, game_names
+from game.models import Channel, Game, GameCell, GameDailyStats, GameFootprint, GameProgress, Leaderboard, LeaderboardRow, Standing, ValidatePost
+from jobs.models import Job
+from jobs.queue import enqueue, run_pending
+from posts.models import Post
+from socialpixel_backend.testing import GraphQLTestMixin
+from users.enums import ProfileVisibilityEnums
+
+
+class ChannelTombstoneTests(TestCase):
+    def setUp(self):
+        db = get_user_model()
+        user = db.objects.create_user(
+            'username', 'username@example.com', 'password123'
+        )
+        self.chatroom = ChatRoom.objects.create(created_by=user.profile, name='channel')
+        Message.objects.create(author=user.profile, room=self.chatroom, text='hello')
+        self.channel = Channel.objects.create(name='channel', chatroom=self.chatroom)
+        self.channel.subscribers.add(user.profile)
+        Game.objects.create(name='game', channel=self.channel, creator=user.profile)
+
+    def test_tombstoned_channel_is_hidden_and_purged(self):
+        self.channel.tombstone()
+        self.assertFalse(Channel.objects.filter(id=self.channel.id).exists())
+        self.assertFalse(Game.objects.exists())
+        self.assertFalse(ChatRoom.objects.exists())
+        Channel.objects.create(name='channel')
+
+        call_command('purge_channels', batch_size=1, stdout=StringIO())
+        self.assertEqual(Channel.all_objects.count(), 1)
+        self.assertFalse(Game.all_objects.exists())
+        self.assertFalse(Leaderboard.objects.exists())
+        self.assertFalse(ChatRoom.all_objects.exists())
+        self.assertFalse(Message.all_objects.exists())
+
+
+class StandingTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.users = [db.objects.create_user(f'user{i}', f'user{i}@example.com', 'password123') for i in range(4)]
+        channel = Channel.objects.create(name='channel')
+        self.game = Game.objects.create(name='game', channel=channel, creator=self.users[0].profile)
+        self.leaderboard = Game.objects.get(id=self.game.id).leaderboard
+
+    def add_row(self, user, points):
+        LeaderboardRow.objects.create(leaderboard=self.leaderboard, user=user.profile, points=points)
+
+    def ranking(self):
+        return list(self.leaderboard.standings.order_by('rank').values_list('user__user__username', 'total', 'rank'))
+
+    def test_rows_move_standings_incrementally(self):
+        self.add_row(self.users[0], 100)
+        self.add_row(self.users[1], 100)
+        self.add_row(self.users[2], 300)
+        # Ties go to whoever completed first.
+        self.assertEqual(self.ranking(), [('user2', 300, 1), ('user0', 100, 2), ('user1', 100, 3)])
+
+        self.add_row(self.users[1], 250)
+        self.assertEqual(self.ranking(), [('user1', 350, 1), ('user2', 300, 2), ('user0', 100, 3)])
+
+        self.add_row(self.users[3], 0)
+        self.assertEqual(self.ranking()[-1], ('user3', 0, 4))
+
+    def test_standings_are_paged_and_windowed(self):
+        for points, user in zip([400, 300, 200, 100], self.users):
+            self.add_row(user, points)
+        game_standings = """
+            query ($game: ID!, $after: String) {
+                gameStandings(game: $game, first: 2, after: $after) { rank total cursor }
+            }
+        """
+        page = self.query(self.users[0], game_standings, game=self.game.id)['gameStandings']
+        self.assertEqual([row['rank'] for row in page], [1, 2])
+        page = self.query(self.users[0], game_standings, game=self.game.id, after=page[-1]['cursor'])['gameStandings']
+        self.assertEqual([row['total'] for row in page], [200, 100])
+
+        around_me = """
+            query ($game: ID!) {
+                gameStandingsAroundMe(game: $game, k: 1) { rank user { user { username } } }
+            }
+        """
+        window = self.query(self.users[2], around_me, game=self.game.id)['gameStandingsAroundMe']
+        self.assertEqual([row['rank'] for row in window], [2, 3, 4])
+        self.assertEqual(Standing.objects.filter(leaderboard=self.leaderboard).count(), 4)
+
+
+class GameProgressTests(TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.creator, self.first, self.second = [db.objects.create_user(name, f'{name}@example.com', 'password123').profile for name in ['creator', 'first', 'second']]
+        channel = Channel.objects.create(name='channel')
+        self.game = Game.objects.create(name='game', channel=channel, creator=self.creator)
+        self.game.refresh_from_db()
+        self.game.posts.add(*[Post.objects.create(author=self.creator) for _ in range(2)])
+
+    def progress(self, profile):
+        return GameProgress.objects.get(game=self.game, author=profile)
+
+    def accept(self, profile):
+        post = Post.objects.create(author=profile)
+        self.game.posts.add(post)
+        enqueue('game.jobs.validation_accepted', f'validate-post:{post.pk}', validate_post_id=post.pk, game_id=self.game.id, post_id=post.pk, author_id=profile.pk, validator_id=self.creator.pk)
+        run_pending()
+        return post
+
+    def test_posts_are_counted_per_author(self):
+        post = self.accept(self.first)
+        self.assertEqual(self.progress(self.creator).post_count, 2)
+        self.assertEqual(self.progress(self.first).post_count, 1)
+
+        self.game.posts.remove(post)
+        self.assertEqual(self.progress(self.first).post_count, 0)
+        self.game.posts.clear()
+        self.assertEqual(self.progress(self.creator).post_count, 0)
+
+    def test_removing_a_non_member_post_is_not_counted(self):
+        self.game.posts.remove(Post.objects.create(author=self.creator))
+        self.assertEqual(self.progress(self.creator).post_count, 2)
+
+    def test_deleted_posts_are_uncounted(self):
+        self.game.posts.first().delete()
+        self.assertEqual(self.game.posts.count(), 1)
+        self.assertEqual(self.progress(self.creator).post_count, 1)
+
+    def test_completion_places_each_player_once(self):
+        self.accept(self.first)
+        self.assertIsNone(self.progress(self.first).placement)
+        self.accept(self.second)
+        self.accept(self.second)
+        self.accept(self.first)
+        self.accept(self.first)
+
+        self.assertEqual(self.progress(self.second).placement, 1)
+        self.assertEqual(self.progress(self.first).placement, 2)
+        self.assertEqual(list(LeaderboardRow.objects.order_by('points').values_list('user', 'points')), [(self.first.pk, 800), (self.second.pk, 1000)])
+        self.assertEqual(Game.objects.get(id=self.game.id).completed_count, 2)
+
+
+class ValidationQueueTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.creator, self.alice, self.bob = [db.objects.create_user(name, f'{name}@example.com', 'password123') for name in ['creator', 'alice', 'bob']]
+        self.channel = Channel.objects.create(name='channel')
+        self.channel.subscribers.add(self.alice.profile, self.bob.profile)
+        self.game = Game.objects.create(name='game', channel=self.channel, creator=self.creator.profile)
+        original = Post.objects.create(author=self.creator.profile)
+        self.queue = [
+            ValidatePost.objects.create(game=self.game, channel=self.channel, creator_post=original, post=Post.objects.create(author=self.creator.profile), priority=priority)
+            for priority in [0, 5, 0]
+        ]
+
+    def claim(self, user, n):
+        result = self.execute(user, """
+            mutation ($n: Int) {
+                claimValidations(channel: "channel", n: $n) { validatePosts { id } }
+            }
+        """, n=n)
+        self.assertIsNone(result.errors)
+        return [int(row['id']) for row in result.data['claimValidations']['validatePosts']]
+
+    def test_claims_do_not_overlap_until_leases_expire(self):
+        first, urgent, last = [validate_post.id for validate_post in self.queue]
+        self.assertEqual(self.claim(self.alice, 2), [urgent, first])
+        self.assertEqual(self.claim(self.bob, 2), [last])
+        self.assertEqual(self.claim(self.alice, 3), [urgent, first])
+
+        ValidatePost.objects.filter(claimed_by=self.alice.profile).update(lease_expires=timezone.now())
+        self.assertEqual(self.claim(self.bob, 3), [urgent, first, last])
+
+    def locks(self, run):
+        """
+        Run `run` as if on a database with SELECT ... FOR UPDATE OF and return
+        the locking clauses it sends. The clauses are stripped before the
+        queries reach SQLite, which has no row locks.
+        """
+        sent = []
+
+        def strip_locks(execute, sql, params, many, context):
+            match = re.search(r' FOR UPDATE.*$', sql)
+            if match:
+                sent.append(match.group())
+                sql = sql[:match.start()]
+            return execute(sql, params, many, context)
+
+        features = {'has_select_for_update': True, 'has_select_for_update_of': True, 'has_select_for_update_skip_locked': True}
+        with mock.patch.multiple(connection.features, **features), connection.execute_wrapper(strip_locks):
+            run()
+        return sent
+
+    def test_claims_lock_queue_rows_only(self):
+        self.assertEqual(self.locks(lambda: self.claim(self.alice, 1)), [' FOR UPDATE OF "game_validatepost" SKIP LOCKED'])
+
+    def test_validations_lock_queue_rows_only(self):
+        first, urgent, last = self.queue
+
+        def validate():
+            return self.execute(self.alice, """
+                mutation ($post: ID!) {
+                    validatePost(postId: $post, game: "game", modifier: REJECT) { success }
+                }
+            """, post=first.post_id)
+
+        def batch():
+            return self.execute(self.alice, """
+                mutation ($accept: [ID], $reject: [ID]) {
+                    batchValidatePosts(game: "game", accept: $accept, reject: $reject) { success }
+                }
+            """, accept=[urgent.post_id], reject=[last.post_id])
+
+        self.assertEqual(self.locks(validate), [' FOR UPDATE OF "game_validatepost"'])
+        self.assertEqual(self.locks(batch), [' FOR UPDATE OF "game_validatepost"'])
+        self.assertFalse(ValidatePost.objects.exists())
+
+    def test_claimed_posts_can_only_be_validated_by_their_holder(self):
+        urgent = self.queue[1]
+        self.claim(self.alice, 1)
+        validate = """
+            mutation ($post: ID!) {
+                validatePost(postId: $post, game: "game", modifier: REJECT) { success }
+            }
+        """
+        with self.assertLogs('graphql.execution.utils', 'ERROR'):
+            result = self.execute(self.bob, validate, post=urgent.post_id)
+        self.assertEqual(result.errors[0].message, 'Post is claimed by another moderator!')
+
+        self.assertIsNone(self.execute(self.alice, validate, post=urgent.post_id).errors)
+        with self.assertLogs('graphql.execution.utils', 'ERROR'):
+            result = self.execute(self.bob, validate, post=urgent.post_id)
+        self.assertEqual(result.errors[0].message, 'Post has already been validated!')
+
+    def test_posts_are_submitted_in_bulk(self):
+        self.alice.profile.subscribed_to_game.add(self.game)
+        original = self.queue[0].creator_post
+        posts = [Post.objects.create(author=self.alice.profile) for _ in range(3)]
+        add = """
+            mutation ($posts: [GamePostInput], $post: ID, $original: ID) {
+                gameAddPost(name: "game", posts: $posts, postId: $post, originalPostId: $original) { success }
+            }
+        """
+        result = self.execute(
+            self.alice, add, posts=[{'postId': post.post_id, 'originalPostId': original.post_id} for post in posts[:2]],
+            post=posts[2].post_id, original=original.post_id,
+        )
+        self.assertIsNone(result.errors)
+        self.assertEqual(ValidatePost.objects.filter(post__author=self.alice.profile).count(), 3)
+        self.assertEqual(GameDailyStats.objects.get(game=self.game).submissions, 6)
+
+        with self.assertLogs('graphql.execution.utils', 'ERROR'):
+            result = self.execute(self.alice, add, post=0, original=original.post_id)
+        self.assertEqual(result.errors[0].message, 'Post does not exist')
+
+    def test_batch_validation_accepts_null_lists(self):
+        result = self.execute(self.alice, """
+            mutation ($accept: [ID], $reject: [ID]) {
+                batchValidatePosts(game: "game", accept: $accept, reject: $reject) { skipped success }
+            }
+        """, accept=None, reject=None)
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['batchValidatePosts'], {'skipped': [], 'success': True})
+
+    def test_batch_validation_skips_claimed_posts_and_queues_one_job(self):
+        first, urgent, last = self.queue
+        self.claim(self.bob, 1)
+        result = self.execute(self.alice, """
+            mutation ($accept: [ID], $reject: [ID]) {
+                batchValidatePosts(game: "game", accept: $accept, reject: $reject) { skipped success }
+            }
+        """, accept=[first.post_id, urgent.post_id], reject=[last.post_id])
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['batchValidatePosts']['skipped'], [str(urgent.post_id)])
+        self.assertEqual(list(ValidatePost.objects.values_list('id', flat=True)), [urgent.id])
+        self.assertEqual(list(self.game.posts.values_list('pk', flat=True)), [first.post_id])
+        self.assertEqual(GameProgress.objects.get(game=self.game, author=self.creator.profile).post_count, 1)
+
+        self.assertEqual(Job.objects.count(), 1)
+        run_pending()
+        self.alice.profile.refresh_from_db()
+        self.creator.profile.refresh_from_db()
+        self.assertEqual(self.alice.profile.points, 250)
+        self.assertEqual(self.creator.profile.points, 100)
+
+
+class StatsTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.creator, self.player = [db.objects.create_user(name, f'{name}@example.com', 'password123') for name in ['creator', 'player']]
+        self.channel = Channel.objects.create(name='channel')
+        self.game = Game.objects.create(name='game', channel=self.channel, creator=self.creator.profile)
+
+    def stats(self):
+        data = self.query(self.creator, """
+            {
+                channels { stats { subscriberCount postCount playerCount days(last: 2) { posts players submissions } } }
+                games { stats { subscriberCount postCount playerCount days { posts submissions } } }
+            }
+        """)
+        return data['channels'][0]['stats'], data['games'][0]['stats']
+
+    def test_subscriber_counts_are_incremental(self):
+        self.channel.subscribers.add(self.creator.profile, self.player.profile)
+        self.player.profile.subscribed_to_game.add(self.game)
+        channel, game = self.stats()
+        self.assertEqual((channel['subscriberCount'], game['subscriberCount']), (2, 1))
+
+        self.channel.subscribers.remove(self.player.profile)
+        self.player.profile.subscribed_to_game.clear()
+        channel, game = self.stats()
+        self.assertEqual((channel['subscriberCount'], game['subscriberCount']), (1, 0))
+
+        # Profiles that are not subscribed are not counted.
+        self.channel.subscribers.remove(self.player.profile)
+        self.player.profile.subscribed_to_game.remove(self.game)
+        channel, game = self.stats()
+        self.assertEqual((channel['subscriberCount'], game['subscriberCount']), (1, 0))
+
+    def test_rollup_counts_posts_and_players_per_day(self):
+        original = Post.objects.create(author=self.creator.profile, channel=self.channel)
+        posts = [Post.objects.create(author=profile, channel=self.channel) for profile in [self.creator.profile, self.player.profile, self.player.profile]]
+        self.game.posts.add(original, posts[1])
+        ValidatePost.objects.create(game=self.game, channel=self.channel, creator_post=original, post=posts[2])
+
+        call_command('rollup_stats', stdout=StringIO())
+        channel, game = self.stats()
+        self.assertEqual((channel['postCount'], channel['playerCount']), (4, 2))
+        self.assertEqual(channel['days'], [{'posts': 4, 'players': 2, 'submissions': 1}])
+        self.assertEqual((game['postCount'], game['playerCount']), (2, 2))
+        self.assertEqual(game['days'], [{'posts': 2, 'submissions': 1}])
+
+
+class ChannelDirectoryTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.user, self.private = [db.objects.create_user(name, f'{name}@example.com', 'password123') for name in ['user', 'private']]
+        self.private.profile.visibility = ProfileVisibilityEnums.PRIVATE
+        self.private.profile.save(update_fields=['visibility'])
+        self.quiet, self.busy, self.newest = [Channel.objects.create(name=name) for name in ['quiet', 'busy', 'newest']]
+        self.busy.subscribers.add(self.user.profile, self.private.profile)
+        self.quiet.subscribers.add(self.user.profile)
+
+    def names(self, order_by):
+        query = """
+            query ($after: String, $orderBy: ChannelOrderEnumsType) {
+                channels(first: 2, after: $after, orderBy: $orderBy) { name cursor }
+            }
+        """
+        page = self.query(self.user, query, orderBy=order_by)['channels']
+        page += self.query(self.user, query, orderBy=order_by, after=page[-1]['cursor'])['channels']
+        return [channel['name'] for channel in page]
+
+    def test_channels_are_paged_by_age_or_popularity(self):
+        self.assertEqual(self.names('NEWEST'), ['newest', 'busy', 'quiet'])
+        self.assertEqual(self.names('POPULAR'), ['busy', 'quiet', 'newest'])
+
+    def test_channel_posts_are_paged_newest_first(self):
+        posts = [Post.objects.create(author=self.user.profile, channel=self.busy) for _ in range(3)]
+        Post.objects.create(author=self.private.profile, channel=self.busy)
+        Post.objects.create(author=self.user.profile, channel=self.quiet)
+        query = """
+            query ($channel: ID!, $after: String) {
+                channelPosts(channel: $channel, first: 2, after: $after) { postId cursor }
+            }
+        """
+        page = self.query(self.user, query, channel=self.busy.id)['channelPosts']
+        page += self.query(self.user, query, channel=self.busy.id, after=page[-1]['cursor'])['channelPosts']
+        self.assertEqual([int(post['postId']) for post in page], [post.post_id for post in reversed(posts)])
+
+
+class ChannelNameTests(TransactionTestCase):
+    # Lookups are only cached outside transactions, which TestCase wraps every test in.
+    def setUp(self):
+        # Flushing the tables between tests sends no signals.
+        cache.clear()
+        db = get_user_model()
+        self.user = db.objects.create_user('user', 'user@example.com', 'password123')
+        self.channel = Channel.objects.create(name='channel')
+        self.game = Game.objects.create(name='game', channel=self.channel, creator=self.user.profile)
+
+    def test_names_resolve_until_the_channel_is_tombstoned(self):
+        self.assertEqual(channel_names.id('channel'), self.channel.id)
+        self.assertEqual(game_names.id((self.channel.id, 'game')), self.game.id)
+        with self.assertNumQueries(0):
+            channel_names.id('channel')
+
+        self.channel.tombstone()
+        replacement = Channel.objects.create(name='channel')
+        self.assertEqual(channel_names.id('channel'), replacement.id)
+
+
+class GamesNearTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.creator, self.player = [db.objects.create_user(name, f'{name}@example.com', 'password123') for name in ['creator', 'player']]
+        channel = Channel.objects.create(name='channel')
+        self.park = Game.objects.create(name='park', channel=channel, creator=self.creator.profile)
+        self.city = Game.objects.create(name='city', channel=channel, creator=self.creator.profile)
+        self.park.posts.add(
+            Post.objects.create(author=self.creator.profile, gps_latitude='51.500000', gps_longitude='-0.100000'),
+            Post.objects.create(author=self.creator.profile, gps_latitude='51.502000', gps_longitude='-0.100000'),
+            # Posts of other players do not move the game.
+            Post.objects.create(author=self.player.profile, gps_latitude='10.000000', gps_longitude='10.000000'),
+        )
+        self.city.posts.add(Post.objects.create(author=self.creator.profile, gps_latitude='51.530000', gps_longitude='-0.100000'))
+
+    def games_near(self, **variables):
+        return self.query(self.player, """
+            query ($lat: Float!, $lon: Float!, $radius: Float) {
+                gamesNear(lat: $lat, lon: $lon, radiusM: $radius) { game { name latitude } distance }
+            }
+        """, **variables)['gamesNear']
+
+    def test_footprint_follows_creator_posts(self):
+        footprint = GameFootprint.objects.get(game=self.park)
+        self.assertEqual(footprint.located_posts, 2)
+        self.assertAlmostEqual(footprint.latitude, 51.501)
+        self.assertEqual(GameCell.objects.filter(game=self.park).count(), 1)
+
+        self.park.posts.remove(*self.park.posts.filter(gps_latitude='51.502000'))
+        footprint.refresh_from_db()
+        self.assertAlmostEqual(footprint.latitude, 51.5)
+
+        self.city.posts.clear()
+        self.assertFalse(GameCell.objects.filter(game=self.city).exists())
+
+    def test_footprint_follows_moved_and_deleted_posts(self):
+        self.park.posts.remove(Post.objects.create(author=self.creator.profile, gps_latitude='51.500000', gps_longitude='-0.100000'))
+        self.assertEqual(GameFootprint.objects.get(game=self.park).located_posts, 2)
+
+        post = self.city.posts.get()
+        post.gps_latitude = '10.000000'
+        post.save()
+        footprint = GameFootprint.objects.get(game=self.city)
+        self.assertAlmostEqual(footprint.latitude, 10)
+        self.assertEqual(self.games_near(lat=51.53, lon=-0.1, radius=100), [])
+        self.assertEqual([row['game']['name'] for row in self.games_near(lat=10, lon=-0.1, radius=100)], ['city'])
+
+        post.delete()
+        footprint.refresh_from_db()
+        self.assertEqual(footprint.located_posts, 0)
+        self.assertFalse(GameCell.objects.filter(game=self.city).exists())
+
+    def test_games_near_are_found_through_the_grid_nearest_first(self):
+        nearby = self.games_near(lat=51.501, lon=-0.1, radius=5000)
+        self.assertEqual([row['game']['name'] for row in nearby], ['park', 'city'])
+        self.assertLess(nearby[0]['distance'], 200)
+        self.assertAlmostEqual(nearby[0]['game']['latitude'], 51.501)
+
+        self.assertEqual([row['game']['name'] for row in self.games_near(lat=51.501, lon=-0.1, radius=1000)], ['park'])
+        self.assertEqual(self.games_near(lat=10, lon=10, radius=1000), [])
+
+
+class CreateGameTests(GraphQLTestMixin, TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.creator, self.other = [db.objects.create_user(name, f'{name}@example.com', 'password123') for name in ['creator', 'other']]
+        self.channel = Channel.objects.create(name='channel')
+        self.channel.subscribers.add(self.creator.profile)
+        self.posts = [Post.objects.create(author=self.creator.profile) for _ in range(50)]
+
+    def create_game(self, posts, name='game'):
+        return self.execute(self.creator, """
+            mutation ($name: String!, $posts: [ID]!) {
+                createGame(name: $name, channel: "channel", tags: ["outdoors", "city"], posts: $posts) { game { id } success }
+            }
+        """, name=name, posts=posts)
+
+    def test_seed_posts_are_attached_in_bulk(self):
+        # The first game creates the tags.
+        self.create_game([self.posts[0].post_id], name='warm')
+        with CaptureQueriesContext(connection) as single:
+            self.create_game([self.posts[1].post_id], name='single')
+        with CaptureQueriesContext(connection) as seeded:
+            result = self.create_game([post.post_id for post in self.posts[2:]])
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(seeded), len(single))
+
+        game = Game.objects.get(id=result.data['createGame']['game']['id'])
+        self.assertEqual(game.posts.count(), 48)
+        self.assertEqual(set(game.tags.values_list('name', flat=True)), {'outdoors', 'city'})
+        self.assertIsNotNone(game.leaderboard_id)
+        self.assertEqual(GameProgress.objects.get(game=game, author=self.creator.profile).post_count, 48)
+
+    def test_seed_posts_must_be_the_creators_own(self):
+        foreign = Post.objects.create(author=self.other.profile)
+        with self.assertLogs('graphql.execution.utils', 'ERROR'):
+            result = self.create_game([self.posts[0].post_id, foreign.post_id])
+        self.assertEqual(result.errors[0].message, 'Posts {} must be your own active posts to be added to game!'.format(foreign.post_id))
+        self.assertFalse(Game.objects.exists())
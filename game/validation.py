@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .events import publish_validation_queue_changed
+from .models import ValidatePost
+from .stats import count_submission
+
+VALIDATION_LEASE_SECONDS = getattr(settings, 'VALIDATION_LEASE_SECONDS', 300)
+VALIDATION_QUEUE_ORDERING = ['-priority', 'timestamp', 'id']
+
+
+def claimable(profile, now):
+    """Posts that are not leased, whose lease has run out, or that `profile` already holds."""
+    return Q(lease_expires__isnull=True) | Q(lease_expires__lte=now) | Q(claimed_by=profile)
+
+def lock(queryset, **kwargs):
+    """
+    SELECT ... FOR UPDATE on `queryset` that locks its own rows only.
+
+    ValidatePost.objects joins the channel to hide tombstoned ones, and a
+    plain FOR UPDATE would lock the channel row as well, serialising every
+    moderator of the channel behind the first one.
+    """
+    if connections[queryset.db].features.has_select_for_update_of:
+        kwargs['of'] = ('self',)
+    return queryset.select_for_update(**kwargs)
+
+def claim(channel, profile, n, lease=VALIDATION_LEASE_SECONDS):
+    """
+    Lease up to `n` posts of the validation queue of `channel` to `profile`
+    for `lease` seconds, highest priority and oldest first, and return them.
+
+    Rows are picked with SELECT ... FOR UPDATE SKIP LOCKED so concurrent
+    moderators pick different posts without waiting on each other. The
+    UPDATE repeats the availability check, which keeps claims exclusive on
+    databases without row locks as well.
+    """
+    now = timezone.now()
+    expires = now + timedelta(seconds=lease)
+    with transaction.atomic():
+        queue = ValidatePost.objects.filter(claimable(profile, now), channel=channel).order_by(*VALIDATION_QUEUE_ORDERING)
+        ids = list(lock(queue, skip_locked=True).values_list('id', flat=True)[:n])
+        ValidatePost.objects.filter(claimable(profile, now), id__in=ids).update(claimed_by=profile, lease_expires=expires)
+    return ValidatePost.objects.filter(id__in=ids, claimed_by=profile, lease_expires=expires).order_by(*VALIDATION_QUEUE_ORDERING)
+
+def submit(game, posts):
+    """
+    Queue the player posts of `posts`, a dict of post id to the id of the
+    creator post it answers, for validation in `game` with one INSERT and
+    return the new ValidatePosts.
+
+    bulk_create sends no post_save, so the submissions are counted and
+    announced to the queue here.
+    """
+    validate_posts = [
+        ValidatePost(game=game, channel_id=game.channel_id, post_id=post_id, creator_post_id=creator_post_id)
+        for post_id, creator_post_id in posts.items()
+    ]
+    if not validate_posts:
+        return []
+    with transaction.atomic():
+        ValidatePost.objects.bulk_create(validate_posts)
+        if validate_posts[0].id is None:
+            # Backends that cannot return ids from a bulk INSERT.
+            ids = dict(ValidatePost.objects.filter(game=game, post_id__in=posts).values_list('post_id', 'id'))
+            for validate_post in validate_posts:
+                validate_post.id = ids[validate_post.post_id]
+        count_submission(validate_posts[0], len(validate_posts))
+    for validate_post in validate_posts:
+        publish_validation_queue_changed(validate_post, 'added')
+    return validate_posts
+
+def is_claimed_by_other(validate_post, profile):
+    return validate_post.claimed_by_id not in (None, profile.pk) and validate_post.lease_expires > timezone.now()
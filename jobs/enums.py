@@ -0,0 +1,6 @@
+from django.db import models
+
+class JobStatusEnums(models.IntegerChoices):
+        PENDING = 0
+        DONE = 1
+        FAILED = 2
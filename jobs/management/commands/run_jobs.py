@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.queue import run_pending
+
+# Backends that keep their state in the process using them. Jobs award points
+# and publish events for the web process, which cannot see either of these.
+IN_PROCESS_BACKENDS = [
+    'users.ranking.InMemoryRanking',
+    'channels.layers.InMemoryChannelLayer',
+]
+
+
+class Command(BaseCommand):
+    help = 'Run queued jobs, either once or continuously as a worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Run the jobs that are due and exit.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of jobs to run between checks for new ones.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1,
+            help='Seconds to wait when no job is due.',
+        )
+
+    def handle(self, *args, **options):
+        backends = [
+            getattr(settings, 'POINTS_RANKING_BACKEND', 'users.ranking.InMemoryRanking'),
+            getattr(settings, 'CHANNEL_LAYERS', {}).get('default', {}).get('BACKEND'),
+        ]
+        if any(backend in IN_PROCESS_BACKENDS for backend in backends):
+            raise CommandError('The job worker needs the ranking and channel layer it shares with the web process; set REDIS_URL.')
+        while True:
+            ran = run_pending(options['batch_size'])
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS(f'Ran {ran} job(s).'))
+                return
+            if ran < options['batch_size']:
+                time.sleep(options['sleep'])
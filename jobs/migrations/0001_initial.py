@@ -0,0 +1,38 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('task', models.CharField(help_text='Dotted path of the function to run', max_length=256)),
+                ('payload', models.JSONField(default=dict, help_text='Keyword arguments for the task')),
+                ('idempotency_key', models.CharField(max_length=256, unique=True)),
+                ('status', models.IntegerField(choices=[(0, 'Pending'), (1, 'Done'), (2, 'Failed')], default=0)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'run_after'], name='jobs_job_pending_idx'),
+        ),
+    ]
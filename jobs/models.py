@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils import timezone
+
+from .enums import JobStatusEnums
+
+class Job(models.Model):
+    """
+    A side effect to run outside the request that caused it, written in the
+    same transaction as the change it reacts to.
+
+    `idempotency_key` names the event the job belongs to, so enqueuing the
+    same event twice creates one job.
+    """
+    id = models.BigAutoField(primary_key=True)
+    task = models.CharField(max_length=256, help_text="Dotted path of the function to run")
+    payload = models.JSONField(default=dict, help_text="Keyword arguments for the task")
+    idempotency_key = models.CharField(max_length=256, unique=True)
+    status = models.IntegerField(choices=JobStatusEnums.choices, default=JobStatusEnums.PENDING)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.id) + ':' + self.task + ':' + self.idempotency_key
+
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='jobs_job_pending_idx'),
+        ]
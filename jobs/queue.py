@@ -0,0 +1,64 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .enums import JobStatusEnums
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS_RETRY_DELAY = getattr(settings, 'JOBS_RETRY_DELAY', 10)
+
+
+def enqueue(task, idempotency_key, **payload):
+    """
+    Queue `task` (a dotted path) to be called with `payload` by the worker.
+
+    Call it inside the transaction that makes the change the job reacts to:
+    the job is then committed or rolled back together with that change.
+    Returns the job, or the existing one if `idempotency_key` was already
+    queued.
+    """
+    job, _ = Job.objects.get_or_create(idempotency_key=idempotency_key, defaults={'task': task, 'payload': payload})
+    return job
+
+def run_pending(limit=100):
+    """
+    Run up to `limit` due jobs in this process and return how many ran.
+
+    Each job runs in the transaction that marks it done, so its effects are
+    committed exactly once. A failing job is rolled back and retried with
+    an exponential backoff until it runs out of attempts.
+    """
+    ran = 0
+    while ran < limit:
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status=JobStatusEnums.PENDING, run_after__lte=timezone.now())
+                .order_by('run_after', 'id')
+                .first()
+            )
+            if job is None:
+                break
+
+            job.attempts += 1
+            try:
+                with transaction.atomic():
+                    import_string(job.task)(**job.payload)
+            except Exception as error:
+                logger.exception('Job %s failed', job)
+                job.last_error = repr(error)
+                if job.attempts >= job.max_attempts:
+                    job.status = JobStatusEnums.FAILED
+                else:
+                    job.run_after = timezone.now() + timedelta(seconds=JOBS_RETRY_DELAY * 2 ** (job.attempts - 1))
+            else:
+                job.status = JobStatusEnums.DONE
+            job.save(update_fields=['status', 'attempts', 'run_after', 'last_error'])
+        ran += 1
+    return ran
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.enums import JobStatusEnums
+from jobs.models import Job
+from jobs.queue import enqueue, run_pending
+
+calls = []
+
+def record(value):
+    calls.append(value)
+
+def fail(value):
+    raise ValueError(value)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_once_per_idempotency_key(self):
+        enqueue('jobs.tests.record', 'event:1', value='first')
+        enqueue('jobs.tests.record', 'event:1', value='again')
+        enqueue('jobs.tests.record', 'event:2', value='second')
+
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(run_pending(), 0)
+        self.assertEqual(calls, ['first', 'second'])
+        self.assertEqual(Job.objects.filter(status=JobStatusEnums.DONE).count(), 2)
+
+    def test_failed_jobs_are_retried_until_they_give_up(self):
+        job = enqueue('jobs.tests.fail', 'event:1', value='broken')
+        job.max_attempts = 2
+        job.save()
+
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatusEnums.PENDING, 1))
+        self.assertIn('broken', job.last_error)
+        self.assertGreater(job.run_after, timezone.now())
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatusEnums.FAILED, 2))
+
+    def test_worker_refuses_in_process_backends(self):
+        redis_layer = {'default': {'BACKEND': 'channels_redis.core.RedisChannelLayer'}}
+        with override_settings(POINTS_RANKING_BACKEND='users.ranking.InMemoryRanking', CHANNEL_LAYERS=redis_layer):
+            with self.assertRaisesMessage(CommandError, 'set REDIS_URL'):
+                call_command('run_jobs', once=True)
+        with override_settings(POINTS_RANKING_BACKEND='users.ranking.RedisRanking', CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}):
+            with self.assertRaisesMessage(CommandError, 'set REDIS_URL'):
+                call_command('run_jobs', once=True)
+
+        enqueue('jobs.tests.record', 'event:1', value='first')
+        out = StringIO()
+        with override_settings(POINTS_RANKING_BACKEND='users.ranking.RedisRanking', CHANNEL_LAYERS=redis_layer):
+            call_command('run_jobs', once=True, stdout=out)
+        self.assertIn('Ran 1 job(s).', out.getvalue())
+        self.assertEqual(calls, ['first'])
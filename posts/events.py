@@ -0,0 +1,8 @@
+from socialpixel_backend.pubsub import publish
+
+
+def post_group(post_id):
+    return 'post-{}'.format(post_id)
+
+def publish_comment_added(comment):
+    publish(post_group(comment.post_id_id), 'comment.added', {'id': comment.comment_id, 'post': comment.post_id_id})
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_auto_20210329_1543'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['channel', '-date_created', '-post_id'], name='posts_post_channel_feed_idx'),
+        ),
+    ]
@@ -11,6 +11,7 @@ from upload_validator import FileTypeValidator
 from django.core.validators import FileExtensionValidator
 
 from .enums import PostVisibilityEnums
+from socialpixel_backend.tombstones import TombstoneManager
 
 class Post(models.Model):
 
@@ -96,12 +97,18 @@ class Post(models.Model):
         options={'quality': 60},
     )
 
+    objects = TombstoneManager('author__deleted_on')
+    all_objects = models.Manager()
+
     def __str__(self):
         return str(self.author.user) + ':' + str(self.post_id)
 
     class Meta:
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
+        indexes = [
+            models.Index(fields=['channel', '-date_created', '-post_id'], name='posts_post_channel_feed_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -123,6 +130,9 @@ class Comment(models.Model):
     )
     date_created = models.DateTimeField(auto_now_add=True)
 
+    objects = TombstoneManager('author__deleted_on', 'post_id__author__deleted_on')
+    all_objects = models.Manager()
+
     def __str__(self):
         return str(self.post_id) + ':' + str(self.author.user) + ':' + str(self.comment_id)
 
@@ -1,14 +1,18 @@
 from game.models import Channel
+from game.names import channel_names
 import graphene
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
 
+from .events import post_group, publish_comment_added
 from .models import Post, Comment
 from .enums import PostVisibilityEnums
-from users.models import Profile, User, UserFollows
-from users.enums import ProfileVisibilityEnums
-from tags.models import Tag
+from users.models import Profile, User
+from users.enums import ProfileVisibilityEnums, PointsReasonEnums
+from users import points
+from tags.names import tag_ids
 from django.db.models import Q
+from socialpixel_backend.cursors import row_cursor
 
 
 class PostVisibilityType(graphene.Enum):
@@ -19,6 +23,8 @@ class ModifierEnumsType(graphene.Enum):
     ADD = 1
     REMOVE = 0
 
+POSTS_ORDERING = ['-date_created', '-post_id']
+
 class PostType(DjangoObjectType):
 
     def resolve_image(self, info):
@@ -34,6 +40,10 @@ class PostType(DjangoObjectType):
     image_150x150 = graphene.String()
     image_100x100 = graphene.String()
     image_75x75 = graphene.String()
+    cursor = graphene.String(description="Pass as after to channel_posts to get the posts following this one")
+
+    def resolve_cursor(self, info):
+        return row_cursor(self, POSTS_ORDERING)
 
     def resolve_image_300x300(self, info):
         return info.context.build_absolute_uri(Post.objects.get(post_id=self.post_id).image_300x300.url)
@@ -74,9 +84,9 @@ class PostsQuery(graphene.AbstractType):
             raise GraphQLError('You must be logged to get post by post_id!')
         else:
             post = Post.objects.get(post_id=id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
-            if (post.author.visibility == ProfileVisibilityEnums.PRIVATE) and not (UserFollows.objects.filter(user_profile=current_user_profile, following_user_profile=post.author).exists()) and not (current_user_profile==post.author):
+            if not info.context.viewer.can_view(post.author):
                 raise GraphQLError('You must be following post author to get private post!')
             else:
                 return Post.objects.get(post_id=id)
@@ -89,8 +99,8 @@ class PostsQuery(graphene.AbstractType):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get post feed!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
-            following = UserFollows.objects.filter(user_profile=current_user_profile).values('following_user_profile')
+            current_user_profile = info.context.viewer.profile
+            following = info.context.viewer.following
             criterion1 = Q(author__in=following, visibility=PostVisibilityEnums.ACTIVE)
             criterion2 = Q(author=current_user_profile, visibility=PostVisibilityEnums.ACTIVE)
             return Post.objects.filter(criterion1 | criterion2).order_by('-date_created')
@@ -99,16 +109,33 @@ class PostsQuery(graphene.AbstractType):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to get post by tags!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
-            following = UserFollows.objects.filter(user_profile=current_user_profile).values('following_user_profile')
+            current_user_profile = info.context.viewer.profile
+            following = info.context.viewer.following
             public_users = Profile.objects.filter(visibility=ProfileVisibilityEnums.PUBLIC)
             print(tags)
-            tagobjects = Tag.objects.filter(name__in=tags)
+            tagobjects = tag_ids(tags)
             print(tagobjects)
             criterion1 = Q(author__in=public_users, visibility=PostVisibilityEnums.ACTIVE, tags__in=tagobjects)
             criterion2 = Q(author__in=following, visibility=PostVisibilityEnums.ACTIVE, tags__in=tagobjects)
             return Post.objects.filter(criterion1 | criterion2).order_by('-date_created')
 
+class PostsSubscriptions(graphene.AbstractType):
+
+    comment_added = graphene.Field(CommentType, post=graphene.ID(required=True), description="Receive comments added to given post")
+
+    def resolve_comment_added(root, info, post):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('You must be logged to subscribe to comments!')
+        else:
+            post = Post.objects.select_related('author').get(post_id=post)
+
+            if not info.context.viewer.can_view(post.author):
+                raise GraphQLError('You must be following post author to subscribe to private post!')
+            else:
+                events = info.context.subscribe(post_group(post.post_id), 'comment.added')
+                comments = events.map(lambda data: Comment.objects.filter(comment_id=data['id']).first())
+                return comments.filter(lambda comment: comment is not None)
+
 class CreatePost(graphene.Mutation):
 
     class Arguments:
@@ -128,7 +155,7 @@ class CreatePost(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to create post!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             post = Post(author=current_user_profile, image=info.context.FILES[image], caption=caption, gps_longitude=gps_longitude, gps_latitude=gps_latitude)
             post.save()
 
@@ -136,18 +163,13 @@ class CreatePost(graphene.Mutation):
                 post.tagged_users.add(Profile.objects.get(user=User.objects.get(username=user)))
                 post.save()
 
-            for tag in tags:
-                if not Tag.objects.filter(name=tag).exists():
-                    t = Tag(name=tag)
-                    t.save()
-
-                post.tags.add(Tag.objects.get(name=tag))
-                post.save()
+            post.tags.add(*tag_ids(tags, create=True))
 
             if channel != '':
-                if not Channel.objects.filter(name=channel).exists():
+                try:
+                    post.channel_id = channel_names.id(channel)
+                except Channel.DoesNotExist:
                     raise GraphQLError('Channel does not exist. Provide existing Channel')
-                post.channel = Channel.objects.get(name=channel)
                 post.save()
         
             return CreatePost(
@@ -170,23 +192,19 @@ class PostUpvote(graphene.Mutation):
             raise GraphQLError('You must be logged to upvote posts!')
         else:
             post = Post.objects.get(post_id=post_id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
-            if (post.author.visibility == ProfileVisibilityEnums.PRIVATE) and not (UserFollows.objects.filter(user_profile=current_user_profile, following_user_profile=post.author).exists()) and not (current_user_profile==post.author):
+            if not info.context.viewer.can_view(post.author):
                 raise GraphQLError('You must be following post author to upvote private post!')
             else:
                 if modifier == ModifierEnumsType.ADD:
                     if not post.upvotes.filter(user=current_user_profile).exists():
                         post.upvotes.add(current_user_profile)
-                        post.author.points = post.author.points + 1
-                        post.author.save()
-                        post.save()
+                        points.award(post.author, 1, PointsReasonEnums.UPVOTE_RECEIVED, post.post_id)
                 if modifier == ModifierEnumsType.REMOVE:
                     if post.upvotes.filter(user=current_user_profile).exists():
                         post.upvotes.remove(current_user_profile)
-                        post.author.points = post.author.points - 1
-                        post.author.save()
-                        post.save()
+                        points.award(post.author, -1, PointsReasonEnums.UPVOTE_REMOVED, post.post_id)
                 
                 return PostUpvote(
                     post_upvotes = post.upvotes.count(),
@@ -206,13 +224,14 @@ class PostComment(graphene.Mutation):
             raise GraphQLError('You must be logged to comment on posts!')
         else:
             post = Post.objects.get(post_id=post_id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
-            if (post.author.visibility == ProfileVisibilityEnums.PRIVATE) and not (UserFollows.objects.filter(user_profile=current_user_profile, following_user_profile=post.author).exists()) and not (current_user_profile==post.author):
+            if not info.context.viewer.can_view(post.author):
                 raise GraphQLError('You must be following post author to comment on private post!')
             else:
                 comment = Comment(author=current_user_profile, post_id=post, comment_content=text)
                 comment.save()
+                publish_comment_added(comment)
                 
                 return PostComment(
                     success=True
@@ -232,13 +251,14 @@ class PostCommentReply(graphene.Mutation):
             raise GraphQLError('You must be logged to comment on posts!')
         else:
             post = Post.objects.get(post_id=post_id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
-            if (post.author.visibility == ProfileVisibilityEnums.PRIVATE) and not (UserFollows.objects.filter(user_profile=current_user_profile, following_user_profile=post.author).exists()) and not (current_user_profile==post.author):
+            if not info.context.viewer.can_view(post.author):
                 raise GraphQLError('You must be following post author to comment on private post!')
             else:
                 comment = Comment(author=current_user_profile, post_id=post, comment_content=text, reply_to_comment=Comment.objects.get(comment_id=reply_to_id))
                 comment.save()
+                publish_comment_added(comment)
                 
                 return PostCommentReply(
                     success=True
@@ -254,9 +274,9 @@ class PostIncrementViewCounter(graphene.Mutation):
     def mutate(self, info, post_id):
 
         post = Post.objects.get(post_id=post_id)
-        current_user_profile = Profile.objects.get(user=info.context.user)
+        current_user_profile = info.context.viewer.profile
             
-        if (post.author.visibility == ProfileVisibilityEnums.PRIVATE) and not (UserFollows.objects.filter(user_profile=current_user_profile, following_user_profile=post.author).exists()) and not (current_user_profile==post.author):
+        if not info.context.viewer.can_view(post.author):
             raise GraphQLError('You must be following post author to view private post!')
         else:
             post.views = post.views + 1
@@ -278,7 +298,7 @@ class DeletePost(graphene.Mutation):
             raise GraphQLError('You must be logged to delete on posts!')
         else:
             post = Post.objects.get(post_id=post_id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if (post.author != current_user_profile):
                 raise GraphQLError('You must be post author to delete on post!')
@@ -303,7 +323,7 @@ class EditPostCaption(graphene.Mutation):
             raise GraphQLError('You must be logged to edit posts!')
         else:
             post = Post.objects.get(post_id=post_id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if (post.author != current_user_profile):
                 raise GraphQLError('You must be post author to edit post!')
@@ -330,7 +350,7 @@ class EditPostTaggedUsers(graphene.Mutation):
             raise GraphQLError('You must be logged to edit posts!')
         else:
             post = Post.objects.get(post_id=post_id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if (post.author != current_user_profile):
                 raise GraphQLError('You must be post author to edit post!')
@@ -361,7 +381,7 @@ class EditPostVisibility(graphene.Mutation):
             raise GraphQLError('You must be logged to edit posts!')
         else:
             post = Post.objects.get(post_id=post_id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if (post.author != current_user_profile):
                 raise GraphQLError('You must be post author to edit post!')
@@ -390,23 +410,15 @@ class EditPostTags(graphene.Mutation):
             raise GraphQLError('You must be logged to edit posts!')
         else:
             post = Post.objects.get(post_id=post_id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if (post.author != current_user_profile):
                 raise GraphQLError('You must be post author to edit tags!')
             else:
                 if modifier == ModifierEnumsType.ADD:
-                    for tag in tags:
-                        if not Tag.objects.filter(name=tag).exists():
-                            t = Tag(name=tag)
-                            t.save()
-                        post.tags.add(Tag.objects.get(name=tag))
-                        post.save()
+                    post.tags.add(*tag_ids(tags, create=True))
                 if modifier == ModifierEnumsType.REMOVE:
-                    for tag in tags:
-                        if Tag.objects.filter(name=tag).exists():
-                            post.tags.remove(Tag.objects.get(name=tag))
-                            post.save()
+                    post.tags.remove(*tag_ids(tags))
                 return EditPostTags(
                     success=True
                 )
@@ -425,14 +437,15 @@ class EditPostChannel(graphene.Mutation):
             raise GraphQLError('You must be logged to edit posts!')
         else:
             post = Post.objects.get(post_id=post_id)
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if (post.author != current_user_profile):
                 raise GraphQLError('You must be post author to edit post!')
             else:
-                if not Channel.objects.filter(name=channel).exists():
+                try:
+                    post.channel_id = channel_names.id(channel)
+                except Channel.DoesNotExist:
                     raise GraphQLError('Channel does not exist. Provide existing Channel')
-                post.channel = Channel.objects.get(name=channel)
                 post.save()
                 
                 return EditPostChannel(
@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'socialpixel_backend.settings')
 
-application = get_asgi_application()
+# Set up Django before importing anything that touches the models.
+django_asgi_application = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+
+from socialpixel_backend.routing import websocket_urlpatterns
+from users.middleware import JSONWebTokenAuthMiddleware
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_application,
+    'websocket': JSONWebTokenAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
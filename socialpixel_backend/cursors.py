@@ -0,0 +1,56 @@
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from graphql import GraphQLError
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that keeps the microseconds of datetimes, which it
+    otherwise truncates to milliseconds, so rows created within the same
+    millisecond are not skipped by the range condition."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+def encode_cursor(*values):
+    """Opaque cursor for the sort key `values` of a row."""
+    return base64.urlsafe_b64encode(json.dumps(values, cls=CursorEncoder).encode()).decode()
+
+def row_cursor(row, ordering):
+    """Cursor pointing at `row` for a page ordered by `ordering`."""
+    return encode_cursor(*(getattr(row, field.lstrip('-')) for field in ordering))
+
+def decode_cursor(cursor, length):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise GraphQLError('Invalid cursor!')
+    if not isinstance(values, list) or len(values) != length:
+        raise GraphQLError('Invalid cursor!')
+    return values
+
+def keyset_page(queryset, ordering, after=None, first=50, limit=100):
+    """
+    Order `queryset` by `ordering` (non-null field names, '-' for
+    descending, ending with a unique field) and return at most `first` rows after the row
+    `after` points at.
+
+    Rows are located with a range condition on the sort key instead of an
+    OFFSET, so every page costs the same however deep the client pages.
+    """
+    queryset = queryset.order_by(*ordering)
+    if after:
+        values = decode_cursor(after, len(ordering))
+        condition = Q()
+        for position, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = '{}__{}'.format(name, 'lt' if field.startswith('-') else 'gt')
+            equal = {ordering[index].lstrip('-'): values[index] for index in range(position)}
+            condition |= Q(**equal, **{lookup: values[position]})
+        queryset = queryset.filter(condition)
+    return queryset[:max(min(first, limit), 0)]
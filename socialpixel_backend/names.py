@@ -0,0 +1,97 @@
+import hashlib
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_save
+
+NAME_CACHE_TIMEOUT = getattr(settings, 'NAME_CACHE_TIMEOUT', 300)
+
+
+class NameCache:
+    """
+    Cached lookup of primary keys by a natural key such as a channel name.
+
+    `fields` are the columns of the natural key. With one field keys are
+    plain values, with several they are tuples in the order of `fields`.
+    Only existing rows are cached, for `timeout` seconds; entries are
+    dropped when a row is saved or deleted, so a rename or delete is seen
+    by the next lookup. Rows renamed with QuerySet.update() must call
+    `invalidate` themselves.
+
+    Entries are only dropped once the transaction that changed the row
+    commits, and lookups inside a transaction are not cached, so rows
+    that are rolled back or not yet visible to other connections never
+    reach the cache.
+    """
+
+    def __init__(self, model, fields=('name',), timeout=NAME_CACHE_TIMEOUT):
+        self.model = model
+        self.fields = tuple(fields)
+        self.timeout = timeout
+        self.prefix = 'names:{}'.format(model._meta.label_lower)
+
+        # The key a row was loaded with, to drop it when the row is renamed.
+        self._loaded_key = '_{}_name_key'.format(model._meta.model_name)
+        post_init.connect(self._remember, sender=model, weak=False)
+        post_save.connect(self._forget, sender=model, weak=False)
+        post_delete.connect(self._forget, sender=model, weak=False)
+
+    def _cache_key(self, key):
+        return '{}:{}'.format(self.prefix, hashlib.sha256(repr(key).encode()).hexdigest())
+
+    def _instance_key(self, instance):
+        values = tuple(instance.__dict__.get(field) for field in self.fields)
+        return values[0] if len(values) == 1 else values
+
+    def _remember(self, sender, instance, **kwargs):
+        instance.__dict__[self._loaded_key] = self._instance_key(instance)
+
+    def _forget(self, sender, instance, **kwargs):
+        self.invalidate(instance.__dict__.get(self._loaded_key), self._instance_key(instance))
+        self._remember(sender, instance)
+
+    def _lookup(self, keys):
+        if len(self.fields) == 1:
+            return Q(**{self.fields[0] + '__in': keys})
+        return reduce(or_, (Q(**dict(zip(self.fields, key))) for key in keys))
+
+    def ids(self, keys):
+        """
+        Return a dict of key to primary key for the keys that exist, with one
+        cache round trip and at most one query for all of them.
+        """
+        keys = list(dict.fromkeys(keys))
+        cache_keys = {self._cache_key(key): key for key in keys}
+        found = {cache_keys[cache_key]: pk for cache_key, pk in cache.get_many(list(cache_keys)).items()}
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            loaded = {}
+            for row in self.model.objects.filter(self._lookup(missing)).order_by().values_list('pk', *self.fields):
+                key = row[1] if len(self.fields) == 1 else row[1:]
+                if key in loaded:
+                    raise self.model.MultipleObjectsReturned('get() returned more than one {} -- it returned 2 or more!'.format(self.model.__name__))
+                loaded[key] = row[0]
+            if not transaction.get_connection(router.db_for_read(self.model)).in_atomic_block:
+                cache.set_many({self._cache_key(key): pk for key, pk in loaded.items()}, self.timeout)
+            found.update(loaded)
+        return found
+
+    def id(self, key):
+        """Primary key of the row with natural key `key`, raising DoesNotExist like get()."""
+        ids = self.ids([key])
+        if key not in ids:
+            raise self.model.DoesNotExist('{} matching query does not exist.'.format(self.model._meta.object_name))
+        return ids[key]
+
+    def get(self, key):
+        return self.model.objects.get(pk=self.id(key))
+
+    def invalidate(self, *keys):
+        """Drop the entries of `keys` when the current transaction commits, or right away outside one."""
+        cache_keys = [self._cache_key(key) for key in keys if key is not None]
+        transaction.on_commit(lambda: cache.delete_many(cache_keys), using=router.db_for_write(self.model))
@@ -0,0 +1,34 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+def event(group, kind, data):
+    """The channel-layer message consumers receive through their `pubsub_event` handler."""
+    return {
+        'type': 'pubsub.event',
+        'group': group,
+        'kind': kind,
+        'data': data,
+    }
+
+def publish(group, kind, data):
+    """
+    Send a `kind` event carrying `data` to every consumer in the channel-layer
+    `group` once the current transaction commits, so subscribers never see
+    rows that are later rolled back.
+    """
+    def send():
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(group, event(group, kind, data))
+
+    transaction.on_commit(send)
+
+async def publish_ephemeral(channel_layer, group, kind, data):
+    """
+    Send an event that has no database state behind it, such as presence or
+    typing, straight away from async code.
+    """
+    await channel_layer.group_send(group, event(group, kind, data))
@@ -0,0 +1,8 @@
+from django.urls import re_path
+
+from chat.routing import websocket_urlpatterns as chat_websocket_urlpatterns
+from .subscriptions import GraphQLSubscriptionConsumer
+
+websocket_urlpatterns = chat_websocket_urlpatterns + [
+    re_path(r'^graphql/?$', GraphQLSubscriptionConsumer.as_asgi()),
+]
@@ -1,9 +1,9 @@
 import graphene
 
-from posts.schema import PostsQuery, PostsMutation
+from posts.schema import PostsQuery, PostsMutation, PostsSubscriptions
 from users.schema import UsersQuery, AuthMutation
-from chat.schema import ChatQuery, ChatMutation
-from game.schema import ChannelMutation, ChannelQuery, GameMutation, GameQuery, ValidatePostQuery, ValidatePostMutation
+from chat.schema import ChatQuery, ChatMutation, ChatSubscriptions
+from game.schema import ChannelMutation, ChannelQuery, GameMutation, GameQuery, ValidatePostQuery, ValidatePostMutation, ValidatePostSubscriptions, LeaderboardSubscriptions
 from tags.schema import TagMutation, TagQuery
 
 from graphql_auth.schema import MeQuery
@@ -16,5 +16,9 @@ class Query(PostsQuery, UsersQuery, MeQuery, ChatQuery, ChannelQuery, GameQuery,
 class Mutation(AuthMutation, PostsMutation, ChatMutation, ChannelMutation, GameMutation, TagMutation, ValidatePostMutation, graphene.ObjectType):
     pass
 
+class Subscription(ChatSubscriptions, PostsSubscriptions, ValidatePostSubscriptions, LeaderboardSubscriptions, graphene.ObjectType):
+    # Served over WebSockets by socialpixel_backend.subscriptions
+    pass
+
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
\ No newline at end of file
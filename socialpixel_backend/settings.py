@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'game.apps.GameConfig',
     'tags.apps.TagsConfig',
+    'jobs.apps.JobsConfig',
     'webapp.apps.WebappConfig',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -56,6 +57,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'graphene_django',
+    'channels',
     'imagekit',
     'graphql_jwt.refresh_token.apps.RefreshTokenConfig',
     'graphql_auth',
@@ -118,6 +120,61 @@ db_from_env = dj_database_url.config(conn_max_age=600)
 DATABASES['default'].update(db_from_env)
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# Without REDIS_URL everything below stays in-process, which only works with a
+# single process; the run_jobs worker refuses to start in that case.
+
+REDIS_URL = env('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Global points ranking, see users/ranking.py
+if REDIS_URL:
+    POINTS_RANKING_BACKEND = 'users.ranking.RedisRanking'
+else:
+    POINTS_RANKING_BACKEND = 'users.ranking.InMemoryRanking'
+
+# Chat presence and typing indicators, see chat/presence.py
+if REDIS_URL:
+    CHAT_PRESENCE_BACKEND = 'chat.presence.RedisPresence'
+else:
+    CHAT_PRESENCE_BACKEND = 'chat.presence.InMemoryPresence'
+
+# Real-time delivery over WebSockets, see socialpixel_backend/pubsub.py
+ASGI_APPLICATION = 'socialpixel_backend.asgi.application'
+
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [REDIS_URL],
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -139,7 +196,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 # Authentication Backends
 AUTHENTICATION_BACKENDS = [
-    'graphql_auth.backends.GraphQLAuthBackend',
+    'users.backends.CachedGraphQLAuthBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
 
@@ -174,6 +231,7 @@ GRAPHENE = {
     "SCHEMA": "socialpixel_backend.schema.schema",
     'MIDDLEWARE': [
         'graphql_jwt.middleware.JSONWebTokenMiddleware',
+        'users.middleware.ViewerMiddleware',
     ],
 }
 
@@ -195,6 +253,9 @@ GRAPHQL_JWT = {
         "graphql_auth.mutations.VerifySecondaryEmail",
     ],
 }
+
+# Seconds a verified JWT keeps mapping to a cached user snapshot
+JWT_USER_CACHE_TIMEOUT = 60
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 # EMAIL_HOST_USER = env('EMAIL_HOST_USER')
 # EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
@@ -0,0 +1,131 @@
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import JsonWebsocketConsumer
+from django.contrib.auth.models import AnonymousUser
+from rx import Observable
+from rx.subjects import Subject
+
+from users.backends import authenticate_token
+from users.middleware import Viewer
+
+GRAPHQL_WS_PROTOCOL = 'graphql-ws'
+
+
+class SubscriptionContext:
+    """
+    GraphQL context for one subscription operation.
+
+    Stands in for the HTTP request: it carries the user and viewer the
+    resolvers expect, and lets subscription resolvers join channel-layer
+    groups through `subscribe`.
+    """
+
+    def __init__(self, scope, user, stream):
+        self.scope = scope
+        self.user = user
+        self.viewer = Viewer(self)
+        self.stream = stream
+        self.groups = set()
+
+    def subscribe(self, group, kind):
+        """Observable of the `data` of every `kind` event published to `group`."""
+        self.groups.add(group)
+        events = self.stream.filter(lambda event: event['group'] == group and event['kind'] == kind)
+        return events.map(lambda event: event['data'])
+
+    def build_absolute_uri(self, location):
+        if '://' in location:
+            return location
+        headers = dict(self.scope.get('headers', []))
+        scheme = 'https' if self.scope.get('scheme') == 'wss' else 'http'
+        return '{}://{}{}'.format(scheme, headers.get(b'host', b'').decode(), location)
+
+
+class GraphQLSubscriptionConsumer(JsonWebsocketConsumer):
+    """
+    Serves GraphQL subscriptions over the graphql-ws protocol
+    (subscriptions-transport-ws) on top of the HTTP schema.
+
+    Each started operation gets its own event stream; published events are
+    pushed into the streams of the operations that joined their group and
+    every result is sent back as a `data` message.
+    """
+
+    def connect(self):
+        self.user = self.scope.get('user') or AnonymousUser()
+        self.operations = {}
+        subprotocol = GRAPHQL_WS_PROTOCOL if GRAPHQL_WS_PROTOCOL in self.scope.get('subprotocols', []) else None
+        self.accept(subprotocol)
+
+    def disconnect(self, code):
+        for operation_id in list(getattr(self, 'operations', {})):
+            self.stop_operation(operation_id)
+
+    def receive_json(self, content, **kwargs):
+        message_type = content.get('type')
+        operation_id = content.get('id')
+        payload = content.get('payload') or {}
+
+        if message_type == 'connection_init':
+            token = payload.get('token') or payload.get('authToken') or payload.get('Authorization')
+            if token:
+                user = authenticate_token(token.split()[-1])
+                if user is None:
+                    self.send_json({'type': 'connection_error', 'payload': {'message': 'Invalid token'}})
+                    self.close()
+                    return
+                self.user = user
+            self.send_json({'type': 'connection_ack'})
+        elif message_type == 'start':
+            self.start_operation(operation_id, payload)
+        elif message_type == 'stop':
+            self.stop_operation(operation_id)
+            self.send_json({'type': 'complete', 'id': operation_id})
+        elif message_type == 'connection_terminate':
+            self.close()
+
+    def start_operation(self, operation_id, payload):
+        from .schema import schema
+
+        self.stop_operation(operation_id)
+        stream = Subject()
+        context = SubscriptionContext(self.scope, self.user, stream)
+        result = schema.execute(
+            payload.get('query'),
+            root=stream,
+            context=context,
+            variables=payload.get('variables'),
+            operation_name=payload.get('operationName'),
+            allow_subscriptions=True,
+        )
+
+        if not isinstance(result, Observable):
+            # Queries, mutations and rejected subscriptions answer once.
+            self.send_result(operation_id, result)
+            self.send_json({'type': 'complete', 'id': operation_id})
+            return
+
+        for group in context.groups:
+            async_to_sync(self.channel_layer.group_add)(group, self.channel_name)
+        subscription = result.subscribe(lambda result: self.send_result(operation_id, result))
+        self.operations[operation_id] = (stream, context.groups, subscription)
+
+    def stop_operation(self, operation_id):
+        operation = self.operations.pop(operation_id, None)
+        if operation is None:
+            return
+        stream, groups, subscription = operation
+        subscription.dispose()
+        in_use = set().union(*(groups for _, groups, _ in self.operations.values()))
+        for group in groups - in_use:
+            async_to_sync(self.channel_layer.group_discard)(group, self.channel_name)
+
+    def send_result(self, operation_id, result):
+        payload = {'data': result.data}
+        if result.errors:
+            payload['errors'] = [{'message': str(error)} for error in result.errors]
+        self.send_json({'type': 'data', 'id': operation_id, 'payload': payload})
+
+    def pubsub_event(self, event):
+        for stream, groups, _ in list(self.operations.values()):
+            if event['group'] in groups:
+                stream.on_next(event)
@@ -0,0 +1,19 @@
+from django.test import RequestFactory
+
+from socialpixel_backend.schema import schema
+from users.middleware import ViewerMiddleware
+
+
+class GraphQLTestMixin:
+    """Runs GraphQL operations as a given user, with the middleware the GraphQL view uses."""
+
+    def execute(self, user, query, **variables):
+        request = RequestFactory().post('/graphql')
+        request.user = user
+        return schema.execute(query, context=request, variables=variables, middleware=[ViewerMiddleware()])
+
+    def query(self, user, query, **variables):
+        """Run `query` and return its data, failing the test on errors."""
+        result = self.execute(user, query, **variables)
+        self.assertIsNone(result.errors)
+        return result.data
@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class TombstoneManager(models.Manager):
+    """
+    Default manager that hides tombstoned rows while the purge commands
+    delete them and their dependents in the background.
+
+    `tombstones` are lookups to `deleted_on` fields, which may follow a
+    relation, e.g. 'author__deleted_on' hides posts of deleted accounts.
+    A row is hidden when any of them is set. Related managers are built
+    from this class without arguments, so they fall back to the lookups of
+    the model's default manager.
+    """
+
+    def __init__(self, *tombstones):
+        super().__init__()
+        self.tombstones = tombstones
+
+    def get_queryset(self):
+        tombstones = self.tombstones or getattr(self.model._default_manager, 'tombstones', None) or ('deleted_on',)
+        return super().get_queryset().filter(**{'{}__isnull'.format(tombstone): True for tombstone in tombstones})
+
+
+def delete_in_batches(queryset, batch_size):
+    """
+    Delete the rows of `queryset` `batch_size` primary keys at a time so each
+    DELETE, its cascades and its file cleanup stay bounded.
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        model._base_manager.filter(pk__in=pks).delete()
+        deleted += len(pks)
@@ -2,3 +2,6 @@ from django.apps import AppConfig
 
 class TagsConfig(AppConfig):
     name = 'tags'
+
+    def ready(self):
+        import tags.names
@@ -0,0 +1,17 @@
+from socialpixel_backend.names import NameCache
+from .models import Tag
+
+tag_names = NameCache(Tag)
+
+
+def tag_ids(names, create=False):
+    """
+    Ids of the tags named `names`, in the same order, skipping unknown
+    names or creating them in one INSERT when `create` is set.
+    """
+    ids = tag_names.ids(names)
+    missing = [name for name in dict.fromkeys(names) if name not in ids]
+    if missing and create:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(tag_names.ids(missing))
+    return [ids[name] for name in dict.fromkeys(names) if name in ids]
@@ -2,7 +2,6 @@ import graphene
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
 from .models import Tag
-from users.models import Profile
 
 class TagType(DjangoObjectType):
     class Meta:
@@ -40,7 +39,7 @@ class CreateTag(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to create tags!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             if Tag.objects.filter(name=name).exists():
                 raise GraphQLError('Tag with same name exists. Please try another name!')
             tag = Tag(name=name, description=description)
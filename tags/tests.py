@@ -1,3 +1,42 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
 
-# Create your tests here.
+from tags.models import Tag
+from tags.names import tag_ids, tag_names
+
+
+class TagNameTests(TransactionTestCase):
+    # Lookups are only cached outside transactions, which TestCase wraps every test in.
+    def setUp(self):
+        # Flushing the tables between tests sends no signals.
+        cache.clear()
+        self.art = Tag.objects.create(name='art')
+
+    def test_tag_ids_are_resolved_in_one_query_and_cached(self):
+        # Lookup, insert of the missing tag in its own transaction and lookup of its id.
+        with self.assertNumQueries(4):
+            ids = tag_ids(['new', 'art', 'new'], create=True)
+        self.assertEqual(ids, [Tag.objects.get(name='new').id, self.art.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(tag_ids(['art', 'new']), ids[::-1])
+        # Unknown names are not cached, so tags created later are found.
+        with self.assertNumQueries(1):
+            self.assertEqual(tag_ids(['art', 'missing']), [self.art.id])
+
+    def test_rolled_back_tags_are_not_cached(self):
+        with transaction.atomic():
+            tag_ids(['new'], create=True)
+            transaction.set_rollback(True)
+        self.assertEqual(tag_ids(['new']), [])
+
+    def test_renamed_and_deleted_tags_are_forgotten(self):
+        tag_names.id('art')
+        tag = Tag.objects.get(name='art')
+        tag.name = 'painting'
+        tag.save()
+        self.assertEqual(tag_ids(['art', 'painting']), [self.art.id])
+
+        tag.delete()
+        with self.assertRaises(Tag.DoesNotExist):
+            tag_names.id('painting')
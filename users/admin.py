@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Profile, UserFollows
+from .models import User, Profile, UserFollows, PointsLedgerEntry
 from django.utils.translation import gettext_lazy as _
 
 class UserAdminConfig(UserAdmin):
@@ -15,6 +15,19 @@ class UserAdminConfig(UserAdmin):
     ]
 
 
+class ProfileAdmin(admin.ModelAdmin):
+    # Points only change through the ledger, see users.points.award_many.
+    readonly_fields = ['points']
+
+    def save_model(self, request, obj, form, change):
+        # Write only the edited columns so concurrent point awards are not overwritten.
+        if change:
+            obj.save(update_fields=form.changed_data)
+        else:
+            obj.save()
+
+
 admin.site.register(User, UserAdminConfig)
-admin.site.register(Profile)
+admin.site.register(Profile, ProfileAdmin)
 admin.site.register(UserFollows)
+admin.site.register(PointsLedgerEntry)
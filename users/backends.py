@@ -0,0 +1,89 @@
+import hashlib
+from calendar import timegm
+from datetime import datetime
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from graphql_auth.backends import GraphQLAuthBackend
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.utils import get_credentials, get_payload, get_user_by_payload
+
+JWT_USER_CACHE_TIMEOUT = getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 60)
+
+
+def _token_cache_key(token):
+    signature = token.rsplit('.', 1)[-1]
+    return 'jwt-user:{}'.format(hashlib.sha256(signature.encode()).hexdigest())
+
+def _generation_cache_key(user_pk):
+    return 'jwt-user-generation:{}'.format(user_pk)
+
+def get_cached_user(token):
+    """
+    Return the user snapshot cached for an already verified token, or None.
+
+    Snapshots are tagged with the user's cache generation; once the generation
+    is dropped by `invalidate_cached_user` every snapshot of that user misses.
+    """
+    entry = cache.get(_token_cache_key(token))
+    if entry is None:
+        return None
+    user, generation = entry
+    if cache.get(_generation_cache_key(user.pk)) != generation:
+        return None
+    return user
+
+def cache_user(token, user, payload):
+    timeout = JWT_USER_CACHE_TIMEOUT
+    if 'exp' in payload:
+        timeout = min(timeout, payload['exp'] - timegm(datetime.utcnow().utctimetuple()))
+    if timeout <= 0:
+        return
+
+    generation_key = _generation_cache_key(user.pk)
+    cache.add(generation_key, uuid4().hex, None)
+    generation = cache.get(generation_key)
+    if generation is not None:
+        cache.set(_token_cache_key(token), (user, generation), timeout)
+
+def invalidate_cached_user(user_pk):
+    cache.delete(_generation_cache_key(user_pk))
+
+def authenticate_token(token, context=None):
+    """Return the active user for a JWT, from the cache when possible, or None."""
+    user = get_cached_user(token)
+    if user is not None:
+        return user
+
+    try:
+        payload = get_payload(token, context)
+        user = get_user_by_payload(payload)
+    except JSONWebTokenError:
+        return None
+
+    if user is not None:
+        cache_user(token, user, payload)
+    return user
+
+
+class CachedGraphQLAuthBackend(GraphQLAuthBackend):
+    """
+    GraphQLAuthBackend that skips token decoding and the user lookup for
+    tokens it has verified in the last `JWT_USER_CACHE_TIMEOUT` seconds.
+
+    Cached users are invalidated whenever the user row is saved or deleted
+    (which covers `is_active` and password changes) and when one of the
+    user's refresh tokens is revoked.
+    """
+
+    def authenticate(self, request=None, **kwargs):
+        if request is None or getattr(request, "_jwt_token_auth", False):
+            return None
+
+        token = get_credentials(request, **kwargs)
+
+        if token is None:
+            return None
+
+        return authenticate_token(token, request)
@@ -2,4 +2,13 @@ from django.db import models
 
 class ProfileVisibilityEnums(models.IntegerChoices):
         PUBLIC = 0
-        PRIVATE = 1
\ No newline at end of file
+        PRIVATE = 1
+
+class PointsReasonEnums(models.IntegerChoices):
+        OPENING_BALANCE = 0
+        UPVOTE_RECEIVED = 1
+        UPVOTE_REMOVED = 2
+        POST_VALIDATED = 3
+        VALIDATION_ACCEPTED = 4
+        VALIDATION_REJECTED = 5
+        LEADERBOARD_PLACEMENT = 6
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from users.models import Profile
+from users.purge import purge_profile
+
+
+class Command(BaseCommand):
+    help = 'Delete tombstoned accounts and everything that depends on them in bounded batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        profiles = Profile.all_objects.filter(deleted_on__isnull=False).select_related('user').order_by('deleted_on')
+        for profile in profiles.iterator():
+            purge_profile(profile, options['batch_size'])
+            self.stdout.write(f'Purged account {profile.pk}')
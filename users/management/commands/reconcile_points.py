@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from users.models import Profile, PointsLedgerEntry
+from users.ranking import get_ranking
+
+
+class Command(BaseCommand):
+    help = 'Audit Profile.points against the points ledger and optionally rebuild the totals from it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Rewrite every mismatching Profile.points from the ledger.',
+        )
+
+    def handle(self, *args, **options):
+        ledger_totals = dict(
+            PointsLedgerEntry.objects.values('profile')
+            .annotate(total=Sum('delta'))
+            .values_list('profile', 'total')
+        )
+
+        mismatches = []
+        for profile_id, points in Profile.all_objects.values_list('pk', 'points').iterator():
+            expected = ledger_totals.get(profile_id, 0)
+            if points != expected:
+                mismatches.append(profile_id)
+                self.stdout.write(f'Profile {profile_id}: points={points} ledger={expected}')
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('All profile points match the ledger.'))
+            return
+
+        if not options['fix']:
+            self.stdout.write(self.style.WARNING(f'{len(mismatches)} profile(s) do not match the ledger.'))
+            return
+
+        for profile_id in mismatches:
+            with transaction.atomic():
+                # Lock the profile first so awards in flight either land before
+                # the ledger is summed or apply their increment after the rewrite.
+                list(Profile.all_objects.select_for_update().filter(pk=profile_id).values_list('pk'))
+                total = PointsLedgerEntry.objects.filter(profile_id=profile_id).aggregate(total=Sum('delta'))['total'] or 0
+                Profile.all_objects.filter(pk=profile_id).update(points=total)
+
+        get_ranking().rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt points for {len(mismatches)} profile(s) from the ledger.'))
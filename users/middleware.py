@@ -0,0 +1,117 @@
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.utils.functional import cached_property
+from graphql_jwt.settings import jwt_settings
+
+from .backends import authenticate_token
+from .models import Profile, UserFollows
+from .enums import ProfileVisibilityEnums
+
+
+class Viewer:
+    """
+    Request scoped state for the user running a GraphQL operation.
+
+    Everything is loaded lazily on first access and memoized for the rest of
+    the request, so every resolver touched by one query shares a single
+    profile lookup instead of repeating it per root field.
+    """
+
+    def __init__(self, context):
+        self.context = context
+
+    @property
+    def user(self):
+        return self.context.user
+
+    @cached_property
+    def profile(self):
+        return Profile.objects.select_related('user').get(user=self.user)
+
+    @cached_property
+    def following(self):
+        """Primary keys of the profiles followed by the viewer."""
+        return set(
+            UserFollows.objects.filter(user_profile=self.profile)
+            .values_list('following_user_profile', flat=True)
+        )
+
+    @cached_property
+    def channels(self):
+        """Ids of the channels the viewer is subscribed to."""
+        return set(self.profile.subscribed.values_list('id', flat=True))
+
+    @cached_property
+    def games(self):
+        """Ids of the games the viewer is subscribed to."""
+        return set(self.profile.subscribed_to_game.values_list('id', flat=True))
+
+    @cached_property
+    def chatrooms(self):
+        """Ids of the chatrooms the viewer is a member of."""
+        return set(self.profile.member_in.values_list('id', flat=True))
+
+    def can_view(self, profile):
+        """Whether content authored by `profile` is visible to the viewer."""
+        return (
+            profile.visibility != ProfileVisibilityEnums.PRIVATE
+            or profile.pk == self.profile.pk
+            or profile.pk in self.following
+        )
+
+    def refresh(self, *names):
+        """Drop memoized values so they are reloaded after a mutation changes them."""
+        for name in names:
+            self.__dict__.pop(name, None)
+
+
+class ViewerMiddleware:
+    """
+    Attaches a `Viewer` to the GraphQL context as `info.context.viewer`.
+
+    The viewer reads `context.user` lazily, so it always sees the user set by
+    `JSONWebTokenMiddleware` whatever the middleware order.
+    """
+
+    def resolve(self, next, root, info, **kwargs):
+        if not hasattr(info.context, 'viewer'):
+            info.context.viewer = Viewer(info.context)
+        return next(root, info, **kwargs)
+
+
+def _websocket_token(scope):
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get('token'):
+        return query['token'][0]
+
+    headers = dict(scope.get('headers', []))
+    prefix = jwt_settings.JWT_AUTH_HEADER_PREFIX.lower()
+    authorization = headers.get(b'authorization', b'').decode().split()
+    if len(authorization) == 2 and authorization[0].lower() == prefix:
+        return authorization[1]
+
+    cookie = SimpleCookie(headers.get(b'cookie', b'').decode())
+    if jwt_settings.JWT_COOKIE_NAME in cookie:
+        return cookie[jwt_settings.JWT_COOKIE_NAME].value
+    return None
+
+
+class JSONWebTokenAuthMiddleware(BaseMiddleware):
+    """
+    ASGI middleware that sets `scope['user']` for WebSocket connections from
+    the same JWT the GraphQL endpoint accepts, read from the `token` query
+    parameter, the Authorization header or the JWT cookie.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        token = _websocket_token(scope)
+        user = None
+        if token is not None:
+            user = await database_sync_to_async(authenticate_token)(token)
+        scope['user'] = user or AnonymousUser()
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,41 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def seed_opening_balances(apps, schema_editor):
+    # Points awarded before the ledger existed become one opening entry per
+    # profile so the ledger sums to the current totals.
+    Profile = apps.get_model('users', 'Profile')
+    PointsLedgerEntry = apps.get_model('users', 'PointsLedgerEntry')
+    PointsLedgerEntry.objects.bulk_create(
+        PointsLedgerEntry(profile_id=profile_id, delta=points, reason=0)
+        for profile_id, points in Profile.objects.exclude(points=0).values_list('pk', 'points').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('delta', models.IntegerField()),
+                ('reason', models.IntegerField(choices=[(0, 'Opening Balance'), (1, 'Upvote Received'), (2, 'Upvote Removed'), (3, 'Post Validated'), (4, 'Validation Accepted'), (5, 'Validation Rejected'), (6, 'Leaderboard Placement')])),
+                ('source_id', models.BigIntegerField(blank=True, help_text='Id of the post, validation or leaderboard row behind the change', null=True)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points_ledger', to='users.profile')),
+            ],
+            options={
+                'verbose_name': 'Points Ledger Entry',
+                'verbose_name_plural': 'Points Ledger Entries',
+            },
+        ),
+        migrations.RunPython(seed_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.7 on 2026-10-19 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_pointsledgerentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='deleted_on',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Set when the account is deleted and waiting to be purged', null=True),
+        ),
+    ]
@@ -10,7 +10,9 @@ from django.contrib.auth.validators import UnicodeUsernameValidator
 from imagekit.models import ProcessedImageField
 from imagekit.processors import SmartResize
 
-from .enums import ProfileVisibilityEnums
+from socialpixel_backend.tombstones import TombstoneManager
+
+from .enums import ProfileVisibilityEnums, PointsReasonEnums
 
 class CustomUserManager(BaseUserManager):
     use_in_migrations = True
@@ -158,6 +160,11 @@ class Profile(models.Model):
         options={'quality': 85},
     )
 
+    deleted_on = models.DateTimeField(null=True, blank=True, db_index=True, help_text="Set when the account is deleted and waiting to be purged")
+
+    objects = TombstoneManager()
+    all_objects = models.Manager()
+
     @classmethod
     def add_following(cls, user, following):
         user = cls.objects.get(user=user)
@@ -194,3 +201,21 @@ class UserFollows(models.Model):
         verbose_name_plural = 'User Follows'
         unique_together = ['user_profile', 'following_user_profile']
 
+class PointsLedgerEntry(models.Model):
+    """
+    Append-only record of every change to a profile's points.
+    Profile.points is a running total of these rows.
+    """
+    id = models.BigAutoField(primary_key=True)
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="points_ledger")
+    delta = models.IntegerField()
+    reason = models.IntegerField(choices=PointsReasonEnums.choices)
+    source_id = models.BigIntegerField(null=True, blank=True, help_text="Id of the post, validation or leaderboard row behind the change")
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{str(self.profile.user)}:{self.delta:+d}'
+
+    class Meta:
+        verbose_name = 'Points Ledger Entry'
+        verbose_name_plural = 'Points Ledger Entries'
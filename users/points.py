@@ -0,0 +1,46 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Profile, PointsLedgerEntry
+from .ranking import get_ranking
+
+
+def award(profile, delta, reason, source_id=None):
+    """Record a single points change. See `award_many`."""
+    return award_many([(profile, delta, reason, source_id)])
+
+def award_many(awards):
+    """
+    Record points changes in the ledger and apply them to Profile.points.
+
+    `awards` is an iterable of (profile, delta, reason, source_id) tuples where
+    profile may be a Profile or its primary key. All ledger rows are written
+    with one INSERT and the totals with one UPDATE per distinct delta, using
+    F() increments so concurrent awards never overwrite each other.
+
+    Returns a dict of profile primary key to the net change applied.
+    """
+    entries = []
+    totals = defaultdict(int)
+    for profile, delta, reason, source_id in awards:
+        profile_id = getattr(profile, 'pk', profile)
+        entries.append(PointsLedgerEntry(profile_id=profile_id, delta=delta, reason=reason, source_id=source_id))
+        totals[profile_id] += delta
+
+    by_delta = defaultdict(list)
+    for profile_id, delta in totals.items():
+        if delta:
+            by_delta[delta].append(profile_id)
+
+    with transaction.atomic():
+        PointsLedgerEntry.objects.bulk_create(entries)
+        for delta, profile_ids in by_delta.items():
+            Profile.all_objects.filter(pk__in=profile_ids).update(points=F('points') + delta)
+
+        changed = {profile_id: delta for profile_id, delta in totals.items() if delta}
+        if changed:
+            transaction.on_commit(lambda: get_ranking().incr_many(changed))
+
+    return dict(totals)
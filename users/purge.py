@@ -0,0 +1,32 @@
+from django.db.models import Q
+
+from socialpixel_backend.tombstones import delete_in_batches
+from chat.models import ChatRoom, Message
+from chat.purge import purge_room
+from game.models import Channel, Game, LeaderboardRow
+from game.purge import purge_channel, purge_game
+from posts.models import Post, Comment
+from .models import UserFollows, PointsLedgerEntry
+
+
+def purge_profile(profile, batch_size=500):
+    """
+    Delete a tombstoned account in batches of `batch_size` rows, in the order
+    Django's cascade would have, finishing with the user row itself.
+    """
+    delete_in_batches(Post.all_objects.filter(author=profile), batch_size)
+    delete_in_batches(Comment.all_objects.filter(author=profile), batch_size)
+    delete_in_batches(Message.all_objects.filter(author=profile), batch_size)
+
+    for room in ChatRoom.all_objects.filter(created_by=profile):
+        for channel in Channel.all_objects.filter(chatroom=room):
+            purge_channel(channel, batch_size)
+        purge_room(room, batch_size)
+
+    for game in Game.all_objects.filter(creator=profile):
+        purge_game(game, batch_size)
+
+    delete_in_batches(LeaderboardRow.objects.filter(user=profile), batch_size)
+    delete_in_batches(UserFollows.objects.filter(Q(user_profile=profile) | Q(following_user_profile=profile)), batch_size)
+    delete_in_batches(PointsLedgerEntry.objects.filter(profile=profile), batch_size)
+    profile.user.delete()
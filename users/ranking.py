@@ -0,0 +1,157 @@
+import threading
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import Profile
+
+
+class InMemoryRanking:
+    """
+    In-process stand-in for a Redis sorted set of profile points.
+
+    Entries are kept sorted by (points, member) exactly like a ZSET, so
+    rank lookups are a binary search and ties break the same way Redis
+    breaks them. Only suitable for tests and single process deployments.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._scores = {}
+        self._entries = []
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.rebuild()
+
+    def rebuild(self):
+        with self._lock:
+            self._scores = {str(pk): points for pk, points in Profile.objects.values_list('pk', 'points').iterator()}
+            self._entries = sorted((points, member) for member, points in self._scores.items())
+            self._loaded = True
+
+    def _discard(self, member):
+        score = self._scores.pop(member, None)
+        if score is not None:
+            del self._entries[bisect_left(self._entries, (score, member))]
+        return score
+
+    def incr_many(self, deltas):
+        with self._lock:
+            self._ensure_loaded()
+            for profile_id, delta in deltas.items():
+                member = str(profile_id)
+                score = (self._discard(member) or 0) + delta
+                self._scores[member] = score
+                insort(self._entries, (score, member))
+
+    def remove(self, profile_id):
+        with self._lock:
+            self._ensure_loaded()
+            self._discard(str(profile_id))
+
+    def rank(self, profile_id):
+        """0-based position from the top, or None if the profile is not ranked."""
+        with self._lock:
+            self._ensure_loaded()
+            member = str(profile_id)
+            if member not in self._scores:
+                return None
+            return len(self._entries) - 1 - bisect_left(self._entries, (self._scores[member], member))
+
+    def range(self, start, stop):
+        """(rank, profile_id, points) for ranks start..stop inclusive, best first."""
+        with self._lock:
+            self._ensure_loaded()
+            count = len(self._entries)
+            stop = min(stop, count - 1)
+            return [
+                (rank, int(self._entries[count - 1 - rank][1]), self._entries[count - 1 - rank][0])
+                for rank in range(max(start, 0), stop + 1)
+            ]
+
+
+class RedisRanking:
+    """Profile points ranking backed by a Redis sorted set."""
+
+    key = 'points-ranking'
+
+    def __init__(self):
+        import redis
+        self.client = redis.Redis.from_url(settings.REDIS_URL)
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            if not self.client.exists(self.key):
+                self.rebuild()
+            self._loaded = True
+
+    def rebuild(self):
+        staging = '{}:rebuild'.format(self.key)
+        pipe = self.client.pipeline()
+        pipe.delete(staging)
+        batch = {}
+        ranked = 0
+        for pk, points in Profile.objects.values_list('pk', 'points').iterator():
+            batch[str(pk)] = points
+            ranked += 1
+            if len(batch) == 1000:
+                pipe.zadd(staging, batch)
+                batch = {}
+        if batch:
+            pipe.zadd(staging, batch)
+        if ranked:
+            pipe.rename(staging, self.key)
+        else:
+            pipe.delete(self.key)
+        pipe.execute()
+        self._loaded = True
+
+    def incr_many(self, deltas):
+        self._ensure_loaded()
+        pipe = self.client.pipeline()
+        for profile_id, delta in deltas.items():
+            pipe.zincrby(self.key, delta, str(profile_id))
+        pipe.execute()
+
+    def remove(self, profile_id):
+        self._ensure_loaded()
+        self.client.zrem(self.key, str(profile_id))
+
+    def rank(self, profile_id):
+        self._ensure_loaded()
+        return self.client.zrevrank(self.key, str(profile_id))
+
+    def range(self, start, stop):
+        start = max(start, 0)
+        # ZREVRANGE counts negative stops from the end of the set.
+        if stop < start:
+            return []
+        self._ensure_loaded()
+        rows = self.client.zrevrange(self.key, start, stop, withscores=True)
+        return [(start + offset, int(member), int(points)) for offset, (member, points) in enumerate(rows)]
+
+
+_ranking = None
+
+def get_ranking():
+    global _ranking
+    if _ranking is None:
+        _ranking = import_string(getattr(settings, 'POINTS_RANKING_BACKEND', 'users.ranking.InMemoryRanking'))()
+    return _ranking
+
+def top(n):
+    if n <= 0:
+        return []
+    return get_ranking().range(0, n - 1)
+
+def around(profile_id, k):
+    if k < 0:
+        raise ValueError('k must not be negative')
+    rank = get_ranking().rank(profile_id)
+    if rank is None:
+        return []
+    return get_ranking().range(rank - k, rank + k)
@@ -2,11 +2,17 @@ import graphene
 from graphene_django import DjangoObjectType
 from graphql_jwt.decorators import login_required
 from graphql_auth import mutations as gqlAuthMutations
+from graphql_auth.settings import graphql_auth_settings
+from graphql_auth.utils import revoke_user_refresh_token
 from graphql import GraphQLError
+from django.db import transaction
+from django.utils import timezone
 
 from .models import User, Profile, UserFollows
 from .enums import ProfileVisibilityEnums
+from . import ranking
 from posts.schema import ModifierEnumsType
+from chat.models import ChatRoom
 
 class UserType(DjangoObjectType):
     class Meta:
@@ -40,6 +46,19 @@ class UserFollowsType(DjangoObjectType):
         model = UserFollows
         fields = "__all__"
 
+class RankingEntryType(graphene.ObjectType):
+    rank = graphene.Int(description="Position by total points, starting at 1")
+    points = graphene.Int(description="Total points achieved by user")
+    profile = graphene.Field(ProfileType)
+
+def ranking_entries(rows):
+    profiles = Profile.objects.select_related('user').in_bulk([profile_id for _, profile_id, _ in rows])
+    return [
+        RankingEntryType(rank=rank + 1, points=points, profile=profiles[profile_id])
+        for rank, profile_id, points in rows
+        if profile_id in profiles
+    ]
+
 class ProfileVisibilityType(graphene.Enum):
     PUBLIC = ProfileVisibilityEnums.PUBLIC
     PRIVATE = ProfileVisibilityEnums.PRIVATE
@@ -55,10 +74,13 @@ class UsersQuery(graphene.AbstractType):
     userprofilefollowingbyusername = graphene.List(ProfileType, username=graphene.String(required=True))
     userprofilefollowersnumberbyusername = graphene.Int(username=graphene.String(required=True))
     userprofilefollowingnumberbyusername = graphene.Int(username=graphene.String(required=True))
+    points_rank = graphene.Field(RankingEntryType, username=graphene.String(required=True), description="Global points rank of given user")
+    points_top = graphene.List(RankingEntryType, first=graphene.Int(default_value=10), description="Top users by total points")
+    points_around = graphene.List(RankingEntryType, username=graphene.String(required=True), k=graphene.Int(default_value=5), description="Users ranked up to k places above and below given user")
 
     @login_required
     def resolve_users(self, info):
-        return User.objects.all()
+        return User.objects.filter(profile__deleted_on__isnull=True)
     
     @login_required
     def resolve_userprofile(self, info, username):
@@ -67,22 +89,22 @@ class UsersQuery(graphene.AbstractType):
 
     @login_required
     def resolve_userprofilefollowers(self, info):
-        current_user_profile = Profile.objects.get(user=info.context.user)
+        current_user_profile = info.context.viewer.profile
         return Profile.objects.filter(following__in=current_user_profile.followers.all())
 
     @login_required
     def resolve_userprofilefollowing(self, info):
-        current_user_profile = Profile.objects.get(user=info.context.user)
+        current_user_profile = info.context.viewer.profile
         return Profile.objects.filter(followers__in=current_user_profile.following.all())
 
     @login_required
     def resolve_userprofilefollowersnumber(self, info):
-        current_user_profile = Profile.objects.get(user=info.context.user)
+        current_user_profile = info.context.viewer.profile
         return Profile.objects.filter(following__in=current_user_profile.followers.all()).count()
 
     @login_required
     def resolve_userprofilefollowingnumber(self, info):
-        current_user_profile = Profile.objects.get(user=info.context.user)
+        current_user_profile = info.context.viewer.profile
         return Profile.objects.filter(followers__in=current_user_profile.following.all()).count()
 
     @login_required
@@ -105,6 +127,26 @@ class UsersQuery(graphene.AbstractType):
         user_profile = Profile.objects.get(user=User.objects.get(username=username))
         return Profile.objects.filter(followers__in=user_profile.following.all()).count()
 
+    @login_required
+    def resolve_points_rank(self, info, username):
+        user = User.objects.get(username=username)
+        rank = ranking.get_ranking().rank(user.pk)
+        if rank is None:
+            return None
+        entries = ranking_entries(ranking.get_ranking().range(rank, rank))
+        return entries[0] if entries else None
+
+    @login_required
+    def resolve_points_top(self, info, first):
+        return ranking_entries(ranking.top(min(first, 100)))
+
+    @login_required
+    def resolve_points_around(self, info, username, k):
+        if k < 0:
+            raise GraphQLError('k must not be negative!')
+        user = User.objects.get(username=username)
+        return ranking_entries(ranking.around(user.pk, min(k, 50)))
+
 class EditProfileFirstName(graphene.Mutation):
     class Arguments:
         name = graphene.String(required=True, description="Name")
@@ -116,11 +158,10 @@ class EditProfileFirstName(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to edit profile!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             current_user_profile.user.first_name = name
-            current_user_profile.user.save()
-            current_user_profile.save()
+            current_user_profile.user.save(update_fields=['first_name'])
                 
             return EditProfileFirstName(
                 success=True
@@ -137,11 +178,10 @@ class EditProfileLastName(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to edit profile!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             current_user_profile.user.last_name = name
-            current_user_profile.user.save()
-            current_user_profile.save()
+            current_user_profile.user.save(update_fields=['last_name'])
                 
             return EditProfileLastName(
                 success=True
@@ -158,10 +198,10 @@ class EditProfileBio(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to edit profile!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             current_user_profile.bio = text
-            current_user_profile.save()
+            current_user_profile.save(update_fields=['bio'])
                 
             return EditProfileBio(
                 success=True
@@ -178,10 +218,10 @@ class EditProfileImage(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to edit profile!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             current_user_profile.image=info.context.FILES[image]
-            current_user_profile.save()
+            current_user_profile.save(update_fields=['image'])
                 
             return EditProfileImage(
                 success=True
@@ -198,10 +238,10 @@ class EditProfileCoverImage(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to edit profile!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             current_user_profile.cover_image=info.context.FILES[image]
-            current_user_profile.save()
+            current_user_profile.save(update_fields=['cover_image'])
                 
             return EditProfileCoverImage(
                 success=True
@@ -219,14 +259,14 @@ class EditProfileVisibility(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to edit posts!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             
             if modifier == ProfileVisibilityEnums.PUBLIC:
                 current_user_profile.visibility = ProfileVisibilityEnums.PUBLIC
-                current_user_profile.save()
+                current_user_profile.save(update_fields=['visibility'])
             if modifier == ProfileVisibilityEnums.PRIVATE:
                 current_user_profile.visibility = ProfileVisibilityEnums.PRIVATE
-                current_user_profile.save()
+                current_user_profile.save(update_fields=['visibility'])
 
             return EditProfileVisibility(
                 success=True
@@ -244,22 +284,46 @@ class UserRelationship(graphene.Mutation):
         if not info.context.user.is_authenticated:
             raise GraphQLError('You must be logged to follow on unfollow users!')
         else:
-            current_user_profile = Profile.objects.get(user=info.context.user)
+            current_user_profile = info.context.viewer.profile
             user_profile_to_follow = Profile.objects.get(user=User.objects.get(username=username))
 
             if modifier == ModifierEnumsType.ADD:
-                if not UserFollows.objects.filter(user_profile=current_user_profile, following_user_profile=user_profile_to_follow).exists():
+                if user_profile_to_follow.pk not in info.context.viewer.following:
                     user_follow = UserFollows(user_profile=current_user_profile, following_user_profile=user_profile_to_follow)
                     user_follow.save()
             if modifier == ModifierEnumsType.REMOVE:
-                if UserFollows.objects.filter(user_profile=current_user_profile, following_user_profile=user_profile_to_follow).exists():
+                if user_profile_to_follow.pk in info.context.viewer.following:
                     user_follow = UserFollows.objects.get(user_profile=current_user_profile, following_user_profile=user_profile_to_follow)
                     user_follow.delete()
+            info.context.viewer.refresh('following')
 
             return UserRelationship(
                 success=True
             )
 
+class DeleteAccount(gqlAuthMutations.DeleteAccount):
+    __doc__ = gqlAuthMutations.DeleteAccount.__doc__
+
+    @classmethod
+    def resolve_action(cls, user, *args, **kwargs):
+        """
+        Tombstone the account instead of deleting it in the request. The
+        profile and its posts are hidden right away and the purge_accounts
+        command deletes everything in bounded batches.
+        """
+        if not graphql_auth_settings.ALLOW_DELETE_ACCOUNT:
+            return super().resolve_action(user, *args, **kwargs)
+
+        with transaction.atomic():
+            user.is_active = False
+            user.save(update_fields=["is_active"])
+            Profile.all_objects.filter(user=user).update(deleted_on=timezone.now())
+            # Their messages are hidden now, so chat list previews fall back to the latest visible one.
+            for room in ChatRoom.all_objects.filter(last_message_author_id=user.pk):
+                room.refresh_last_message()
+            revoke_user_refresh_token(user=user)
+            transaction.on_commit(lambda: ranking.get_ranking().remove(user.pk))
+
 class AuthMutation(graphene.ObjectType):
     register = gqlAuthMutations.Register.Field()
     verify_account = gqlAuthMutations.VerifyAccount.Field()
@@ -270,7 +334,7 @@ class AuthMutation(graphene.ObjectType):
     password_change = gqlAuthMutations.PasswordChange.Field()
     update_account = gqlAuthMutations.UpdateAccount.Field()
     archive_account = gqlAuthMutations.ArchiveAccount.Field()
-    delete_account = gqlAuthMutations.DeleteAccount.Field()
+    delete_account = DeleteAccount.Field()
     send_secondary_email_activation =  gqlAuthMutations.SendSecondaryEmailActivation.Field()
     verify_secondary_email = gqlAuthMutations.VerifySecondaryEmail.Field()
     swap_emails = gqlAuthMutations.SwapEmails.Field()
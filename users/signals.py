@@ -1,6 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from .models import User, Profile
+from .backends import invalidate_cached_user
+from .ranking import get_ranking
+from django.db import transaction
 from django.dispatch import receiver
+from graphql_jwt.refresh_token.signals import refresh_token_revoked
 
 
 @receiver(post_save, sender=User)
@@ -9,6 +13,19 @@ def create_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
     
 @receiver(post_save, sender=User)
-def save_profile(sender, instance, **kwargs):
-    instance.profile.save()
-    
\ No newline at end of file
+@receiver(post_delete, sender=User)
+def invalidate_jwt_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+@receiver(refresh_token_revoked)
+def invalidate_jwt_user_cache_on_revoke(sender, refresh_token, **kwargs):
+    invalidate_cached_user(refresh_token.user_id)
+
+@receiver(post_save, sender=Profile)
+def add_profile_to_ranking(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: get_ranking().incr_many({instance.pk: instance.points}))
+
+@receiver(post_delete, sender=Profile)
+def remove_profile_from_ranking(sender, instance, **kwargs):
+    transaction.on_commit(lambda: get_ranking().remove(instance.pk))
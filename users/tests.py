@@ -1,6 +1,19 @@
-from users.models import Profile
+from io import StringIO
+from chat.models import ChatRoom, Message
+from posts.models import Comment, Post
+from users.models import Profile, PointsLedgerEntry
+from users.enums import PointsReasonEnums
+from users import points
+from socialpixel_backend.testing import GraphQLTestMixin
+from users.middleware import ViewerMiddleware
+from users.backends import CachedGraphQLAuthBackend
+from users import ranking
+from users.ranking import InMemoryRanking
+from graphql_jwt.shortcuts import get_token
 from django.core import mail
-from django.test import TestCase
+from django.core.management import call_command
+from django.utils import timezone
+from django.test import TestCase, RequestFactory
 from django.contrib.auth import get_user_model
 
 class CustomUserTest(TestCase):
@@ -78,4 +91,145 @@ class ProfileTests(TestCase):
             'username', 'username@example.com', 'password123'
         )
         profile = Profile(user=user, bio='Test Bio')
-        self.assertEqual(str(profile), 'username')
\ No newline at end of file
+        self.assertEqual(str(profile), 'username')
+
+class ViewerTests(GraphQLTestMixin, TestCase):
+    def test_profile_loaded_once_per_request(self):
+        db = get_user_model()
+        user = db.objects.create_user(
+            'username', 'username@example.com', 'password123'
+        )
+
+        with self.assertNumQueries(3):
+            data = self.query(user, '{ userprofilefollowersnumber userprofilefollowingnumber }')
+        self.assertEqual(data['userprofilefollowersnumber'], 0)
+
+class CachedJWTBackendTests(TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.user = db.objects.create_user(
+            'username', 'username@example.com', 'password123'
+        )
+        self.request = RequestFactory().post(
+            '/graphql', HTTP_AUTHORIZATION='JWT ' + get_token(self.user)
+        )
+        self.backend = CachedGraphQLAuthBackend()
+
+    def test_verified_token_is_served_from_cache(self):
+        self.assertEqual(self.backend.authenticate(self.request), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.authenticate(self.request), self.user)
+
+    def test_user_change_invalidates_cache(self):
+        self.backend.authenticate(self.request)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.authenticate(self.request))
+
+class PointsLedgerTests(TestCase):
+    def setUp(self):
+        db = get_user_model()
+        self.user = db.objects.create_user(
+            'username', 'username@example.com', 'password123'
+        )
+
+    def test_award_updates_points_and_ledger(self):
+        points.award_many([
+            (self.user.profile, 100, PointsReasonEnums.POST_VALIDATED, 1),
+            (self.user.pk, -1, PointsReasonEnums.UPVOTE_REMOVED, 2),
+        ])
+        self.assertEqual(Profile.objects.get(pk=self.user.pk).points, 99)
+        self.assertEqual(PointsLedgerEntry.objects.filter(profile=self.user.pk).count(), 2)
+
+    def test_reconcile_rebuilds_totals(self):
+        points.award(self.user.pk, 50, PointsReasonEnums.VALIDATION_ACCEPTED)
+        Profile.objects.filter(pk=self.user.pk).update(points=7)
+        call_command('reconcile_points', fix=True, stdout=StringIO())
+        self.assertEqual(Profile.objects.get(pk=self.user.pk).points, 50)
+
+    def test_tombstoned_profiles_keep_their_points(self):
+        Profile.objects.filter(pk=self.user.pk).update(deleted_on=timezone.now())
+        points.award(self.user.pk, 50, PointsReasonEnums.VALIDATION_ACCEPTED)
+        self.assertEqual(Profile.all_objects.get(pk=self.user.pk).points, 50)
+
+        Profile.all_objects.filter(pk=self.user.pk).update(points=7)
+        call_command('reconcile_points', fix=True, stdout=StringIO())
+        self.assertEqual(Profile.all_objects.get(pk=self.user.pk).points, 50)
+
+    def test_profile_edits_keep_concurrent_awards(self):
+        from socialpixel_backend.schema import schema
+        from users.middleware import Viewer
+
+        request = RequestFactory().post('/graphql')
+        request.user = self.user
+        request.viewer = Viewer(request)
+        request.viewer.profile
+        points.award(self.user.pk, 50, PointsReasonEnums.VALIDATION_ACCEPTED)
+
+        result = schema.execute(
+            'mutation { updateBio(text: "bio") { success } updateFirstname(name: "first") { success } }',
+            context_value=request,
+            middleware=[ViewerMiddleware()],
+        )
+        self.assertIsNone(result.errors)
+        profile = Profile.objects.get(pk=self.user.pk)
+        self.assertEqual((profile.bio, profile.user.first_name, profile.points), ('bio', 'first', 50))
+
+class RankingTests(TestCase):
+    def test_rank_top_and_around(self):
+        db = get_user_model()
+        users = [
+            db.objects.create_user(f'user{i}', f'user{i}@example.com', 'password123')
+            for i in range(4)
+        ]
+        for i, user in enumerate(users):
+            Profile.objects.filter(pk=user.pk).update(points=i * 10)
+
+        ranking = InMemoryRanking()
+        self.assertEqual(ranking.rank(users[3].pk), 0)
+        self.assertEqual(ranking.rank(users[0].pk), 3)
+
+        ranking.incr_many({users[0].pk: 100})
+        self.assertEqual([row[1] for row in ranking.range(0, 1)], [users[0].pk, users[3].pk])
+        self.assertEqual(
+            [row[0] for row in ranking.range(ranking.rank(users[2].pk) - 1, ranking.rank(users[2].pk) + 1)],
+            [1, 2, 3],
+        )
+
+    def test_empty_and_negative_ranges(self):
+        db = get_user_model()
+        user = db.objects.create_user('username', 'username@example.com', 'password123')
+        ranking.get_ranking().rebuild()
+        self.assertEqual(ranking.top(0), [])
+        self.assertEqual(ranking.top(-1), [])
+        self.assertEqual(len(ranking.around(user.pk, 0)), 1)
+        with self.assertRaises(ValueError):
+            ranking.around(user.pk, -1)
+
+class AccountPurgeTests(TestCase):
+    def test_tombstoned_account_is_hidden_and_purged(self):
+        db = get_user_model()
+        user = db.objects.create_user(
+            'username', 'username@example.com', 'password123'
+        )
+        other = db.objects.create_user(
+            'other', 'other@example.com', 'password123'
+        )
+        Profile.add_following(other, user)
+        post = Post.objects.create(author=other.profile)
+        Comment.objects.create(author=user.profile, post_id=post, comment_content='comment')
+        room = ChatRoom.objects.create(created_by=other.profile, name='room')
+        Message.objects.create(author=user.profile, room=room, text='hello')
+        ChatRoom.objects.create(created_by=user.profile, name='own room')
+        Profile.all_objects.filter(user=user).update(deleted_on=timezone.now())
+        self.assertFalse(Profile.objects.filter(user=user).exists())
+        self.assertFalse(post.comments.exists())
+        self.assertFalse(room.message_set.exists())
+        self.assertEqual(list(ChatRoom.objects.values_list('name', flat=True)), ['room'])
+
+        call_command('purge_accounts', batch_size=1, stdout=StringIO())
+        self.assertFalse(db.objects.filter(pk=user.pk).exists())
+        self.assertTrue(db.objects.filter(pk=other.pk).exists())
+        self.assertFalse(Comment.all_objects.exists())
+        self.assertFalse(Message.all_objects.exists())
+        self.assertEqual(ChatRoom.all_objects.count(), 1)